@@ -12,6 +12,7 @@ import time
 from pkt_kg.downloads import OntData, LinkedData
 from pkt_kg.edge_list import CreatesEdgeList
 from pkt_kg.knowledge_graph import FullBuild, PartialBuild, PostClosureBuild
+from pkt_kg.worker_pool import WorkerPool
 
 
 def main():
@@ -28,6 +29,7 @@ def main():
     parser.add_argument('-s', '--owl', help='yes/no - removing OWL Semantics from knowledge graph', required=True)
     parser.add_argument('-m', '--nde', help='yes/no - adding node metadata to knowledge graph', required=True)
     parser.add_argument('-o', '--out', help='name/path to directory where to write knowledge graph', required=True)
+    parser.add_argument('-d', '--backend', help='edge list dataframe engine: "pandas" or "pyarrow"', default='pandas')
     args = parser.parse_args()
 
     ######################
@@ -54,7 +56,7 @@ def main():
     start = time.time()
     ent = LinkedData(data_path=args.edg, resource_data=args.res)
     # ent = LinkedData(data_path='resources/edge_source_list.txt', resource_data='resources/resource_info.txt')
-    ent.downloads_data_from_url()
+    ent.downloads_data_from_url(keep_compressed=True)  # edge data are decompressed as they are read
     end = time.time(); timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print('\nPKT: TOTAL SECONDS TO DOWNLOAD NON-ONTOLOGY DATA: {} @ {}'.format(end - start, timestamp))
 
@@ -63,14 +65,16 @@ def main():
     #####################
 
     # set-up environment
-    cpus = psutil.cpu_count(logical=True) if args.cpus is None else args.cpus; ray.init(ignore_reinit_error=True)
+    cpus = psutil.cpu_count(logical=True) if args.cpus is None else int(args.cpus); ray.init(ignore_reinit_error=True)
+    pool = WorkerPool(cpus)  # workers are shared by edge list creation, edge construction, and owl-nets decoding
 
     print('\n' + '=' * 28 + '\nPKT: CONSTRUCT EDGE LISTS\n' + '=' * 28 + '\n')
     start = time.time()
     combined_edges = dict(ent.data_files, **ont.data_files)
     # master_edges = CreatesEdgeList(data_files=combined_edges, source_file='resources/resource_info.txt')
-    master_edges = CreatesEdgeList(data_files=combined_edges, source_file=args.res)
-    master_edges.runs_creates_knowledge_graph_edges(source_file=args.res, data_files=combined_edges, cpus=cpus)
+    master_edges = CreatesEdgeList(data_files=combined_edges, source_file=args.res, backend=args.backend)
+    master_edges.runs_creates_knowledge_graph_edges(source_file=args.res, data_files=combined_edges, cpus=cpus,
+                                                    backend=args.backend, pool=pool)
     end = time.time(); timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print('\nPKT: TOTAL SECONDS TO BUILD THE MASTER EDGE LIST: {} @ {}'.format(end - start, timestamp))
 
@@ -89,21 +93,24 @@ def main():
                           inverse_relations=args.rel,
                           decode_owl=args.owl,
                           cpus=cpus,
-                          write_location=args.out)
+                          write_location=args.out,
+                          pool=pool)
     elif args.kg == 'post-closure':
         kg = PostClosureBuild(construction=args.app,
                               node_data=args.nde,
                               inverse_relations=args.rel,
                               decode_owl=args.owl,
                               cpus=cpus,
-                              write_location=args.out)
+                              write_location=args.out,
+                              pool=pool)
     else:
         kg = FullBuild(construction=args.app,
                        node_data=args.nde,
                        inverse_relations=args.rel,
                        decode_owl=args.owl,
                        cpus=cpus,
-                       write_location=args.out)
+                       write_location=args.out,
+                       pool=pool)
     kg.construct_knowledge_graph()
 
     # ray.shutdown()  # uncomment if running this independently of the CI/CD builds
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# import needed libraries
+import click
+import copy
+import glob
+import numpy  # type: ignore
+import os
+import pandas  # type: ignore
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+from typing import Any, Dict, List, Tuple
+
+import builds.data_preprocessing  # type: ignore
+
+# approximate number of rows in each source file for a current build
+source_sizes = {'mesh': 700000, 'chebi': 300000, 'disease_mappings': 180000, 'zooma': 1000, 'hpa': 20000,
+                'gtex': 56000, 'compath': 300, 'kegg_reactome': 100, 'ensembl': 400000, 'variant_summary': 2300000,
+                'gene_info': 65000}
+transcript_types = ['protein_coding', 'misc_RNA', 'lncRNA', 'snRNA', 'miRNA', 'processed_pseudogene']
+variant_types = ['single nucleotide variant', 'Deletion', 'Duplication', 'Indel', 'Insertion', 'copy number gain']
+
+
+def creates_source_data(scale: float, seed: int = 1) -> Dict:
+    """Creates random source data with the columns used by the DataPreprocessing methods and with the number of rows
+    in source_sizes multiplied by scale.
+
+    Args:
+        scale: A float used to scale the number of rows in each source.
+        seed: An integer used to seed the random number generator.
+
+    Returns:
+        data: A dict keyed by source name, whose values are Pandas DataFrames or dicts.
+    """
+
+    rng, data = numpy.random.default_rng(seed), {}
+    n = {k: max(10, int(v * scale)) for k, v in source_sizes.items()}
+    def ids(fmt: str, size: int, high: int) -> List: return [fmt.format(x) for x in rng.integers(0, high, size)]
+    # mesh and chebi
+    mesh_ids = ids('MESH_D{:06d}', n['mesh'], n['mesh'] // 2)
+    mesh_df = pandas.DataFrame({'ID': mesh_ids, 'TYP': 'NAME', 'STR': ids('name{}', n['mesh'], n['mesh'] * 5)})
+    data['mesh'] = (mesh_df, {x: {'dbx': set(ids('MESH_M{:07d}', 1, n['mesh'])) | set(ids('MESH_C{:06d}', 1, 100))}
+                              for x in set(mesh_ids)})
+    data['chebi'] = pandas.DataFrame({'ID': ids('CHEBI_{}', n['chebi'], n['chebi']), 'TYP': 'NAME',
+                                      'STR': ids('name{}', n['chebi'], n['mesh'] * 5)})
+    # disease mappings -- most vocabulary codes are mapped to a single CUI and about 1 in 5 to several CUIs. Revisions
+    # before the iterrows loops were replaced shared one set between the codes of a CUI, so a code mapped to several
+    # CUIs also added the mappings of its other CUIs to those codes and their output differs from later revisions
+    cuis = ids('C{:07d}', n['disease_mappings'], n['disease_mappings'] // 6)
+    vocab = rng.choice(['HPO', 'MONDO', 'DO', 'ORDO', 'ICD10', 'MSH', 'NCI'], n['disease_mappings'])
+    codes = [c[1:] if v in ['HPO', 'MONDO'] else v + '_' + c[1:] for c, v in zip(cuis, vocab)]
+    codes = ['HP:' + c if v == 'HPO' else c for c, v in zip(codes, vocab)]
+    shared = rng.choice(n['disease_mappings'], n['disease_mappings'] // 5, replace=False)
+    cuis = cuis + ids('C{:07d}', len(shared), n['disease_mappings'] // 6)
+    vocab, codes = numpy.concatenate([vocab, vocab[shared]]), codes + [codes[x] for x in shared]
+    data['disease_mappings.tsv'] = pandas.DataFrame({'diseaseId': cuis, 'name': 'disease', 'vocabulary': vocab,
+                                                     'code': codes, 'vocabularyName': 'vocabulary'})
+    data['mondo'] = {'umls:' + x.lower(): {'MONDO:' + x[1:]} for x in cuis[::3]}
+    data['hpo'] = {'umls:' + x.lower(): {'HP:' + x[1:]} for x in cuis[1::3]}
+    # hpa and gtex
+    onts = {x: pandas.Series(ids(x + '_{:07d}', n['zooma'], 5000)).where(rng.random(n['zooma']) > 0.5)
+            for x in ['UBERON', 'CL', 'CLO']}
+    data['zooma_tissue_cell_mapping_04JAN2020.xlsx'] = pandas.DataFrame({'TERM': ids(' tissue {} ', n['zooma'], 500),
+                                                                        **onts})
+    tissues = ['Adipose - Subcutaneous', 'Brain - Cortex', 'Cells - Cultured fibroblasts', 'Liver', 'Lung'] * 11
+    tissues = [x + ' ' + str(i) for i, x in enumerate(tissues[:54])]
+    def nx(size: int) -> List: return [';'.join(x + ': 1.5' for x in rng.choice(tissues, 1 + i % 3)) for i in
+                                       range(size)]
+    hpa = pandas.DataFrame({'Gene': ids('GENE{}', n['hpa'], 10 ** 6), 'Ensembl': ids('ENSG{:011d}', n['hpa'], 10 ** 5),
+                            'Uniprot': ids('P{:05d}', n['hpa'], 10 ** 5), 'Evidence': 'Evidence at protein level'})
+    for col in ['RNA tissue specific NX', 'RNA cell line specific NX', 'RNA brain regional specific NX',
+                'RNA blood cell specific NX', 'RNA blood lineage specific NX']:
+        hpa[col] = pandas.Series(nx(n['hpa'])).where(rng.random(n['hpa']) > 0.5)
+    for col in tissues[:10]: hpa['Tissue RNA - ' + col + ' [NX]'] = rng.random(n['hpa'])
+    data['proteinatlas_search.tsv'] = hpa
+    gtex = pandas.DataFrame({'Name': [x + '.5' for x in ids('ENSG{:011d}', n['gtex'], 10 ** 5)],
+                             'Description': ids('GENE{}', n['gtex'], 10 ** 6)})
+    data['GTEx_Analysis_*_RNASeQC*_gene_median_tpm.gct'] = pandas.concat(
+        [gtex, pandas.DataFrame(rng.exponential(1.0, (n['gtex'], len(tissues))), columns=tissues)], axis=1)
+    # pathways
+    kegg, reactome_ids = ids('path:hsa{:05d}', n['compath'], 400), ids('R-HSA-{}', n['compath'], 2000)
+    res = rng.choice(['kegg', 'reactome', 'wikipathways'], (2, n['compath']))
+    data['compath'] = pandas.DataFrame({0: 'name', 1: numpy.where(res[0] == 'kegg', kegg, reactome_ids), 2: res[0],
+                                        3: 'equivalentTo', 4: 'name', 5: numpy.where(res[0] == 'kegg', reactome_ids,
+                                                                                     kegg), 6: res[1]})
+    kegg, reactome_ids = ids('path:hsa{:05d}', n['kegg_reactome'], 400), ids('R-HSA-{}', n['kegg_reactome'], 2000)
+    src = rng.choice(['kegg', 'reactome'], n['kegg_reactome'])
+    data['kegg_reactome.csv'] = pandas.DataFrame({
+        'Source Resource': src, 'Source ID': numpy.where(src == 'kegg', kegg, reactome_ids),
+        'Target Resource': numpy.where(src == 'kegg', 'reactome', 'kegg'),
+        'Target ID': numpy.where(src == 'kegg', reactome_ids, kegg)})
+    data['pw_dict'] = {'kegg:{:05d}'.format(x): set(ids('PW:{:07d}', 2, 3000)) for x in range(0, 400, 2)}
+    data['reactome'] = {x: {'PW_0000001'} for x in ids('R-HSA-{}', 25000, 4000)}
+    # genomic types, transcripts, variants, and genes
+    data['genomic_sequence_ontology_mappings.xlsx'] = pandas.DataFrame({
+        'source_*_type': ['protein-coding', 'miscRNA'] + transcript_types[2:] + [x.lower() for x in variant_types],
+        'Genomic': ['Transcript'] * len(transcript_types) + ['Variant'] * len(variant_types),
+        'SO ID': ['SO_{:07d}'.format(x) for x in range(len(transcript_types) + len(variant_types))]})
+    transcripts = ids('ENST{:011d}', n['ensembl'], n['ensembl'] // 2)
+    data['ensembl_identifier_data_cleaned.txt'] = pandas.DataFrame({
+        'ensembl_gene_id': ids('ENSG{:011d}', n['ensembl'], 10 ** 5), 'transcript_stable_id': transcripts,
+        'protein_stable_id': 'None', 'uniprot_id': 'None', 'transcript_name': ids('GENE-{}', n['ensembl'], 10 ** 6),
+        'ensembl_transcript_type': [transcript_types[int(x[4:]) % 6] for x in transcripts],
+        'symbol': 'GENE', 'master_transcript_type': 'protein-coding', 'entrez_id': 'None',
+        'ensembl_gene_type': 'protein-coding', 'master_gene_type': 'protein-coding'})
+    data['ensembl_identifier_data_cleaned.txt'].loc[::7, 'transcript_name'] = 'None'
+    size = n['variant_summary']
+    data['variant_summary.txt'] = pandas.DataFrame({
+        '#AlleleID': numpy.arange(size), 'Type': rng.choice(variant_types, size),
+        'Name': pandas.Series(ids('NM_{}:c.395A>C', size, 10 ** 6)).where(rng.random(size) > 0.1, 'na'),
+        'ClinicalSignificance': 'Pathogenic', 'RS# (dbSNP)': numpy.where(rng.random(size) > 0.2,
+                                                                        rng.integers(0, size, size), -1),
+        'Origin': 'germline;somatic', 'Start': rng.integers(0, 10 ** 8, size), 'Stop': rng.integers(0, 10 ** 8, size),
+        'ChromosomeAccession': 'NC_000009.12', 'Chromosome': rng.choice(['1', '9', 'X', 'MT'], size),
+        'ReferenceAllele': 'na', 'Assembly': rng.choice(['GRCh37', 'GRCh38'], size), 'AlternateAllele': 'na',
+        'Cytogenetic': '9p13.2', 'ReviewStatus': 'criteria provided, single submitter',
+        'LastEvaluated': rng.choice(['Sep 30, 2020', 'Jan 01, 2019', '-'], size)})
+    size = n['gene_info']
+    data['Homo_sapiens.gene_info'] = pandas.DataFrame({
+        '#tax_id': numpy.where(rng.random(size) > 0.01, 9606, 10090), 'GeneID': numpy.arange(1, size + 1),
+        'Symbol': ids('GENE{}', size, 10 ** 6), 'Synonyms': pandas.Series(ids('A{0}|B{0}', size, 100)).where(
+            rng.random(size) > 0.3, '-'), 'chromosome': rng.choice(['1', '19', 'X', '-'], size),
+        'map_location': rng.choice(['19q13.43', '-'], size), 'description': 'alpha-1-B glycoprotein',
+        'type_of_gene': rng.choice(['protein-coding', 'ncRNA'], size),
+        'Other_designations': pandas.Series(ids('B{0}|C{0}', size, 100)).where(rng.random(size) > 0.3, '-')})
+
+    return data
+
+
+def loads_baseline_module(revision: str) -> types.ModuleType:
+    """Loads builds/data_preprocessing.py from a git revision as a module.
+
+    Args:
+        revision: A string containing a git revision (e.g. a commit hash or tag).
+
+    Returns:
+        module: The data_preprocessing module at the input revision.
+    """
+
+    source = subprocess.check_output(['git', 'show', revision + ':builds/data_preprocessing.py']).decode('utf-8')
+    module = types.ModuleType('builds.data_preprocessing_baseline'); module.__file__ = 'builds/data_preprocessing.py'
+    sys.modules[module.__name__] = module; exec(compile(source, module.__file__, 'exec'), module.__dict__)
+
+    return module
+
+
+def normalizes(output: Any) -> Any:
+    """Normalizes the output of a method so that outputs can be compared without depending on the iteration order of
+    sets (e.g. the order of values in lists and of '|'-delimited synonyms)."""
+
+    if isinstance(output, dict):
+        return {k: set(v.split('|')) if k == 'Synonym' else normalizes(v) for k, v in output.items()}
+    elif isinstance(output, (list, tuple)): return sorted(normalizes(x) for x in output)
+    else: return output
+
+
+def runs_method(module: types.ModuleType, data: Dict, input_dir: str, method: str, args: Tuple) -> Tuple:
+    """Runs a single DataPreprocessing method of module with the source data and returns the runtime and output.
+
+    Args:
+        module: A data_preprocessing module.
+        data: A dict of source data returned by creates_source_data.
+        input_dir: A string containing the directory that source files were written to.
+        method: A string containing the name of the method to run.
+        args: A tuple of arguments passed to the method.
+
+    Returns:
+        A tuple where the first item is a float containing the runtime in seconds and the second item is a tuple of the
+        normalized value returned by the method and the normalized lines of each file written by the method.
+    """
+
+    temp_dir = tempfile.mkdtemp()
+    for f_name in os.listdir(input_dir): os.symlink(os.path.join(input_dir, f_name), os.path.join(temp_dir, f_name))
+    module.downloads_data_from_gcs_bucket = lambda bucket, org, proc, f_name, tmp: os.path.join(input_dir, f_name)
+    module.uploads_data_to_gcs_bucket = lambda *args: None
+    dp = module.DataPreprocessing(None, 'original_data/', 'processed_data/', temp_dir)
+    dp.reads_gcs_bucket_data_to_df = lambda f_name, **kwargs: data[f_name].copy()
+    dp._processes_mesh_data = lambda: (data['mesh'][0].copy(), data['mesh'][1])
+    dp._processes_chebi_data = lambda: data['chebi'].copy()
+    dp._preprocess_mondo_mapping_data, dp._preprocess_hpo_mapping_data = lambda: data['mondo'], lambda: data['hpo']
+    dp._preprocesses_gene_types = lambda genomic_map: dict()
+    start = time.perf_counter(); result = getattr(dp, method)(*copy.deepcopy(args))
+    runtime, files = time.perf_counter() - start, dict()
+    for f_name in glob.glob(temp_dir + '/*.txt'):
+        if not os.path.islink(f_name):
+            with open(f_name) as f: files[os.path.basename(f_name)] = sorted(f.readlines())
+    shutil.rmtree(temp_dir)
+
+    return runtime, (normalizes(result), files)
+
+
+def prepares_source_data(data: Dict, input_dir: str) -> List[Tuple[str, Tuple]]:
+    """Writes the source files that the DataPreprocessing methods read from disk to input_dir and lists the methods
+    to compare.
+
+    Args:
+        data: A dict of source data returned by creates_source_data.
+        input_dir: A string containing the directory to write the source files to.
+
+    Returns:
+        methods: A list of tuples, where the first item is the name of a method and the second is a tuple of the
+            arguments passed to it.
+    """
+
+    for f_name in ['ensembl_identifier_data_cleaned.txt', 'variant_summary.txt', 'Homo_sapiens.gene_info']:
+        data[f_name].to_csv(os.path.join(input_dir, f_name), sep='\t', index=False)
+    genomic_map = {k + '_' + v: i for k, v, i in data['genomic_sequence_ontology_mappings.xlsx'].values}
+    data['compath_canonical_pathway_mappings.txt'] = data['compath']
+    methods: List[Tuple[str, Tuple]] = [
+        ('creates_chebi_to_mesh_identifier_mappings', ()), ('creates_disease_identifier_mappings', ()),
+        ('_hpa_gtex_ontology_alignment', ()), ('processes_hpa_gtex_data', ()),
+        ('_processes_compath_pathway_data', (data['reactome'], data['pw_dict'])),
+        ('_processes_kegg_pathway_data', (data['reactome'], data['pw_dict'])),
+        ('_preprocesses_transcript_types', (genomic_map, dict())),
+        ('_preprocesses_variant_types', (genomic_map, dict())), ('_creates_sequence_identifier_mappings', ()),
+        ('_creates_gene_metadata_dict', ()), ('_creates_transcript_metadata_dict', ()),
+        ('_creates_variant_metadata_dict', ())]
+
+    return methods
+
+
+@click.command()
+@click.option('--baseline', required=True, help='Git revision of the data_preprocessing.py to compare with.')
+@click.option('--scale', default=1.0, type=float, help='Multiplier applied to the size of each source.')
+def main(baseline, scale):
+
+    print('Creating Source Data (scale={})'.format(scale)); data = creates_source_data(scale)
+    input_dir = tempfile.mkdtemp(); methods = prepares_source_data(data, input_dir)
+    modules: Dict[str, Any] = {'baseline': loads_baseline_module(baseline), 'current': builds.data_preprocessing}
+    results: List = []
+    for method, args in methods:
+        base_time, base_output = runs_method(modules['baseline'], data, input_dir, method, args)
+        curr_time, curr_output = runs_method(modules['current'], data, input_dir, method, args)
+        results += [[method, round(base_time, 3), round(curr_time, 3), round(base_time / max(curr_time, 1e-9), 1),
+                     base_output == curr_output]]
+    shutil.rmtree(input_dir)
+    columns = ['method', 'baseline (s)', 'current (s)', 'speedup', 'identical output']
+    print(pandas.DataFrame(results, columns=columns).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -124,7 +124,7 @@ def updates_dependency_documents(gcs_url, file_url, bucket, temp_directory):
     return None
 
 
-def run_phase_2():
+def run_phase_2(cpus=1):
 
     # set temp directory to use locally for writing data to
     temp_dir = 'builds/temp'
@@ -150,13 +150,13 @@ def run_phase_2():
 
     #####################################################
     # STEP 2 - PREPROCESS BUILD DATA
-    lod_data = DataPreprocessing(bucket, gcs_original_data, gcs_processed_data, temp_dir)
+    lod_data = DataPreprocessing(bucket, gcs_original_data, gcs_processed_data, temp_dir, cpus)
     lod_data.preprocesses_build_data()
     uploads_data_to_gcs_bucket(bucket, gcs_log_location, log_dir, log)
 
     #####################################################
     # STEP 3 - CLEAN ONTOLOGY DATA
-    ont_data = OntologyCleaner(bucket, gcs_original_data, gcs_processed_data, temp_dir)
+    ont_data = OntologyCleaner(bucket, gcs_original_data, gcs_processed_data, temp_dir, cpus)
     ont_data.cleans_ontology_data()
     uploads_data_to_gcs_bucket(bucket, gcs_log_location, log_dir, log)
 
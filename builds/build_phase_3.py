@@ -22,6 +22,7 @@ from google.cloud import storage  # type: ignore
 from builds.build_utilities import *  # type: ignore
 from builds.phase3_log_daemon import PKTLogUploader  # type: ignore
 from pkt_kg.__version__ import __version__  # type: ignore
+from pkt_kg.metadata import Metadata  # type: ignore
 from pkt_kg.utils import *  # type: ignore
 
 # set environment variables
@@ -56,7 +57,10 @@ def uploads_build_data(bucket, gcs_location) -> None:
     uploads_data_to_gcs_bucket(bucket, gcs_location, resources_loc, 'Master_Edge_List_Dict.json')
     uploads_data_to_gcs_bucket(bucket, gcs_location, resources_loc + 'edge_data/', 'edge_source_metadata.txt')
     uploads_data_to_gcs_bucket(bucket, gcs_location, resources_loc + 'ontologies/', 'ontology_source_metadata.txt')
+    metadata = Metadata(__version__, kg_loc, '', [metadata_loc + 'node_metadata_dict.pkl'], dict())
+    metadata.metadata_processor(store=True); metadata.exports_metadata()  # the build only updates the store
     uploads_data_to_gcs_bucket(bucket, gcs_location, metadata_loc, 'node_metadata_dict.pkl')
+    uploads_data_to_gcs_bucket(bucket, gcs_location, metadata_loc, 'node_metadata_dict.db')
     uploads_data_to_gcs_bucket(bucket, gcs_location, construct_app, 'subclass_map_log.json')
 
     return None
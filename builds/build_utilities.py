@@ -2,16 +2,26 @@
 # -*- coding: utf-8 -*-
 
 # import needed libraries
+import base64
 import fnmatch
+import glob
+import hashlib
+import logging
 import os
+import shutil
 
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from google.api_core.exceptions import GoogleAPICallError  # type: ignore
 from google.cloud import storage  # type: ignore
+from multiprocessing import get_context
+
+from pkt_kg.utils import opens_data_file
 
 
 def uploads_data_to_gcs_bucket(bucket, original_data, temp_directory, filename):
     """Takes a file name and pushes the data referenced by the filename object and stored locally in that object to
-    a Google Cloud Storage bucket.
+    a Google Cloud Storage bucket. When bucket is not a storage Bucket and original_data is an existing local
+    directory, the file is copied to that directory instead (i.e. local filesystem mode).
 
     Args:
         bucket: A storage Bucket object specifying a Google Cloud Storage bucket.
@@ -27,13 +37,84 @@ def uploads_data_to_gcs_bucket(bucket, original_data, temp_directory, filename):
         print('Uploading {} to GCS bucket: {}'.format(filename, original_data))
         blob = bucket.blob(original_data + filename)
         blob.upload_from_filename(temp_directory + '/' + filename)
+    elif original_data is not None and os.path.isdir(original_data):
+        if not os.path.samefile(original_data, temp_directory):
+            shutil.copy(temp_directory + '/' + filename, os.path.join(original_data, filename))
 
     return None
 
 
-def downloads_data_from_gcs_bucket(bucket, original_data, processed_data, filename, temp_directory):
+def finds_bucket_file(bucket_files, filename):
+    """Finds the Google Cloud Storage bucket files that match a filename (which can include wildcards). Uncompressed
+    files are preferred, but if none match then files that match filename plus a '.gz' or '.zip' extension are returned.
+
+    Args:
+        bucket_files: A list of strings, where each string is a Google Cloud Storage bucket file path.
+        filename: A string containing the name (or wildcard pattern) of the file to search for.
+
+    Returns:
+        A list of matching Google Cloud Storage bucket file paths (which is empty when there are no matches).
+    """
+
+    for ext in ['', '.gz', '.zip']:
+        matches = fnmatch.filter(bucket_files, '*/' + filename + ext)
+        if len(matches) > 0: return matches
+
+    return []
+
+
+def decompresses_data_file(filepath):
+    """Writes a decompressed copy of a gzipped ('.gz') or zipped ('.zip') file next to it (i.e. the filepath without
+    the extension), if there is no copy that is newer than the file.
+
+    Args:
+        filepath: A string containing the path to a local gzipped or zipped file.
+
+    Returns:
+        data_file: A string containing the path to the decompressed copy of the file.
+    """
+
+    data_file = filepath[:-3] if filepath.endswith('.gz') else filepath[:-4]
+    if not os.path.exists(data_file) or os.path.getmtime(data_file) < os.path.getmtime(filepath):
+        with opens_data_file(filepath, binary=True) as f_in, open(data_file, 'wb') as out:
+            shutil.copyfileobj(f_in, out)
+
+    return data_file
+
+
+def finds_data_file(bucket, original_data, processed_data, filename):
+    """Finds the file matching filename, searching the processed_data directory before the original_data directory.
+    When bucket is not a storage Bucket, original_data and processed_data are treated as local directories.
+
+    Args:
+        bucket: A storage Bucket object specifying a Google Cloud Storage bucket.
+        original_data: A string containing a path to the original data directory (None to skip the directory).
+        processed_data: A string containing a path to the processed data directory (None to skip the directory).
+        filename: A string containing the name (or wildcard pattern) of the file to search for.
+
+    Returns:
+        A string containing the Google Cloud Storage bucket or local path of the matching file, or None if there is no
+        matching file.
+    """
+
+    for directory in [x for x in [processed_data, original_data] if x is not None]:
+        if isinstance(bucket, storage.bucket.Bucket): files = [_.name for _ in bucket.list_blobs(prefix=directory)]
+        else: files = glob.glob(os.path.join(directory, '*'))
+        matches = finds_bucket_file(files, filename)
+        if len(matches) > 0: return matches[0]
+
+    return None
+
+
+def downloads_data_from_gcs_bucket(bucket, original_data, processed_data, filename, temp_directory,
+                                   keep_compressed=False):
     """Takes a filename and and downloads the corresponding data to a local temporary directory, if it has not
-    already been downloaded.
+    already been downloaded. If the file is not found, a gzipped ('.gz') or zipped ('.zip') copy of the file is
+    searched for and downloaded, and a decompressed copy of it is returned (see decompresses_data_file) unless
+    keep_compressed is True (i.e. the caller reads the file with opens_data_file). When bucket is not a storage
+    Bucket, original_data and processed_data are treated as local directories and the file is copied from them (i.e.
+    local filesystem mode). In local filesystem mode, a file that is in neither directory is read from temp_directory
+    if it is stored there.
 
     Args:
         bucket: A storage Bucket object specifying a Google Cloud Storage bucket.
@@ -41,19 +122,22 @@ def downloads_data_from_gcs_bucket(bucket, original_data, processed_data, filena
         processed_data: A string containing a path to the processed data directory in a Google Cloud Storage bucket.
         filename: A string containing the name of file to write to a Google Cloud Storage bucket.
         temp_directory: A local directory where preprocessed data is stored.
+        keep_compressed: A bool indicating whether or not to return a gzipped or zipped copy of the file as is
+            (default=False).
 
     Returns:
         data_file: A string containing the local filepath for a file downloaded from a GSC bucket.
 
     Raises:
-        ValueError: when trying to download a non-existent file from the GCS original_data dir of the current build.
+        ValueError: when trying to download a non-existent file from the GCS original_data dir of the current build (or
+            from the local directories of the current build).
     """
 
     if isinstance(bucket, storage.bucket.Bucket):
         try:  # search processed bucket first
             if processed_data is not None:
                 _files = [_.name for _ in bucket.list_blobs(prefix=processed_data)]
-                proc_file = fnmatch.filter(_files, '*/' + filename)[0]
+                proc_file = finds_bucket_file(_files, filename)[0]
                 data_file = temp_directory + '/' + proc_file.split('/')[-1]
                 if not os.path.exists(data_file):  # only download if file has not yet been downloaded
                     bucket.blob(proc_file).download_to_filename(temp_directory + '/' + proc_file.split('/')[-1])
@@ -61,14 +145,73 @@ def downloads_data_from_gcs_bucket(bucket, original_data, processed_data, filena
         except IndexError:
             try:  # then search the original bucket
                 _files = [_.name for _ in bucket.list_blobs(prefix=original_data)]
-                org_file = fnmatch.filter(_files, '*/' + filename)[0]
+                org_file = finds_bucket_file(_files, filename)[0]
                 data_file = temp_directory + '/' + org_file.split('/')[-1]
                 if not os.path.exists(data_file):  # only download if file has not yet been downloaded
                     bucket.blob(org_file).download_to_filename(temp_directory + '/' + org_file.split('/')[-1])
             except IndexError:
                 raise ValueError('Cannot find {} in the GCS directories of the current build'.format(filename))
-        return data_file
-    else: return None
+    else:
+        local_file = finds_data_file(bucket, original_data, processed_data, filename)
+        if local_file is None:  # then search the temporary directory
+            local_file = finds_data_file(bucket, temp_directory, None, filename)
+            if local_file is None:
+                raise ValueError('Cannot find {} in the local directories of the current build'.format(filename))
+        data_file = temp_directory + '/' + local_file.split('/')[-1]
+        if not os.path.exists(data_file) or os.path.getmtime(data_file) < os.path.getmtime(local_file):  # new copy
+            shutil.copy(local_file, data_file)
+    if not keep_compressed and not fnmatch.fnmatch(data_file.split('/')[-1], filename):  # found a compressed copy
+        data_file = decompresses_data_file(data_file)
+
+    return data_file
+
+
+def hashes_file(filepath):
+    """Hashes the contents of a local file. The hash is the base64-encoded MD5 digest of the file, which is the same
+    hash Google Cloud Storage stores for each uploaded object.
+
+    Args:
+        filepath: A string containing the path to a local file.
+
+    Returns:
+        A string containing the base64-encoded MD5 digest of the file.
+    """
+
+    md5 = hashlib.md5()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1048576), b''): md5.update(block)
+
+    return base64.b64encode(md5.digest()).decode('utf-8')
+
+
+def hashes_data_file(bucket, original_data, processed_data, filename, temp_directory):
+    """Returns a content hash (see hashes_file) for the file matching filename, searching the processed_data directory
+    before the original_data directory. Files in a Google Cloud Storage bucket are hashed without being downloaded by
+    using the MD5 digest stored with the object; objects without one (e.g. composite objects) are downloaded to
+    temp_directory and hashed. When bucket is not a storage Bucket, original_data and processed_data are treated as
+    local directories.
+
+    Args:
+        bucket: A storage Bucket object specifying a Google Cloud Storage bucket.
+        original_data: A string containing a path to the original data directory (None to skip the directory).
+        processed_data: A string containing a path to the processed data directory (None to skip the directory).
+        filename: A string containing the name (or wildcard pattern) of the file to hash.
+        temp_directory: A local directory where preprocessed data is stored.
+
+    Returns:
+        A string containing the hash of the file or None if there is no matching file.
+    """
+
+    data_file = finds_data_file(bucket, original_data, processed_data, filename)
+    if data_file is None: return None
+    elif isinstance(bucket, storage.bucket.Bucket):
+        blob = bucket.get_blob(data_file)
+        if blob.md5_hash is not None: return blob.md5_hash
+        else:
+            local_file = temp_directory + '/' + data_file.split('/')[-1]
+            if not os.path.exists(local_file): blob.download_to_filename(local_file)
+            return hashes_file(local_file)
+    else: return hashes_file(data_file)
 
 
 def deletes_single_file(bucket, file_path):
@@ -140,3 +283,117 @@ def copies_data_between_gcs_bucket_directories(bucket, src_directory, dest_direc
                 if not rewrite_token: break
 
     return None
+
+
+# global build object (e.g. a DataPreprocessing or OntologyCleaner instance) used by the processes of a BuildProcessPool
+_builder = None
+
+
+class BuildProcessPool(object):
+    """Runs methods of a build object (e.g. a DataPreprocessing or OntologyCleaner instance) concurrently in a pool of
+    forked processes. Each process writes the log messages of a call to its own file, which is appended to the build
+    log when the call finishes. The pool can be used as a context manager, which shuts the pool down on exit.
+
+    Attributes:
+        builder: A build object, which is copied into each process.
+        cpus: An integer specifying the number of processes to use.
+        log_dir: A string pointing to the directory containing the build log.
+        log: A string containing the file name of the build log.
+    """
+
+    def __init__(self, builder, cpus, log_dir, log):
+
+        self.log_dir, self.log = log_dir, log
+        self.running = dict()  # maps the future of each running call to its name and log file
+        self.pool = ProcessPoolExecutor(max_workers=cpus, mp_context=get_context('fork'),
+                                        initializer=_initializes_builder, initargs=(builder,))
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *args):
+
+        self.shutdown()
+
+    def submits(self, name, method, *args):
+        """Starts a call to a method of the build object in one of the pool's processes. The log messages of the call
+        are written to a file named after the call.
+
+        Args:
+            name: A string containing the name of the call (e.g. a task or file name).
+            method: A string containing the name of the method to call.
+            *args: The arguments to pass to the method.
+
+        Returns:
+            A Future for the result of the call.
+        """
+
+        call_log = self.log_dir + '/' + os.path.basename(name).split('.')[0].strip('_') + '_' + self.log
+        future = self.pool.submit(_calls_builder, method, call_log, *args); self.running[future] = (name, call_log)
+
+        return future
+
+    def collects(self):
+        """Waits for at least one running call to finish and appends the log of each finished call to the build log.
+
+        Returns:
+            A list of tuples, where each tuple contains the name and the Future of a finished call.
+        """
+
+        done, _ = wait(list(self.running.keys()), return_when=FIRST_COMPLETED); finished = []
+        for future in done:
+            name, call_log = self.running.pop(future)
+            if os.path.exists(call_log):
+                with open(call_log) as f_in, open(self.log_dir + '/' + self.log, 'a') as f_out: f_out.write(f_in.read())
+                os.remove(call_log)
+            finished.append((name, future))
+
+        return finished
+
+    def shutdown(self):
+        """Shuts down the pool, cancelling any calls that have not started."""
+
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+        return None
+
+
+def _initializes_builder(builder):
+    """Stores the build object copied into a worker process. Google Cloud Storage clients cannot be shared across
+    forked processes, so the bucket is re-opened with a new client.
+
+    Args:
+        builder: A build object (e.g. a DataPreprocessing or OntologyCleaner instance).
+
+    Returns:
+        None.
+    """
+
+    global _builder
+    if isinstance(builder.bucket, storage.bucket.Bucket):
+        builder.bucket = storage.Client().get_bucket(builder.bucket.name)
+    _builder = builder
+
+    return None
+
+
+def _calls_builder(method, call_log, *args):
+    """Calls a method of the build object in a worker process, writing its log messages to call_log instead of the
+    build log.
+
+    Args:
+        method: A string containing the name of the method to call.
+        call_log: A string pointing to a file to write the call's log messages to.
+        *args: The arguments to pass to the method.
+
+    Returns:
+        The result of the call.
+    """
+
+    root_logger = logging.getLogger(); handlers = root_logger.handlers
+    call_handler = logging.FileHandler(call_log, mode='w')
+    call_handler.setFormatter(handlers[0].formatter if len(handlers) > 0 else None)
+    root_logger.handlers = [call_handler]
+    try: return getattr(_builder, method)(*args)
+    finally: call_handler.close(); root_logger.handlers = handlers
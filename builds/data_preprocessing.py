@@ -6,23 +6,25 @@
 import glob
 # import itertools
 import logging.config
-import networkx  # type: ignore
 import numpy  # type: ignore
+import hashlib
+import json
 import os
 import pandas  # type: ignore
 import pickle
 import re
 import requests
-import sys
 
 from google.cloud import storage  # type: ignore
 from rdflib import Graph, Namespace, URIRef  # type: ignore
 from rdflib.namespace import RDFS, OWL  # type: ignore
 from reactome2py import content  # type: ignore
 from tqdm import tqdm  # type: ignore
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Generator, Iterable, List, Optional, Tuple, Union
 
 # import script containing helper functions
+import builds.build_utilities
+import pkt_kg.utils
 from builds.build_utilities import *
 from pkt_kg.utils import *
 
@@ -49,17 +51,27 @@ class DataPreprocessing(object):
 
     Companion Notebook: https://github.com/callahantiff/PheKnowLator/blob/master/notebooks/Data_Preparation.ipynb
 
+    The data can also be processed without Google Cloud Storage: when gcs_bucket is not a storage Bucket (e.g. None),
+    org_data and processed_data are treated as local directories, source files are copied from them to temp_dir, and
+    processed files are copied from temp_dir to processed_data (which is created if the directory containing it exists).
+
     Attributes:
         gcs_bucket: A storage Bucket object specifying a Google Cloud Storage bucket.
         org_data: A string specifying the location of the original_data directory for a specific build.
         processed_data: A string specifying the location of the original_data directory for a specific build.
         temp_dir: A string specifying a temporary directory to use while processing data locally.
+        cpus: An integer specifying the number of processes to use when reading large data files, such as the Ensembl
+            GTF file, and when running independent build tasks (default=1).
+        tasks: A dict describing the build task graph, keyed by the name of the method that runs each task. The inputs
+            and outputs of a task are the names (or wildcard patterns) of the files it reads and writes, and a task
+            depends on the tasks that write its inputs (see preprocesses_build_data).
     """
 
-    def __init__(self, gcs_bucket: storage.bucket.Bucket, org_data: str, processed_data: str, temp_dir: str) -> None:
+    def __init__(self, gcs_bucket: Optional[storage.bucket.Bucket], org_data: str, processed_data: str, temp_dir: str,
+                 cpus: int = 1) -> None:
 
         # GOOGLE CLOUD STORAGE VARIABLES
-        self.bucket: storage.bucket.Bucket = gcs_bucket
+        self.bucket: Optional[storage.bucket.Bucket] = gcs_bucket
         self.original_data: str = org_data
         self.processed_data: str = processed_data
         self.log_location = 'temp_build_inprogress/'  # directory for storing logs
@@ -67,8 +79,68 @@ class DataPreprocessing(object):
         self.temp_dir = temp_dir
         self.owltools_location = './builds/owltools'
         # self.owltools_location = './pkt_kg/libs/owltools'
+        self.cpus: int = cpus
         # OTHER CLASS VARIABLES
         self.genomic_type_mapper: Dict = {}
+        # BUILD TASK GRAPH -- each task is a method, the files it reads (inputs), and the files it writes (outputs)
+        self.task_cache: str = 'data_preprocessing_task_cache.json'
+        pathway_files = ['ReactomePathways.txt', 'gene_association.reactome', 'ChEBI2Reactome_All_Levels.txt']
+        self.tasks: Dict = {
+            'generates_specific_genomic_identifier_maps': {
+                'step': 'STEP 1: HUMAN TRANSCRIPT, GENE, PROTEIN ID MAPPING',
+                'inputs': ['genomic_typing_dict.pkl', 'hgnc_complete_set.txt', 'Homo_sapiens.GRCh38.*.gtf',
+                           'Homo_sapiens.GRCh38.*.uniprot.tsv', 'Homo_sapiens.GRCh38.*.entrez.tsv',
+                           'uniprot_identifier_mapping.tab', 'Homo_sapiens.gene_info', 'promapping.txt'],
+                'outputs': ['ensembl_identifier_data_cleaned.txt', 'Merged_gene_rna_protein_identifiers.idmap',
+                            'ENSEMBL_GENE_ENTREZ_GENE_MAP.txt', 'ENSEMBL_TRANSCRIPT_PROTEIN_ONTOLOGY_MAP.txt',
+                            'ENTREZ_GENE_ENSEMBL_TRANSCRIPT_MAP.txt', 'ENTREZ_GENE_PRO_ONTOLOGY_MAP.txt',
+                            'GENE_SYMBOL_ENSEMBL_TRANSCRIPT_MAP.txt', 'STRING_PRO_ONTOLOGY_MAP.txt',
+                            'UNIPROT_ACCESSION_PRO_ONTOLOGY_MAP.txt']},
+            'creates_chebi_to_mesh_identifier_mappings': {
+                'step': 'STEP 2: MESH-CHEBI ID MAPPING',
+                'inputs': ['mesh*.nt', 'names.tsv'],
+                'outputs': ['MESH_CHEBI_MAP.txt']},
+            'creates_disease_identifier_mappings': {
+                'step': 'STEP 3: DISEASE-PHENOTYPE ID MAPPING',
+                'inputs': ['mondo_with_imports.owl', 'hp_with_imports.owl', 'disease_mappings.tsv'],
+                'outputs': ['DISEASE_MONDO_MAP.txt', 'PHENOTYPE_HPO_MAP.txt']},
+            '_hpa_gtex_ontology_alignment': {
+                'step': 'STEP 4: ALIGNING HPA + GTEX DATA TO ONTOLOGIES',
+                'inputs': ['zooma_tissue_cell_mapping_04JAN2020.xlsx'],
+                'outputs': ['HPA_GTEx_TISSUE_CELL_MAP.txt']},
+            'processes_hpa_gtex_data': {
+                'step': 'STEP 4: CREATING HPA + GTEX ID EDGE DATA',
+                'inputs': ['proteinatlas_search.tsv', 'GTEx_Analysis_*_RNASeQC*_gene_median_tpm.gct'],
+                'outputs': ['HPA_tissues.txt', 'HPA_GTEX_RNA_GENE_PROTEIN_EDGES.txt']},
+            'combines_pathway_and_sequence_ontology_dictionaries': {
+                'step': 'STEP 5: SEQUENCE ONTOLOGY + PATHWAY ID MAP',
+                'inputs': ['genomic_sequence_ontology_mappings.xlsx', 'Merged_gene_rna_protein_identifiers.idmap',
+                           'ensembl_identifier_data_cleaned.txt', 'variant_summary.txt', 'pw_with_imports.owl',
+                           'compath_canonical_pathway_mappings.txt', 'kegg_reactome.csv'] + pathway_files,
+                'outputs': ['SO_GENE_TRANSCRIPT_VARIANT_TYPE_MAPPING.txt', 'REACTOME_PW_GO_MAPPINGS.txt',
+                            'subclass_construction_map.pkl']},
+            'constructs_human_protein_ontology': {
+                'step': 'STEP 6: CREATING A HUMAN PROTEIN ONTOLOGY',
+                'inputs': ['pr_with_imports.owl'],
+                'outputs': ['human_pro.owl', 'pr_with_imports.owl']},
+            'processes_relation_ontology_data': {
+                'step': 'STEP 7: EXTRACTING RELATION ONTOLOGY INFO',
+                'inputs': ['ro_with_imports.owl'],
+                'outputs': ['INVERSE_RELATIONS.txt', 'RELATIONS_LABELS.txt']},
+            'processes_clinvar_data': {
+                'step': 'STEP 8: CREATING CLINVAR VARIANT-DISEASE-PHENOTYPE DATA',
+                'inputs': ['variant_summary.txt'],
+                'outputs': ['CLINVAR_VARIANT_GENE_DISEASE_PHENOTYPE_EDGES.txt']},
+            'processes_cofactor_catalyst_data': {
+                'step': 'STEP 9: CREATING COFACTOR + CATALYST EDGE DATA',
+                'inputs': ['uniprot-cofactor-catalyst.tab'],
+                'outputs': ['UNIPROT_PROTEIN_COFACTOR.txt', 'UNIPROT_PROTEIN_CATALYST.txt']},
+            'creates_non_ontology_class_metadata_dict': {
+                'step': 'STEP 10: CREATING OBO-ONTOLOGY METADATA DICTIONARY',
+                'inputs': ['Homo_sapiens.gene_info', 'ensembl_identifier_data_cleaned.txt', 'variant_summary.txt',
+                           'ro_with_imports.owl'] + pathway_files,
+                'outputs': ['node_metadata_dict.pkl']}
+        }
 
     def reads_gcs_bucket_data_to_df(self, f_name: str, delm: str, skip: int = 0,
                                     head: Optional[Union[int, List]] = None,
@@ -101,6 +173,22 @@ class DataPreprocessing(object):
 
         return df
 
+    @staticmethod
+    def _joins_columns(data: pandas.DataFrame) -> pandas.Series:
+        """Joins the columns of each row in a Pandas DataFrame into a tab-delimited line so that the data can be
+        written to a file in a single call.
+
+        Args:
+            data: A Pandas DataFrame object with at least two columns.
+
+        Returns:
+            A Pandas Series of newline-terminated strings, one per row in data.
+        """
+
+        cols = [data.iloc[:, i].astype(str).to_numpy() for i in range(data.shape[1])]
+
+        return pandas.Series(cols[0], dtype=object).str.cat(cols[1:], sep='\t') + '\n'
+
     def _loads_genomic_typing_dictionary(self) -> None:
         """Downloads and loads genomic typing dictionary needed to process the genomic identifier data. This
         dictionary object is keyed by specific column names in each genomic identifier Pandas DataFrame and has
@@ -162,12 +250,34 @@ class DataPreprocessing(object):
 
         return explode_df_hgnc
 
+    @staticmethod
+    def _maps_genomic_types(types: pandas.Series, type_dict: Dict) -> pandas.Series:
+        """Maps a Pandas Series of genomic types using a dictionary from the genomic typing dictionary. Each key in
+        type_dict is replaced by its value in dictionary order, so a value can be replaced again by a later key. The
+        replacements are worked out once for each distinct type and then applied to types with a single map.
+
+        Args:
+            types: A Pandas Series of genomic types.
+            type_dict: A dict keyed by genomic type, whose values are the genomic type to replace the key with.
+
+        Returns:
+            A Pandas Series of mapped genomic types.
+        """
+
+        type_map = dict()
+        for typ in types.unique():
+            type_map[typ] = typ
+            for key, value in type_dict.items(): type_map[typ] = value if type_map[typ] == key else type_map[typ]
+
+        return types.map(type_map)
+
     def _preprocess_ensembl_data(self) -> pandas.DataFrame:
         """Processes Ensembl data in order to prepare it for combination with other gene identifier data sources. Data
         needs to be reformatted in order for it to be able to be merged with the other gene, RNA, and protein identifier
-        data. To do this, we iterate over each row of the data and extract the fields shown below in column_names,
-        making each of these extracted fields their own column. The final step is to update the gene_type variable such
-        that each of the variable values is re-grouped to be protein-coding, other or ncRNA.
+        data. To do this, the transcript records of the GTF file are streamed (in cpus byte ranges when the file is not
+        compressed) and the fields shown below in column_names are extracted from each record's attributes, making
+        each of these extracted fields their own column. The final step is to update the gene_type variable such that
+        each of the variable values is re-grouped to be protein-coding, other or ncRNA.
 
         Returns:
             ensembl_geneset: A Pandas DataFrame containing processed and filtered data.
@@ -176,29 +286,20 @@ class DataPreprocessing(object):
         logger.info('Preprocessing Ensembl Data')
 
         f_name = 'Homo_sapiens.GRCh38.*.gtf'
-        ensembl = self.reads_gcs_bucket_data_to_df(f_name=f_name, delm='\t', skip=5)
-        ensembl_data = list(ensembl[8]); ensembl_df_data = []
-        for i in tqdm(range(0, len(ensembl_data))):
-            if 'gene_id' in ensembl_data[i] and 'transcript_id' in ensembl_data[i]:
-                row = {x.split(' "')[0].lstrip(): x.split(' "')[1].strip('"') for x in ensembl_data[i].split(';')[0:-1]}
-                ensembl_df_data += [(row['gene_id'], row['transcript_id'], row['gene_name'], row['gene_biotype'],
-                                     row['transcript_name'], row['transcript_biotype'])]
-        # convert to data frame
-        ensembl_geneset = pandas.DataFrame(ensembl_df_data,
-                                           columns=['ensembl_gene_id', 'transcript_stable_id', 'symbol',
-                                                    'ensembl_gene_type', 'transcript_name', 'ensembl_transcript_type'])
-        # reformat ensembl gene type
-        gene_dict = self.genomic_type_mapper['ensembl_gene_type']
-        for val in gene_dict.keys(): ensembl_geneset['ensembl_gene_type'].replace(val, gene_dict[val], inplace=True)
-        # reformat master gene type
-        ensembl_geneset['master_gene_type'] = ensembl_geneset['ensembl_gene_type']
-        gene_dict = self.genomic_type_mapper['ensembl_master_gene_type']
-        for val in gene_dict.keys(): ensembl_geneset['master_gene_type'].replace(val, gene_dict[val], inplace=True)
+        x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data, f_name, self.temp_dir)
+        attributes = ['gene_id', 'transcript_id', 'gene_name', 'gene_biotype', 'transcript_name', 'transcript_biotype']
+        column_names = ['ensembl_gene_id', 'transcript_stable_id', 'symbol', 'ensembl_gene_type', 'transcript_name',
+                        'ensembl_transcript_type']
+        ensembl_geneset = reads_gtf_records(x, ['transcript'], attributes, self.cpus).drop(columns='feature')
+        ensembl_geneset.columns = column_names
+        # reformat ensembl gene type and master gene type
+        maps, type_dict, genes = self._maps_genomic_types, self.genomic_type_mapper, ensembl_geneset
+        genes['ensembl_gene_type'] = maps(genes['ensembl_gene_type'], type_dict['ensembl_gene_type'])
+        genes['master_gene_type'] = maps(genes['ensembl_gene_type'], type_dict['ensembl_master_gene_type'])
         # reformat master transcript type
-        ensembl_geneset['ensembl_transcript_type'].replace('vault_RNA', 'vaultRNA', inplace=True, regex=False)
-        ensembl_geneset['master_transcript_type'] = ensembl_geneset['ensembl_transcript_type']
-        trans_d = self.genomic_type_mapper['ensembl_master_transcript_type']
-        for val in trans_d.keys(): ensembl_geneset['master_transcript_type'].replace(val, trans_d[val], inplace=True)
+        genes['ensembl_transcript_type'] = maps(genes['ensembl_transcript_type'], {'vault_RNA': 'vaultRNA'})
+        genes['master_transcript_type'] = maps(genes['ensembl_transcript_type'],
+                                               type_dict['ensembl_master_transcript_type'])
         # post-process reformatted data
         ensembl_geneset.drop_duplicates(inplace=True)
 
@@ -422,79 +523,116 @@ class DataPreprocessing(object):
 
         return merged_data_clean
 
-    def _cross_maps_genomic_identifier_data(self) -> Dict:
+    def _pairs_genomic_identifier_data(self) -> Generator:
         """Takes a Pandas Dataframe of merged genomic identifiers and expands them to create a complete mapping between
-        the identifiers. A master dictionary is built, where the keys are ensembl_gene_id, transcript_stable_id,
-        protein_stable_id, uniprot_id, entrez_id, hgnc_id, and pro_id identifiers and values are the list of identifiers
-        that match to each identifier. This function takes 40-50 minutes to complete.
+        the identifiers. The data are melted into a long table of (row, column, value) entries once, which is then
+        joined to the rows of each identifier column (i.e. ensembl_gene_id, transcript_stable_id, protein_stable_id,
+        uniprot_id, entrez_id, hgnc_id, pro_id, and symbol) in turn.
 
         Returns:
-            master_dict: A dict where keys are genomic identifiers and values are lists of other identifiers and
-                metadata mapped to that identifier.
+            A generator of Pandas DataFrames, one per identifier column, with one row per identifier and mapped value
+            (i.e. columns "key" and "value").
         """
 
         logger.info('Cross-Mapping Genomic Identifier Data')
 
         # reformat data to convert all nones, empty values, and unknowns to NaN
-        merged_data: pandas.DataFrame = self._fixes_genomic_symbols(); master_dict: Dict = {}
+        merged_data: pandas.DataFrame = self._fixes_genomic_symbols().reset_index(drop=True)
         for col in merged_data.columns:
-            merged_data[col] = merged_data[col].apply(lambda x: '|'.join([i for i in x.split('|') if i != 'None']))
+            nones = merged_data[col].str.contains('None', regex=False)  # only rewrite values listing a None
+            merged_data.loc[nones, col] = merged_data.loc[nones, col].apply(
+                lambda x: '|'.join([i for i in x.split('|') if i != 'None']))
         merged_data.replace(to_replace=['None', '', 'unknown'], value=numpy.nan, inplace=True)
         identifiers = [x for x in merged_data.columns if x.endswith('_id')] + ['symbol']
-        # convert data to dictionary
+        # convert data to long (row, column, value) format and join the values mapped to each identifier
+        long_data = merged_data.melt(var_name='col', value_name='value', ignore_index=False).dropna()
+        long_data['value'] = long_data['col'] + '_' + long_data['value']
         for idx in tqdm(identifiers):
-            grouped_data = merged_data.groupby(idx)
-            grp_ids = set([x for x in list(grouped_data.groups.keys()) if x != numpy.nan])
-            for grp in grp_ids:
-                df = grouped_data.get_group(grp).dropna(axis=1, how='all')
-                df_cols, key = df.columns, idx + '_' + grp
-                val_df = [[c + '_' + x for x in set(df[c]) if isinstance(x, str)] for c in df_cols if c != idx]
-                if len(val_df) > 0:
-                    if key in master_dict.keys(): master_dict[key] += [i for j in val_df for i in j if len(i) > 0]
-                    else: master_dict[key] = [i for j in val_df for i in j if len(i) > 0]
+            keys = (idx + '_' + merged_data[idx].dropna()).rename('key')
+            pairs = long_data.loc[long_data['col'] != idx, ['value']].join(keys, how='inner')
+            yield pairs[['key', 'value']].drop_duplicates()
+
+    def _cross_maps_genomic_identifier_data(self, columnar: bool = False) -> Union[Dict, pandas.DataFrame]:
+        """Creates a master dictionary from the cross-mapped genomic identifiers (see _pairs_genomic_identifier_data),
+        where the keys are ensembl_gene_id, transcript_stable_id, protein_stable_id, uniprot_id, entrez_id, hgnc_id,
+        and pro_id identifiers and values are the list of identifiers that match to each identifier. The values are
+        aggregated in a single groupby per identifier column.
+
+        Args:
+            columnar: A bool indicating whether to return the mapping as a Pandas DataFrame adjacency table with one
+                row per identifier and mapped value (i.e. columns "key" and "value") instead of a dict (default=False).
+
+        Returns:
+            master_dict: A dict where keys are genomic identifiers and values are lists of other identifiers and
+                metadata mapped to that identifier. If columnar is True, a Pandas DataFrame with the same content.
+        """
+
+        if columnar: return pandas.concat(list(self._pairs_genomic_identifier_data()), ignore_index=True)
+        master_dict: Dict = {}
+        for pairs in self._pairs_genomic_identifier_data():
+            master_dict.update(pairs.groupby('key', sort=False)['value'].agg(list).to_dict())
 
         return master_dict
 
-    def creates_master_genomic_identifier_map(self) -> Dict:
+    def _streams_genomic_identifier_data(self) -> Generator:
+        """Yields the entries of the master dictionary created by _cross_maps_genomic_identifier_data, in the same
+        order, while only holding the cross-mapped identifiers of one identifier column in memory at a time.
+
+        Returns:
+            A generator of tuples, where the first item is a genomic identifier and the second is a list of other
+            identifiers and metadata mapped to that identifier.
+        """
+
+        for pairs in self._pairs_genomic_identifier_data():
+            codes, keys = pandas.factorize(pairs['key'], sort=False)  # keys are numbered in order of appearance
+            order = numpy.argsort(codes, kind='stable'); values = pairs['value'].to_numpy()[order]
+            bounds = numpy.searchsorted(codes[order], numpy.arange(len(keys) + 1))
+            for i, key in enumerate(keys): yield key, values[bounds[i]:bounds[i + 1]].tolist()
+
+    def creates_master_genomic_identifier_map(self) -> GenomicIdMap:
         """Identifies a master gene and transcript type for each entity because the last ran code chunk can result in
         several genes and transcripts with differing types (i.e. protein-coding or not protein-coding). The next step
         collects all information for each gene and transcript and performs a voting procedure to select a single
-        primary gene and transcript type.
+        primary gene and transcript type. The cross-mapped identifiers are streamed one identifier column at a time and
+        each identifier is written to a compact genomic identifier map file (see writes_genomic_id_map) as soon as it
+        is processed, so the full map is never held in memory.
 
         Returns:
-            reformatted_mapped_ids: A dict containing genomic identifier information which is keyed by genomic
+            reformatted_mapped_ids: A GenomicIdMap containing genomic identifier information which is keyed by genomic
                 identifier types and where values are lists of all other genomic identifiers that map to that key.
         """
 
         print('\t- Creating Genomic ID Cross-Map Dictionary'); logger.info('Creating Genomic ID Cross-Map Dictionary')
 
-        master_dict = self._cross_maps_genomic_identifier_data(); reformatted_mapped_identifiers = dict()
-        for key, values in tqdm(master_dict.items()):
-            identifier_info = set(values); gene_prefix = 'master_gene_type_'; trans_prefix = 'master_transcript_type_'
-            if key.split('_')[0] in ['protein', 'uniprot', 'pro']: pass
-            elif 'transcript' in key:
-                trans_match = [x.replace(trans_prefix, '') for x in values if trans_prefix in x]
-                if len(trans_match) > 0:
-                    t_type_list = ['protein-coding'
-                                   if ('protein-coding' in trans_match or 'protein_coding' in trans_match)
-                                   else 'not protein-coding']
-                    identifier_info |= {'transcript_type_update_' + max(set(t_type_list), key=t_type_list.count)}
-            else:
-                gene_match = [x.replace(gene_prefix, '') for x in values if x.startswith(gene_prefix) and 'type' in x]
-                if len(gene_match) > 0:
-                    g_type_list = ['protein-coding'
-                                   if ('protein-coding' in gene_match or 'protein_coding' in gene_match)
-                                   else 'not protein-coding']
-                    identifier_info |= {'gene_type_update_' + max(set(g_type_list), key=g_type_list.count)}
-            reformatted_mapped_identifiers[key] = identifier_info
-        # save results for output > 4GB requires special approach: https://stackoverflow.com/questions/42653386
-        filename = 'Merged_gene_rna_protein_identifiers.pkl'
-        with open(self.temp_dir + '/' + filename, 'wb') as f_out:
-            for idx in range(0, sys.getsizeof(pickle.dumps(reformatted_mapped_identifiers)), 2 ** 31 - 1):
-                f_out.write(pickle.dumps(reformatted_mapped_identifiers)[idx:idx + (2 ** 31 - 1)])
+        gene_prefix, trans_prefix = 'master_gene_type_', 'master_transcript_type_'
+
+        def _reformats_identifiers(master_items: Iterable) -> Generator:
+            for key, values in tqdm(master_items):
+                identifier_info = set(values)
+                if key.split('_')[0] in ['protein', 'uniprot', 'pro']: pass
+                elif 'transcript' in key:
+                    trans_match = [x.replace(trans_prefix, '') for x in values if trans_prefix in x]
+                    if len(trans_match) > 0:
+                        t_type_list = ['protein-coding'
+                                       if ('protein-coding' in trans_match or 'protein_coding' in trans_match)
+                                       else 'not protein-coding']
+                        identifier_info |= {'transcript_type_update_' + max(set(t_type_list), key=t_type_list.count)}
+                else:
+                    gene_match = [x.replace(gene_prefix, '') for x in values
+                                  if x.startswith(gene_prefix) and 'type' in x]
+                    if len(gene_match) > 0:
+                        g_type_list = ['protein-coding'
+                                       if ('protein-coding' in gene_match or 'protein_coding' in gene_match)
+                                       else 'not protein-coding']
+                        identifier_info |= {'gene_type_update_' + max(set(g_type_list), key=g_type_list.count)}
+                yield key, sorted(identifier_info)
+
+        filename = 'Merged_gene_rna_protein_identifiers.idmap'
+        writes_genomic_id_map(_reformats_identifiers(self._streams_genomic_identifier_data()),
+                              self.temp_dir + '/' + filename)
         uploads_data_to_gcs_bucket(self.bucket, self.processed_data, self.temp_dir, filename)
 
-        return reformatted_mapped_identifiers
+        return GenomicIdMap(self.temp_dir + '/' + filename)
 
     def generates_specific_genomic_identifier_maps(self) -> None:
         """Method takes a list of information needed to create mappings between specific sets of genomic identifiers.
@@ -522,9 +660,12 @@ class DataPreprocessing(object):
             ['UNIPROT_ACCESSION_PRO_ONTOLOGY_MAP.txt', 'uniprot_id', 'pro_id', None, None, None, None, False, True]
         ]
 
+        # index identifiers by prefix once and reuse the index for each gene set
+        prefixes = [i for x in gene_sets for i in x[1:7] if i is not None]
+        genomic_index = genomic_id_indexer(reformatted_mapped_identifiers, prefixes)  # type: ignore
         for x in gene_sets:
             genomic_id_mapper(reformatted_mapped_identifiers, self.temp_dir + '/' + x[0],  # type: ignore
-                              x[1], x[2], x[3], x[4], x[5], x[6])  # type: ignore
+                              x[1], x[2], x[3], x[4], x[5], x[6], genomic_index)  # type: ignore
             uploads_data_to_gcs_bucket(self.bucket, self.processed_data, self.temp_dir, x[0])  # type: ignore
 
         return None
@@ -543,8 +684,10 @@ class DataPreprocessing(object):
         print('\t- Processing MeSH Data'); logger.info('Preprocessing MeSH Data')
 
         f_name = 'mesh*.nt'
-        x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data, f_name, self.temp_dir)
-        mesh = [i.split('> ') for i in tqdm(open(x, 'r').readlines())]; msh_dict: Dict = {}; res: List = []
+        x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data, f_name, self.temp_dir,
+                                           keep_compressed=True)
+        with opens_data_file(x) as f: mesh = [i.split('> ') for i in tqdm(f)]
+        msh_dict: Dict = {}; res: List = []
         for row in tqdm(mesh):
             s, p, o, dbx, lab, msh_type = row[0].split('/')[-1], row[1].split('#')[-1], row[2], None, None, None
             if s[0] in ['C', 'D'] and ('.' not in s and 'Q' not in s) and len(s) >= 5:
@@ -609,17 +752,16 @@ class DataPreprocessing(object):
         mesh_df, mesh_dict = self._processes_mesh_data(); chebi_df = self._processes_chebi_data()
         merge_cols = ['STR', 'ID']
         identifier_merge = pandas.merge(chebi_df[merge_cols], mesh_df[merge_cols], on='STR')
-        # filter merged data
-        mesh_edges = set()
-        for idx, row in identifier_merge.drop_duplicates().iterrows():
-            mesh, chebi = row['ID_y'], row['ID_x']; mesh_edges.add(tuple([mesh, chebi]))
-            syns = [x for x in mesh_dict[mesh]['dbx'] if 'C' in x or 'D' in x]
-            if len(syns) > 0:
-                for x in syns: mesh_edges.add(tuple([x, chebi]))
+        # filter merged data -- adding an edge from each MeSH dbxref (i.e. concept) to the ChEBI identifier
+        mesh_edges = identifier_merge[['ID_y', 'ID_x']].drop_duplicates(); mesh_edges.columns = ['MESH', 'CHEBI']
+        dbx = pandas.Series({k: v['dbx'] for k, v in mesh_dict.items()}, dtype=object).explode().dropna()
+        dbx = dbx[dbx.str.contains('C', regex=False) | dbx.str.contains('D', regex=False)]
+        dbx_edges = mesh_edges.merge(pandas.DataFrame({'MESH': dbx.index, 'DBX': dbx.values}), on='MESH')
+        mesh_edges = pandas.concat([mesh_edges, dbx_edges[['DBX', 'CHEBI']].set_axis(['MESH', 'CHEBI'], axis=1)])
+        mesh_edges = mesh_edges.drop_duplicates()
         # write results and push data to gcs bucket
         filename = 'MESH_CHEBI_MAP.txt'
-        with open(self.temp_dir + '/' + filename, 'w') as out:
-            for pair in mesh_edges: out.write(pair[0] + '\t' + pair[1] + '\n')
+        with open(self.temp_dir + '/' + filename, 'w') as out: out.write(''.join(self._joins_columns(mesh_edges)))
         uploads_data_to_gcs_bucket(self.bucket, self.processed_data, self.temp_dir, filename)
 
         return None
@@ -680,29 +822,24 @@ class DataPreprocessing(object):
         data['vocabulary'], data['diseaseId'] = data['vocabulary'].str.lower(), data['diseaseId'].str.lower()
         data['vocabulary'] = ['doid' if x == 'do' else 'ordoid' if x == 'ordo' else x for x in data['vocabulary']]
         # get all CUIs mapped to HPO and MONDO
-        ont_dict: Dict = {}; disease_data_keep = data.query('vocabulary == "hpo" | vocabulary == "mondo"')
-        for idx, row in tqdm(disease_data_keep.iterrows(), total=disease_data_keep.shape[0]):
-            if row['vocabulary'] == 'mondo': key, value = 'umls:' + row['diseaseId'], 'MONDO:' + row['code']
-            else: key, value = 'umls:' + row['diseaseId'], row['code']
-            if key in ont_dict.keys(): ont_dict[key] |= {value}
-            else: ont_dict[key] = {value}
-        for key in tqdm(ont_dict.keys()):  # add ontology mappings from MONDO and HPO
-            if key in mondo_dict.keys(): ont_dict[key] = set(list(ont_dict[key]) + list(mondo_dict[key]))
-            if key in hp_dict.keys(): ont_dict[key] = set(list(ont_dict[key]) + list(hp_dict[key]))
-        # get all rows for HPO/MONDO CUIs to obtain mappings to other disease identifiers
-        disease_dict: Dict = {}; disease_data_other = data[data.diseaseId.isin(disease_data_keep['diseaseId'])]
-        for idx, row in tqdm(disease_data_other.iterrows(), total=disease_data_other.shape[0]):
-            vocab, ids, code = row['vocabulary'], row['diseaseId'], row['code']
-            if vocab == 'mondo' or vocab == 'hpo':
-                key, value = 'umls:' + ids.lower(), code
-                if key in disease_dict.keys(): disease_dict[key] |= {value}
-                else: disease_dict[key] = {value}
-            else:
-                if 'mondo' not in code or 'hp' not in code:
-                    if ':' not in code: key, value = vocab + ':' + code, ont_dict['umls:' + ids]
-                    else: key, value = code, ont_dict['umls:' + ids]
-                    if key in disease_dict.keys(): disease_dict[key] |= value
-                    else: disease_dict[key] = value
+        keep = data.query('vocabulary == "hpo" | vocabulary == "mondo"')
+        codes = keep['code'].where(keep['vocabulary'] != 'mondo', 'MONDO:' + keep['code'])
+        ont_dict = codes.groupby('umls:' + keep['diseaseId'], sort=False).agg(set).to_dict()
+        ont_dict = {k: v | mondo_dict.get(k, set()) | hp_dict.get(k, set()) for k, v in ont_dict.items()}
+        ont = pandas.Series(ont_dict, dtype=object).explode()
+        ont = pandas.DataFrame({'umls': ont.index, 'value': ont.values})
+        # get all rows for HPO/MONDO CUIs to obtain mappings to other disease identifiers (a code mapped to several
+        # CUIs is mapped to the union of their HPO/MONDO identifiers)
+        other = data[data.diseaseId.isin(keep['diseaseId'])]
+        vocab, ids, code = other['vocabulary'], other['diseaseId'], other['code']
+        ont_rows = vocab.isin(['mondo', 'hpo'])
+        code_rows = ~ont_rows & ~(code.str.contains('mondo', regex=False) & code.str.contains('hp', regex=False))
+        keys = code.where(code.str.contains(':', regex=False), vocab + ':' + code).where(~ont_rows, 'umls:' + ids)
+        code_edges = pandas.DataFrame({'key': keys[code_rows], 'umls': 'umls:' + ids[code_rows]})
+        disease_edges = pandas.concat([pandas.DataFrame({'key': keys[ont_rows], 'value': code[ont_rows]}),
+                                       code_edges.merge(ont, on='umls')[['key', 'value']]])
+        disease_dict = disease_edges.groupby('key', sort=False)['value'].agg(set)
+        disease_dict = disease_dict.reindex(keys[ont_rows | code_rows].unique()).to_dict()
         # save data and push to GCS bucket
         file1, file2 = 'DISEASE_MONDO_MAP.txt', 'PHENOTYPE_HPO_MAP.txt'
         with open(self.temp_dir + '/' + file1, 'w') as out1, open(self.temp_dir + '/' + file2, 'w') as out2:
@@ -733,11 +870,11 @@ class DataPreprocessing(object):
         mapping_data = self.reads_gcs_bucket_data_to_df(f_name=data_file, delm='\t', head=0, sht=sheet)
         mapping_data.fillna('NA', inplace=True)
         filename = 'HPA_GTEx_TISSUE_CELL_MAP.txt'
+        onts = mapping_data[['UBERON', 'CL', 'CLO']].to_numpy(dtype=object); keep = onts != 'NA'
+        terms = numpy.repeat(mapping_data['TERM'].to_numpy(dtype=object), onts.shape[1]).reshape(onts.shape)
+        alignment = pandas.DataFrame({'TERM': terms[keep], 'ONT': onts[keep]}).astype(str)
         with open(self.temp_dir + '/' + filename, 'w') as out:
-            for idx, row in tqdm(mapping_data.iterrows(), total=mapping_data.shape[0]):
-                if row['UBERON'] != 'NA': out.write(str(row['TERM']).strip() + '\t' + str(row['UBERON']).strip() + '\n')
-                if row['CL'] != 'NA': out.write(str(row['TERM']).strip() + '\t' + str(row['CL']).strip() + '\n')
-                if row['CLO'] != 'NA': out.write(str(row['TERM']).strip() + '\t' + str(row['CLO']).strip() + '\n')
+            out.write(''.join(self._joins_columns(alignment.apply(lambda x: x.str.strip()))))
         uploads_data_to_gcs_bucket(self.bucket, self.processed_data, self.temp_dir, filename)
 
         return None
@@ -784,38 +921,29 @@ class DataPreprocessing(object):
         gtex = self.reads_gcs_bucket_data_to_df(f_name=f_name, delm='\t', skip=2, head=0)
         gtex.fillna('None', inplace=True); gtex['Name'].replace('(\..*)', '', inplace=True, regex=True)
         # process human protein atlas data
-        hpa_results = []
-        for idx, row in tqdm(hpa.iterrows(), total=hpa.shape[0]):
-            ens, gene, uniprot, evid = str(row['Ensembl']), str(row['Gene']), str(row['Uniprot']), str(row['Evidence'])
-            if row['RNA tissue specific NX'] != 'None':
-                for x in row['RNA tissue specific NX'].split(';'):
-                    hpa_results += [[ens, gene, uniprot, evid, 'anatomy', str(x.split(':')[0])]]
-            if row['RNA cell line specific NX'] != 'None':
-                for x in row['RNA cell line specific NX'].split(';'):
-                    hpa_results += [[ens, gene, uniprot, evid, 'cell line', str(x.split(':')[0])]]
-            if row['RNA brain regional specific NX'] != 'None':
-                for x in row['RNA brain regional specific NX'].split(';'):
-                    hpa_results += [[ens, gene, uniprot, evid, 'anatomy', str(x.split(':')[0])]]
-            if row['RNA blood cell specific NX'] != 'None':
-                for x in row['RNA blood cell specific NX'].split(';'):
-                    hpa_results += [[ens, gene, uniprot, evid, 'anatomy', str(x.split(':')[0])]]
-            if row['RNA blood lineage specific NX'] != 'None':
-                for x in row['RNA blood lineage specific NX'].split(';'):
-                    hpa_results += [[ens, gene, uniprot, evid, 'anatomy', str(x.split(':')[0])]]
+        hpa_results, hpa_cols = [], ['Ensembl', 'Gene', 'Uniprot', 'Evidence']
+        nx_cols = {'RNA tissue specific NX': 'anatomy', 'RNA cell line specific NX': 'cell line',
+                   'RNA brain regional specific NX': 'anatomy', 'RNA blood cell specific NX': 'anatomy',
+                   'RNA blood lineage specific NX': 'anatomy'}
+        hpa_ids = hpa[hpa_cols].astype(str).reset_index(drop=True)
+        for order, (col, typ) in enumerate(nx_cols.items()):
+            entities = hpa[col].reset_index(drop=True); entities = entities[entities != 'None']
+            entities = entities.str.split(';').explode().str.split(':').str[0]
+            hpa_results += [hpa_ids.loc[entities.index].assign(typ=typ, entity=entities.values,
+                                                               order=entities.index.to_numpy() * len(nx_cols) + order)]
+        hpa_results = pandas.concat(hpa_results).sort_values('order', kind='stable').drop(columns='order')
         # process gtex data -- using only those protein-coding genes not already in hpa
-        gtex_results, hpa_genes = [], list(hpa['Ensembl'].drop_duplicates(keep='first', inplace=False))
-        gtex = gtex.loc[gtex['Name'].apply(lambda i: i not in hpa_genes)]
-        for idx, row in tqdm(gtex.iterrows(), total=gtex.shape[0]):
-            for col in list(gtex.columns)[2:]:
-                typ = 'cell line' if 'Cells' in col else 'anatomy'
-                if row[col] >= 1.0:
-                    evidence = 'Evidence at transcript level'
-                    gtex_results += [[str(row['Name']), str(row['Description']), 'None', evidence, typ, str(col)]]
+        gtex = gtex.loc[~gtex['Name'].isin(hpa['Ensembl'].drop_duplicates(keep='first', inplace=False))]
+        tissues = list(gtex.columns)[2:]; rows, cols = numpy.nonzero(gtex[tissues].to_numpy() >= 1.0)
+        typs = numpy.array(['cell line' if 'Cells' in col else 'anatomy' for col in tissues], dtype=object)
+        gtex_results = pandas.DataFrame({'Ensembl': gtex['Name'].astype(str).to_numpy()[rows],
+                                         'Gene': gtex['Description'].astype(str).to_numpy()[rows], 'Uniprot': 'None',
+                                         'Evidence': 'Evidence at transcript level', 'typ': typs[cols],
+                                         'entity': numpy.array(tissues, dtype=object)[cols]})
         # write results
         filename = 'HPA_GTEX_RNA_GENE_PROTEIN_EDGES.txt'
         with open(self.temp_dir + '/' + filename, 'w') as out:
-            for x in hpa_results + gtex_results:
-                out.write(x[0] + '\t' + x[1] + '\t' + x[2] + '\t' + x[3] + '\t' + x[4] + '\t' + x[5] + '\n')
+            out.write(''.join(self._joins_columns(pandas.concat([hpa_results, gtex_results]))))
         uploads_data_to_gcs_bucket(self.bucket, self.processed_data, self.temp_dir, filename)
 
         return None
@@ -992,16 +1120,18 @@ class DataPreprocessing(object):
 
         log_str = 'Mapping Sequence Ontology Classes to Gene IDs'; print('\t- ' + log_str); logger.info(log_str)
 
-        gene_ids = pickle.load(open(self.temp_dir + '/Merged_gene_rna_protein_identifiers.pkl', 'rb'), encoding='bytes')
+        f_name = 'Merged_gene_rna_protein_identifiers.idmap'
+        x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data, f_name, self.temp_dir)
+        gene_ids = GenomicIdMap(x)
         sequence_map: Dict = {}
-        for ids in tqdm(gene_ids.keys()):
+        for ids, id_values in tqdm(gene_ids.items()):
             if ids.startswith('entrez_id_') and ids.replace('entrez_id_', '') != 'None':
                 id_clean = ids.replace('entrez_id_', '')
-                ensembl = [x.replace('ensembl_gene_type_', '') for x in gene_ids[ids] if
+                ensembl = [x.replace('ensembl_gene_type_', '') for x in id_values if
                            x.startswith('ensembl_gene_type') and x != 'ensembl_gene_type_unknown']
-                hgnc = [x.replace('hgnc_gene_type_', '') for x in gene_ids[ids] if
+                hgnc = [x.replace('hgnc_gene_type_', '') for x in id_values if
                         x.startswith('hgnc_gene_type') and x != 'hgnc_gene_type_unknown']
-                entrez = [x.replace('entrez_gene_type_', '') for x in gene_ids[ids] if
+                entrez = [x.replace('entrez_gene_type_', '') for x in id_values if
                           x.startswith('entrez_gene_type') and x != 'entrez_gene_type_unknown']
                 # determine gene type
                 if len(ensembl) > 0: gene_type = genomic_map[ensembl[0].replace('ensembl_gene_type_', '') + '_Gene']
@@ -1027,21 +1157,16 @@ class DataPreprocessing(object):
 
         log_str = 'Mapping Sequence Ontology Classes to Transcript IDs'; print('\t- ' + log_str); logger.info(log_str)
 
-        trans: Dict = {}; trans_id: str = 'transcript_stable_id'
-        f_name = self.temp_dir + '/ensembl_identifier_data_cleaned.txt'
-        trans_data = pandas.read_csv(f_name, header=0, delimiter='\t', low_memory=False)
-        for idx, row in tqdm(trans_data.iterrows(), total=trans_data.shape[0]):
-            if row[trans_id] != 'None':
-                if row[trans_id].replace('transcript_stable_id_', '') in trans.keys():
-                    trans[row[trans_id].replace('transcript_stable_id_', '')] += [row['ensembl_transcript_type']]
-                else:
-                    trans[row[trans_id].replace('transcript_stable_id_', '')] = [row['ensembl_transcript_type']]
+        trans_id: str = 'transcript_stable_id'; f_name = 'ensembl_identifier_data_cleaned.txt'
+        x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data, f_name, self.temp_dir)
+        trans_data = pandas.read_csv(x, header=0, delimiter='\t', low_memory=False)
+        trans_data = trans_data.loc[trans_data[trans_id] != 'None']
+        trans_ids = trans_data[trans_id].str.replace('transcript_stable_id_', '', regex=False)
+        trans = trans_data['ensembl_transcript_type'].groupby(trans_ids, sort=False).first()
         # update SO map dictionary
-        for ids in tqdm(trans.keys()):
-            if trans[ids][0] == 'protein_coding': trans_type = genomic_map['protein-coding_Transcript']
-            elif trans[ids][0] == 'misc_RNA': trans_type = genomic_map['miscRNA_Transcript']
-            else: trans_type = genomic_map[list(set(trans[ids]))[0] + '_Transcript']
-            sequence_map[ids] = [trans_type, 'SO_0000673']
+        trans_types = {'protein_coding': 'protein-coding_Transcript', 'misc_RNA': 'miscRNA_Transcript'}
+        so_types = {x: genomic_map[trans_types.get(x, x + '_Transcript')] for x in trans.unique()}
+        sequence_map.update({ids: [so_types[x], 'SO_0000673'] for ids, x in trans.items()})
 
         return sequence_map
 
@@ -1058,18 +1183,16 @@ class DataPreprocessing(object):
 
         log_str = 'Mapping Sequence Ontology Classes to Variant IDs'; print('\t- ' + log_str); logger.info(log_str)
 
-        f_name: str = 'variant_summary.txt'; v_df: Dict = {}
+        f_name: str = 'variant_summary.txt'
         variant_data = self.reads_gcs_bucket_data_to_df(f_name=f_name, delm='\t', head=0)
-        for idx, row in tqdm(variant_data.iterrows(), total=variant_data.shape[0]):
-            if row['Assembly'] == 'GRCh38' and row['RS# (dbSNP)'] != -1:
-                if 'rs' + str(row['RS# (dbSNP)']) in v_df.keys(): v_df['rs' + str(row['RS# (dbSNP)'])] |= {row['Type']}
-                else: v_df['rs' + str(row['RS# (dbSNP)'])] = {row['Type']}
+        variant_data = variant_data.loc[(variant_data['Assembly'] == 'GRCh38') & (variant_data['RS# (dbSNP)'] != -1)]
+        v_df = pandas.DataFrame({'ID': 'rs' + variant_data['RS# (dbSNP)'].astype(str), 'Type': variant_data['Type']})
+        v_df = v_df.drop_duplicates()
         # update SO map dictionary
-        for identifier in tqdm(v_df.keys()):
-            for typ in v_df[identifier]:
-                var_type = genomic_map[typ.lower() + '_Variant']
-                if identifier in sequence_map.keys(): sequence_map[identifier] += [var_type]
-                else: sequence_map[identifier] = [var_type]
+        so_types = {x: genomic_map[x.lower() + '_Variant'] for x in v_df['Type'].unique()}
+        for identifier, var_type in zip(v_df['ID'], v_df['Type'].map(so_types)):
+            if identifier in sequence_map.keys(): sequence_map[identifier] += [var_type]
+            else: sequence_map[identifier] = [var_type]
 
         return sequence_map
 
@@ -1085,9 +1208,8 @@ class DataPreprocessing(object):
 
         f_name, sht = 'genomic_sequence_ontology_mappings.xlsx', 'GenomicType_SO_Map_09Mar2020'
         mapping_data = self.reads_gcs_bucket_data_to_df(f_name=f_name, delm='\t', head=0, sht=sht)
-        genomic_type_so_map = {}
-        for idx, row in tqdm(mapping_data.iterrows(), total=mapping_data.shape[0]):
-            genomic_type_so_map[row['source_*_type'] + '_' + row['Genomic']] = row['SO ID']
+        genomic_types = mapping_data['source_*_type'] + '_' + mapping_data['Genomic']
+        genomic_type_so_map = dict(zip(genomic_types, mapping_data['SO ID']))
         # add genes, transcripts, and variants
         genomic_sequence_map = self._preprocesses_gene_types(genomic_type_so_map)
         trans_sequence_map = self._preprocesses_transcript_types(genomic_type_so_map, genomic_sequence_map)
@@ -1123,22 +1245,77 @@ class DataPreprocessing(object):
         return None
 
     def _processes_protein_ontology_data(self) -> Tuple:
-        """Reads in the PRotein Ontology (PR) into an RDFLib graph object and converts it to a Networkx MultiDiGraph
-        object.
+        """Reads in the PRotein Ontology (PR) into an RDFLib graph object and converts it to a compact edge list, where
+        each node and predicate is replaced by an integer index.
 
         Returns:
-            A tuple where the first item is an RDFLib Graph object and the second is a Networkx MultiDiGraph
-            object; both contain the same data.
+            A tuple where the first item is an RDFLib Graph object, the second is a list of the graph's nodes (i.e.
+            subjects and objects), the third is a list of the graph's predicates, and the fourth is a numpy array with
+            one row per triple containing the subject, predicate, and object indices.
         """
 
         print('\t- Loading Protein Ontology Data'); logger.info('Loading Protein Ontology Data')
 
-        f_name = 'pr_with_imports.owl'
-        x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data, f_name, self.temp_dir)
-        pr_graph = Graph().parse(x); networkx_mdg: networkx.MultiDiGraph = networkx.MultiDiGraph()
-        for s, p, o in tqdm(pr_graph): networkx_mdg.add_edge(s, o, **{'key': p})
+        f_name = 'pr_with_imports.owl'  # the reasoned human subset is written to processed_data under the same name
+        x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, None, f_name, self.temp_dir)
+        pr_graph = Graph().parse(x); nodes: Dict = dict(); predicates: Dict = dict()
+        edges = numpy.array([[nodes.setdefault(s, len(nodes)), predicates.setdefault(p, len(predicates)),
+                              nodes.setdefault(o, len(nodes))] for s, p, o in tqdm(pr_graph)], dtype=numpy.int64)
+
+        return pr_graph, list(nodes.keys()), list(predicates.keys()), edges.reshape(-1, 3)
+
+    @staticmethod
+    def _finds_reachable_nodes(heads: numpy.ndarray, tails: numpy.ndarray, seeds: numpy.ndarray,
+                               node_count: int) -> numpy.ndarray:
+        """Finds all nodes reachable from any of the seed nodes by following edges from head to tail. The edges are
+        stored as a compressed sparse row (CSR) adjacency and the search expands the whole frontier at once, so every
+        node and edge is visited a single time regardless of the number of seeds.
+
+        Args:
+            heads: A numpy array of integers containing the node each edge starts from.
+            tails: A numpy array of integers containing the node each edge ends at.
+            seeds: A numpy array of integers containing the nodes to start from.
+            node_count: An integer containing the number of nodes.
+
+        Returns:
+            A boolean numpy array of length node_count that is True for the seed nodes and each node reachable from
+            them.
+        """
+
+        indices = tails[numpy.argsort(heads, kind='stable')]
+        indptr = numpy.concatenate([[0], numpy.cumsum(numpy.bincount(heads, minlength=node_count))])
+        reached = numpy.zeros(node_count, dtype=bool); frontier = numpy.unique(seeds); reached[frontier] = True
+        while frontier.size > 0:
+            starts, counts = indptr[frontier], indptr[frontier + 1] - indptr[frontier]
+            offsets = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+            neighbors = indices[numpy.repeat(starts, counts) + offsets]
+            frontier = numpy.unique(neighbors[~reached[neighbors]]); reached[frontier] = True
+
+        return reached
+
+    @staticmethod
+    def _labels_connected_components(heads: numpy.ndarray, tails: numpy.ndarray, node_count: int) -> numpy.ndarray:
+        """Labels the weakly connected components of a graph by repeatedly giving both ends of each edge the smaller of
+        their labels and then replacing each label by the label of the node it names (pointer jumping).
+
+        Args:
+            heads: A numpy array of integers containing the node each edge starts from.
+            tails: A numpy array of integers containing the node each edge ends at.
+            node_count: An integer containing the number of nodes.
+
+        Returns:
+            A numpy array of length node_count containing the smallest node index in each node's component.
+        """
+
+        labels = numpy.arange(node_count)
+        while True:
+            updated = labels.copy(); smallest = numpy.minimum(labels[heads], labels[tails])
+            numpy.minimum.at(updated, heads, smallest); numpy.minimum.at(updated, tails, smallest)
+            updated = updated[updated]
+            if numpy.array_equal(updated, labels): break
+            else: labels = updated
 
-        return pr_graph, networkx_mdg
+        return labels
 
     @staticmethod
     def _queries_protein_ontology(protein_ont_graph: Graph) -> List:
@@ -1187,10 +1364,12 @@ class DataPreprocessing(object):
 
     def constructs_human_protein_ontology(self) -> None:
         """Creates a human version of the PRotein Ontology (PRO) by traversing the ontology to obtain forward and
-        reverse breadth first search. If the resulting human PRO contains a single connected component it's written
-        locally. After building the human subset, we verify the number of connected components and get 1. However, after
-        reformatting the graph using OWLTools you will see that there are 3 connected components: component 1
-        (n=1051673); component 2 (n=12); and component 3 (n=2).
+        reverse breadth first search. The traversals are run once, seeded with all human classes: the subset contains
+        every edge leaving a node reachable from a human class and every edge entering a node from which a human class
+        can be reached. If the resulting human PRO contains a single connected component it's written locally. After
+        building the human subset, we verify the number of connected components and get 1. However, after reformatting
+        the graph using OWLTools you will see that there are 3 connected components: component 1 (n=1051673); component
+        2 (n=12); and component 3 (n=2).
 
         Returns:
             None.
@@ -1201,25 +1380,24 @@ class DataPreprocessing(object):
 
         log_str = 'Construct a Human PRotein Ontology'; print(log_str); logger.info(log_str)
 
-        pro_ont, networkx_mdg = self._processes_protein_ontology_data()
+        pro_ont, nodes, predicates, edges = self._processes_protein_ontology_data()
         # f = 'human_pro_classes.html'
         # x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data, f, self.temp_dir)
         # df_list = pandas.read_html(x); human_pro_classes = list(df_list[-1]['PRO_term'])
         human_pro_classes = self._queries_protein_ontology(pro_ont)
-        # create a new graph using breadth first search paths
-        human_pro_graph, human_networkx_mdg = Graph(), networkx.MultiDiGraph()
-        for node in tqdm(human_pro_classes):
-            forward = list(networkx.edge_bfs(networkx_mdg, URIRef(node), orientation='original'))
-            reverse = list(networkx.edge_bfs(networkx_mdg, URIRef(node), orientation='reverse'))
-            # add edges from forward and reverse breadth first search paths
-            for path in forward + reverse:
-                human_pro_graph.add((path[0], path[2], path[1]))
-                human_networkx_mdg.add_edge(path[0], path[1], **{'key': path[2]})
-        # check data and write it locally
-        components = list(networkx.connected_components(human_networkx_mdg.to_undirected()))
-        component_dict = sorted(components, key=len, reverse=True)
-        if len(component_dict) > 1:  # if more than 1 connected component remove all but largest
-            for node in [x for y in component_dict[1:] for x in list(y)]: human_pro_graph.remove((node, None, None))
+        # find the edges on forward and reverse breadth first search paths from the human classes
+        node_index = {x: i for i, x in enumerate(nodes)}; heads, tails = edges[:, 0], edges[:, 2]
+        seeds = numpy.array([node_index[URIRef(x)] for x in human_pro_classes], dtype=numpy.int64)
+        forward = self._finds_reachable_nodes(heads, tails, seeds, len(nodes))
+        reverse = self._finds_reachable_nodes(tails, heads, seeds, len(nodes))
+        human_edges = edges[forward[heads] | reverse[tails]]
+        # check data and keep the largest connected component
+        labels = self._labels_connected_components(human_edges[:, 0], human_edges[:, 2], len(nodes))
+        component_sizes = numpy.bincount(labels[numpy.unique(human_edges[:, [0, 2]])], minlength=len(nodes))
+        if numpy.count_nonzero(component_sizes) > 1:  # if more than 1 connected component remove all but largest
+            human_edges = human_edges[labels[human_edges[:, 0]] == numpy.argmax(component_sizes)]
+        human_pro_graph = Graph()
+        for s, p, o in tqdm(human_edges): human_pro_graph.add((nodes[s], predicates[p], nodes[o]))
         human_pro_graph.serialize(destination=self.temp_dir + '/human_pro.owl')
         f_name1, f_name2 = self.temp_dir + '/human_pro.owl', self.temp_dir + '/pr_with_imports.owl'
         self._logically_verifies_human_protein_ontology(f_name1, f_name2, 'elk')
@@ -1295,8 +1473,9 @@ class DataPreprocessing(object):
 
         # reformat data and write data
         f_name = 'uniprot-cofactor-catalyst.tab'
-        x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data, f_name, self.temp_dir)
-        data = open(x).readlines()
+        x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data, f_name, self.temp_dir,
+                                           keep_compressed=True)
+        with opens_data_file(x) as f: data = f.readlines()
         filename1, filename2 = 'UNIPROT_PROTEIN_COFACTOR.txt', 'UNIPROT_PROTEIN_CATALYST.txt'
         with open(self.temp_dir + '/' + filename1, 'w') as out1, open(self.temp_dir + '/' + filename2, 'w') as out2:
             for line in tqdm(data):
@@ -1335,25 +1514,16 @@ class DataPreprocessing(object):
         data = data.loc[data['#tax_id'].apply(lambda i: i == 9606)]
         data.fillna('None', inplace=True); data.replace('-', 'None', inplace=True, regex=False)
         # create metadata
-        genes, lab, desc, syn = [], [], [], []
-        for idx, row in tqdm(data.iterrows(), total=data.shape[0]):
-            gene_id, sym, defn, gene_type = row['GeneID'], row['Symbol'], row['description'], row['type_of_gene']
-            chrom, map_loc, s1, s2 = row['chromosome'], row['map_location'], row['Synonyms'], row['Other_designations']
-            if gene_id != 'None':
-                genes.append('http://www.ncbi.nlm.nih.gov/gene/' + str(gene_id))
-                if sym != 'None' or sym != '': lab.append(sym)
-                else: lab.append('Entrez_ID:' + gene_id)
-                if 'None' not in [defn, gene_type, chrom, map_loc]:
-                    desc_str = "{} has locus group '{}' and is located on chromosome {} ({})."
-                    desc.append(desc_str.format(sym, gene_type, chrom, map_loc))
-                else: desc.append("{} locus group '{}'.".format(sym, gene_type))
-                if s1 != 'None' and s2 != 'None':
-                    syn.append('|'.join(set([x for x in (s1 + s2).split('|') if x != 'None' or x != ''])))
-                elif s1 != 'None': syn.append('|'.join(set([x for x in s1.split('|') if x != 'None' or x != ''])))
-                elif s2 != 'None': syn.append('|'.join(set([x for x in s2.split('|') if x != 'None' or x != ''])))
-                else: syn.append('None')
+        data = data.loc[data['GeneID'] != 'None']; sym, gene_type = data['Symbol'], data['type_of_gene'].astype(str)
+        chrom, map_loc, s1, s2 = data['chromosome'], data['map_location'], data['Synonyms'], data['Other_designations']
+        known = (data[['description', 'type_of_gene', 'chromosome', 'map_location']] != 'None').all(axis=1)
+        desc = (sym + " has locus group '" + gene_type + "' and is located on chromosome " + chrom.astype(str) +
+                ' (' + map_loc.astype(str) + ').').where(known, sym + " locus group '" + gene_type + "'.")
+        syn = (s1 + s2).where((s1 != 'None') & (s2 != 'None'), s1.where(s1 != 'None', s2))
+        syn = syn.str.split('|').map(lambda x: '|'.join(dict.fromkeys(x)))
         # combine into new data frame then convert it to dictionary
-        metadata = pandas.DataFrame(list(zip(genes, lab, desc, syn)), columns=['ID', 'Label', 'Description', 'Synonym'])
+        metadata = pandas.DataFrame({'ID': 'http://www.ncbi.nlm.nih.gov/gene/' + data['GeneID'].astype(str),
+                                     'Label': sym, 'Description': desc, 'Synonym': syn})
         metadata = metadata.astype(str); metadata.drop_duplicates(subset='ID', inplace=True)
         metadata.set_index('ID', inplace=True); gene_metadata_dict = metadata.to_dict('index')
 
@@ -1383,17 +1553,13 @@ class DataPreprocessing(object):
                    'entrez_id', 'ensembl_gene_type', 'master_gene_type', 'symbol'], axis=1, inplace=True)
         data.drop_duplicates(subset=dup_cols, keep='first', inplace=True); data.fillna('None', inplace=True)
         # create metadata
-        rna, lab, desc, syn = [], [], [], []
-        for idx, row in tqdm(data.iterrows(), total=data.shape[0]):
-            rna_id, ent_type, nme = row[dup_cols[0]], row[dup_cols[2]], row[dup_cols[1]]
-            rna.append('https://uswest.ensembl.org/Homo_sapiens/Transcript/Summary?t=' + rna_id)
-            if nme != 'None': lab.append(nme)
-            else: lab.append('Ensembl_Transcript_ID:' + rna_id); nme = 'Ensembl_Transcript_ID:' + rna_id
-            if ent_type != 'None': desc.append("Transcript {} is classified as type '{}'.".format(nme, ent_type))
-            else: desc.append('None')
-            syn.append('None')
+        rna_id, ent_type = data[dup_cols[0]].astype(str), data[dup_cols[2]]
+        lab = data[dup_cols[1]].where(data[dup_cols[1]] != 'None', 'Ensembl_Transcript_ID:' + rna_id)
+        desc = ('Transcript ' + lab.astype(str) + " is classified as type '" + ent_type.astype(str) + "'.")
         # combine into new data frame then convert it to dictionary
-        metadata = pandas.DataFrame(list(zip(rna, lab, desc, syn)), columns=['ID', 'Label', 'Description', 'Synonym'])
+        metadata = pandas.DataFrame({'ID': 'https://uswest.ensembl.org/Homo_sapiens/Transcript/Summary?t=' + rna_id,
+                                     'Label': lab, 'Description': desc.where(ent_type != 'None', 'None'),
+                                     'Synonym': 'None'})
         metadata = metadata.astype(str); metadata.drop_duplicates(subset='ID', inplace=True)
         metadata.set_index('ID', inplace=True); rna_metadata_dict = metadata.to_dict('index')
 
@@ -1429,24 +1595,21 @@ class DataPreprocessing(object):
         data.sort_values('LastEvaluated', ascending=False, inplace=True)
         data.drop_duplicates(subset='RS# (dbSNP)', keep='first', inplace=True)
         # create metadata
-        var, label, desc, syn = [], [], [], []
-        for idx, row in tqdm(data.iterrows(), total=data.shape[0]):
-            var_id, lab = row['RS# (dbSNP)'], row['Name']
-            if var_id != 'None':
-                var.append('https://www.ncbi.nlm.nih.gov/snp/rs' + str(var_id))
-                if lab != 'None': label.append(lab)
-                else: label.append('dbSNP_ID:rs' + str(var_id))
-                sent = "This variant is a {} {} located on chromosome {} ({}, start:{}/stop:{} positions, " + \
-                       "cytogenetic location:{}) and has clinical significance '{}'. " + \
-                       "This entry is for the {} and was last reviewed on {} with review status '{}'."
-                desc.append(
-                    sent.format(row['Origin'].replace(';', '/'), row['Type'].replace(';', '/'), row['Chromosome'],
-                                row['ChromosomeAccession'], row['Start'], row['Stop'], row['Cytogenetic'],
-                                row['ClinicalSignificance'], row['Assembly'], row['LastEvaluated'],
-                                row['ReviewStatus']).replace('None', 'UNKNOWN'))
-                syn.append('None')
+        data = data.loc[data['RS# (dbSNP)'] != 'None']; var_id = data['RS# (dbSNP)'].astype(str)
+        fields = {x: data[x].astype(str) for x in ['Chromosome', 'ChromosomeAccession', 'Start', 'Stop', 'Cytogenetic',
+                                                   'ClinicalSignificance', 'Assembly', 'LastEvaluated', 'ReviewStatus']}
+        desc = ('This variant is a ' + data['Origin'].str.replace(';', '/', regex=False) + ' ' +
+                data['Type'].str.replace(';', '/', regex=False) + ' located on chromosome ' + fields['Chromosome'] +
+                ' (' + fields['ChromosomeAccession'] + ', start:' + fields['Start'] + '/stop:' + fields['Stop'] +
+                ' positions, cytogenetic location:' + fields['Cytogenetic'] + ") and has clinical significance '" +
+                fields['ClinicalSignificance'] + "'. This entry is for the " + fields['Assembly'] +
+                ' and was last reviewed on ' + fields['LastEvaluated'] + " with review status '" +
+                fields['ReviewStatus'] + "'.")
         # combine into new data frame then convert it to dictionary
-        metadata = pandas.DataFrame(list(zip(var, label, desc, syn)), columns=['ID', 'Label', 'Description', 'Synonym'])
+        metadata = pandas.DataFrame({'ID': 'https://www.ncbi.nlm.nih.gov/snp/rs' + var_id,
+                                     'Label': data['Name'].where(data['Name'] != 'None', 'dbSNP_ID:rs' + var_id),
+                                     'Description': desc.str.replace('None', 'UNKNOWN', regex=False),
+                                     'Synonym': 'None'})
         metadata.drop_duplicates(inplace=True); metadata = metadata.astype(str)
         metadata.set_index('ID', inplace=True); variant_metadata_dict = metadata.to_dict('index')
 
@@ -1605,65 +1768,196 @@ class DataPreprocessing(object):
 
         return None
 
-    def preprocesses_build_data(self) -> None:
-        """Master method that performs all needed data preprocessing tasks in preparation of generating PheKnowLator
-        knowledge graphs. This method completes this work in 10 steps.
+    def _reads_task_cache(self) -> Dict:
+        """Reads the build task cache, which records the key (see _creates_task_key) and the output file hashes of each
+        task that has finished. The cache is stored with the processed data.
+
+        Returns:
+            A dict keyed by task name, which is empty if no cache has been stored.
+        """
+
+        if finds_data_file(self.bucket, None, self.processed_data, self.task_cache) is None: return dict()
+        f_name = downloads_data_from_gcs_bucket(self.bucket, None, self.processed_data, self.task_cache, self.temp_dir)
+        with open(f_name) as f: task_cache = json.load(f)
+
+        return task_cache
+
+    def _writes_task_cache(self, task_cache: Dict) -> None:
+        """Writes the build task cache locally and pushes it to the processed data directory.
+
+        Args:
+            task_cache: A dict keyed by task name (see _reads_task_cache).
 
         Returns:
             None.
         """
 
-        log_str = '*** PROCESSING LINKED OPEN DATA SOURCES ***'; print(log_str); logger.info(log_str)
+        with open(self.temp_dir + '/' + self.task_cache, 'w') as out: json.dump(task_cache, out, indent=2)
+        uploads_data_to_gcs_bucket(self.bucket, self.processed_data, self.temp_dir, self.task_cache)
 
-        # STEP 1: Human Transcript, Gene, and Protein Identifier Mapping
-        log_str = 'STEP 1: HUMAN TRANSCRIPT, GENE, PROTEIN ID MAPPING'; print('\n' + log_str); logger.info(log_str)
-        self.generates_specific_genomic_identifier_maps()
-        uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+        return None
 
-        # STEP 2: MeSH-ChEBI Identifier Mapping
-        log_str = 'STEP 2: MESH-CHEBI ID MAPPING'; print('\n' + log_str); logger.info(log_str)
-        self.creates_chebi_to_mesh_identifier_mappings()
-        uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+    def _creates_task_key(self, task: str, file_hashes: Dict, producers: Dict) -> str:
+        """Creates a key for a build task by hashing the build source code (i.e. this module, the build utilities, and
+        the pkt_kg utility modules the tasks call) together with the content hash of each of the task's input files.
+        Files written by another task are hashed when that task finishes, while source files are hashed where they are
+        stored, searching the processed data directory before the original data directory (see hashes_data_file). A
+        source file the task overwrites (i.e. one that is both an input and an output) is only hashed in the original
+        data directory, otherwise the key would change each time the task's output is stored.
 
-        # STEP 3: Disease and Phenotype Identifier Mapping
-        log_str = 'STEP 3: DISEASE-PHENOTYPE ID MAPPING'; print('\n' + log_str); logger.info(log_str)
-        self.creates_disease_identifier_mappings()
-        uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+        Args:
+            task: A string containing the name of a task.
+            file_hashes: A dict mapping file names to content hashes, which is updated with any source files hashed.
+            producers: A dict mapping the name of each file written by a task to the name of that task.
 
-        # STEP 4: Human Protein Atlas/GTEx Tissue/Cells Edge Data
-        log_str = 'STEP 4: CREATING HPA + GTEX ID EDGE DATA'; print('\n' + log_str); logger.info(log_str)
-        self._hpa_gtex_ontology_alignment()
-        self.processes_hpa_gtex_data()
-        uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+        Returns:
+            A string containing the MD5 hex digest of the task's code and inputs.
+        """
 
-        # STEP 5: Creating Pathway and Sequence Ontology Mappings
-        log_str = 'STEP 5: SEQUENCE ONTOLOGY + PATHWAY ID MAP'; print('\n' + log_str); logger.info(log_str)
-        self.combines_pathway_and_sequence_ontology_dictionaries()
-        uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+        if '__code__' not in file_hashes:
+            utils_files = sorted(glob.glob(os.path.dirname(os.path.abspath(pkt_kg.utils.__file__)) + '/*.py'))
+            code_files = [os.path.abspath(__file__), os.path.abspath(builds.build_utilities.__file__)] + utils_files
+            file_hashes['__code__'] = [[os.path.basename(x), hashes_file(x)] for x in code_files]
+        inputs, outputs = self.tasks[task]['inputs'], self.tasks[task]['outputs']
+        for x in [x for x in inputs if x not in file_hashes and x not in producers and x not in outputs]:
+            file_hashes[x] = hashes_data_file(self.bucket, self.original_data, self.processed_data, x, self.temp_dir)
+        key = [task, file_hashes['__code__']]
+        for x in inputs:
+            if x in outputs: key += [[x, hashes_data_file(self.bucket, self.original_data, None, x, self.temp_dir)]]
+            else: key += [[x, file_hashes[x]]]
 
-        # STEP 6: Creating a Human Protein Ontology
-        log_str = 'STEP 6: CREATING A HUMAN PROTEIN ONTOLOGY'; print('\n' + log_str); logger.info(log_str)
-        self.constructs_human_protein_ontology()
-        uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+        return hashlib.md5(json.dumps(key).encode()).hexdigest()
 
-        # STEP 7: Extracting Relations Ontology Information
-        log_str = 'STEP 7: EXTRACTING RELATION ONTOLOGY INFO'; print('\n' + log_str); logger.info(log_str)
-        self.processes_relation_ontology_data()
-        uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+    def _checks_task_cache(self, task: str, key: str, task_cache: Dict) -> Optional[Dict]:
+        """Checks whether a build task can be skipped, which is the case when the task last finished with the same key
+        and each of its output files is still stored in the processed data directory, unchanged.
 
-        # STEP 8: Clinvar Variant-Diseases and Phenotypes Edge Data
-        log_str = 'STEP 8: CREATING CLINVAR VARIANT-DISEASE-PHENOTYPE DATA'; print('\n' + log_str); logger.info(log_str)
-        self.processes_clinvar_data()
-        uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+        Args:
+            task: A string containing the name of a task.
+            key: A string containing the task's key (see _creates_task_key).
+            task_cache: A dict keyed by task name (see _reads_task_cache).
 
-        # STEP 9: Uniprot Protein-Cofactor and Protein-Catalyst Edge Data
-        log_str = 'STEP 9: CREATING COFACTOR + CATALYST EDGE DATA'; print('\n' + log_str); logger.info(log_str)
-        self.processes_cofactor_catalyst_data()
-        uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+        Returns:
+            A dict mapping each of the task's output files to its hash if the task can be skipped, otherwise None.
+        """
+
+        cached = task_cache.get(task, {})
+        if cached.get('key') != key or set(cached.get('outputs', {})) != set(self.tasks[task]['outputs']): return None
+        for x, file_hash in cached['outputs'].items():
+            if hashes_data_file(self.bucket, None, self.processed_data, x, self.temp_dir) != file_hash: return None
+
+        return cached['outputs']
+
+    def _runs_build_task(self, task: str) -> None:
+        """Runs a single build task (i.e. calls the method the task is named after).
+
+        Args:
+            task: A string containing the name of a task.
+
+        Returns:
+            None.
+        """
+
+        log_str = self.tasks[task]['step']; print('\n' + log_str); logger.info(log_str)
+        getattr(self, task)()
+
+        return None
+
+    def preprocesses_build_data(self, use_cache: bool = True) -> None:
+        """Master method that performs all needed data preprocessing tasks in preparation of generating PheKnowLator
+        knowledge graphs. The work is described by the task graph in self.tasks: a task is started once every task
+        that writes one of its input files has finished, and when cpus is greater than 1 independent tasks are run
+        concurrently in a pool of processes (see BuildProcessPool).
+
+        Before a task is run, a key is created from the task's code and the content hashes of its input files. A task
+        whose key matches the key recorded when it last finished, and whose output files are unchanged, is skipped.
+        Because the keys of later tasks are created from the hashes of the files written by earlier tasks, a task that
+        is re-run but writes the same files does not cause the tasks that depend on it to be re-run. Note that the
+        data some tasks obtain from web APIs (e.g. Reactome) is not part of their key.
+
+        Args:
+            use_cache: A bool indicating whether to skip tasks whose inputs and outputs are unchanged (default=True).
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the task graph contains a cycle.
+            ValueError: If no storage Bucket was passed and org_data is not a local directory or the directory
+                containing processed_data does not exist (e.g. a Google Cloud Storage path was passed).
+        """
+
+        log_str = '*** PROCESSING LINKED OPEN DATA SOURCES ***'; print(log_str); logger.info(log_str)
+
+        if not isinstance(self.bucket, storage.bucket.Bucket):  # local mode, data directories must be local
+            processed_parent = os.path.dirname(os.path.abspath(self.processed_data))
+            if not os.path.isdir(self.original_data) or not os.path.isdir(processed_parent):
+                log_str = 'Local Data Directories Not Found: org_data={}, processed_data={}'.format(
+                    self.original_data, self.processed_data)
+                logger.error('ValueError: ' + log_str); raise ValueError(log_str)
+            os.makedirs(self.processed_data, exist_ok=True)
+        task_cache = self._reads_task_cache() if use_cache else dict()
+        producers = {x: k for k, v in self.tasks.items() for x in v['outputs'] if x not in v['inputs']}
+        waiting = {k: {producers[x] for x in v['inputs'] if x in producers} for k, v in self.tasks.items()}
+        file_hashes: Dict = dict(); keys: Dict = dict()
+        pool = None if self.cpus <= 1 else BuildProcessPool(self, self.cpus, log_dir, log)
+        try:
+            while len(waiting) > 0 or (pool is not None and len(pool.running) > 0):
+                running = 0 if pool is None else len(pool.running)
+                ready = [k for k, v in waiting.items() if len(v) == 0]
+                if len(ready) == 0 and running == 0:
+                    log_str = 'The Build Task Graph Contains a Cycle: {}'.format(', '.join(waiting))
+                    logger.error('ValueError: ' + log_str); raise ValueError(log_str)
+                elif len(ready) > 0 and running < max(self.cpus, 1):  # start the next task
+                    task = ready[0]; del waiting[task]; key = self._creates_task_key(task, file_hashes, producers)
+                    outputs = self._checks_task_cache(task, key, task_cache) if use_cache else None
+                    if outputs is not None:
+                        log_str = 'Skipping Unchanged Task: {}'.format(task); print(log_str); logger.info(log_str)
+                        self._finishes_build_task(task, key, outputs, file_hashes, task_cache, waiting); continue
+                    for x in self.tasks[task]['inputs']:  # download inputs before starting so tasks never download
+                        processed_data: Optional[str] = self.processed_data
+                        if x in self.tasks[task]['outputs']:  # replace the output of an earlier run with the source
+                            processed_data = None
+                            for f_name in glob.glob(self.temp_dir + '/' + x): os.remove(f_name)
+                        downloads_data_from_gcs_bucket(self.bucket, self.original_data, processed_data, x,
+                                                       self.temp_dir)
+                    if pool is None:
+                        self._runs_build_task(task)
+                        outputs = {x: hashes_file(self.temp_dir + '/' + x) for x in self.tasks[task]['outputs']}
+                        self._finishes_build_task(task, key, outputs, file_hashes, task_cache, waiting)
+                    else: keys[task] = key; pool.submits(task, '_runs_build_task', task)
+                else:  # wait for a running task to finish
+                    for task, future in pool.collects():  # type: ignore
+                        try: future.result()
+                        except Exception as e:
+                            log_str = 'Build Task {} Failed: {}'.format(task, e); logger.error(log_str); raise
+                        outputs = {x: hashes_file(self.temp_dir + '/' + x) for x in self.tasks[task]['outputs']}
+                        self._finishes_build_task(task, keys[task], outputs, file_hashes, task_cache, waiting)
+        finally:
+            if pool is not None: pool.shutdown()
+
+        return None
+
+    def _finishes_build_task(self, task: str, key: str, outputs: Dict, file_hashes: Dict, task_cache: Dict,
+                             waiting: Dict) -> None:
+        """Records a finished (or skipped) build task in the task cache and releases the tasks waiting on it.
+
+        Args:
+            task: A string containing the name of a task.
+            key: A string containing the task's key (see _creates_task_key).
+            outputs: A dict mapping each of the task's output files to its hash.
+            file_hashes: A dict mapping file names to content hashes.
+            task_cache: A dict keyed by task name (see _reads_task_cache).
+            waiting: A dict mapping the name of each task that has not been started to the set of tasks it waits on.
+
+        Returns:
+            None.
+        """
 
-        # STEP 10: Non-Ontology Metadata Dictionary
-        log_str = 'STEP 10: CREATING OBO-ONTOLOGY METADATA DICTIONARY'; print('\n' + log_str); logger.info(log_str)
-        self.creates_non_ontology_class_metadata_dict()
+        file_hashes.update({x: v for x, v in outputs.items() if x not in self.tasks[task]['inputs']})
+        if task_cache.get(task) != {'key': key, 'outputs': outputs}:
+            task_cache[task] = {'key': key, 'outputs': outputs}; self._writes_task_cache(task_cache)
+        for dependencies in waiting.values(): dependencies.discard(task)
         uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
 
         return None
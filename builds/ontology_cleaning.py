@@ -6,11 +6,13 @@ import datetime
 import fnmatch
 import glob
 import logging.config
-import pickle
 import os
+import pickle
 import re
+import requests
 import subprocess
 
+from collections import deque
 from google.cloud import storage  # type: ignore
 from owlready2 import get_ontology, OwlReadyOntologyParsingError  # type: ignore
 from rdflib import BNode, Graph, Literal, Namespace, URIRef  # type: ignore
@@ -19,6 +21,7 @@ from tqdm import tqdm  # type: ignore
 from typing import Dict, List, Optional, Set, Union
 
 # import script containing helper functions
+from builds.build_utilities import BuildProcessPool, finds_data_file
 from builds.build_utilities import downloads_data_from_gcs_bucket, uploads_data_to_gcs_bucket
 from pkt_kg.utils import *
 
@@ -53,9 +56,12 @@ class OntologyCleaner(object):
         proc_data: A string specifying the location of the original_data directory for a specific build.
         temp: A string specifying a temporary directory to use while processing data locally. If locally and not
             passing a GCS bucket, this location should be 1 direct up from the directory storing the ontologies.
+        cpus: An integer specifying the number of processes to use when cleaning the individual ontologies. When
+            greater than 1, the ontologies are cleaned concurrently in a process pool (default=1).
     """
 
-    def __init__(self, gcs_bucket: Union[storage.bucket.Bucket, str], org_data: str, proc_data: str, temp: str) -> None:
+    def __init__(self, gcs_bucket: Union[storage.bucket.Bucket, str], org_data: str, proc_data: str, temp: str,
+                 cpus: int = 1) -> None:
 
         # GOOGLE CLOUD STORAGE VARIABLES
         self.bucket: Union[storage.bucket.Bucket, str] = gcs_bucket
@@ -67,6 +73,7 @@ class OntologyCleaner(object):
         # self.owltools_location = './pkt_kg/libs/owltools'
         self.temp_dir = temp
         self.merged_ontology_filename: str = 'PheKnowLator_MergedOntologies.owl'
+        self.cpus: int = cpus
         # ONTOLOGY INFORMATION DICTIONARY
         if isinstance(self.bucket, storage.bucket.Bucket):
             self.onts = [x.name.split('/')[-1] for x in self.bucket.list_blobs(prefix=self.original_data)
@@ -93,12 +100,36 @@ class OntologyCleaner(object):
             'http://www.genenames.org/cgi-bin/gene_symbol_report?hgnc_id=31424': ['101362076'],
             'http://identifiers.org/hgnc/12764': ['7467'],
             'http://identifiers.org/hgnc/1881': ['10167']}
-        f_data = self.temp_dir + '/Merged_gene_rna_protein_identifiers.pkl'
-        if not os.path.exists(f_data):
-            url = 'https://storage.googleapis.com/pheknowlator/current_build/data/processed_data/'
-            data_downloader(url + f_data.split('/')[-1], self.temp_dir + '/')
-        with open(f_data, 'rb') as out:
-            self.gene_ids = pickle.load(out, encoding='bytes')
+        self.gene_ids = GenomicIdMap(self.gets_genomic_id_map())  # memory-mapped, entries are read when looked up
+
+    def gets_genomic_id_map(self) -> str:
+        """Finds the merged genomic identifier map (Merged_gene_rna_protein_identifiers.idmap). The map written to the
+        processed_data directory of the current build by data preprocessing is used when it exists. Otherwise, the map
+        is downloaded from the current_build directory. Builds published before the map existed only include the
+        pickled dictionary (Merged_gene_rna_protein_identifiers.pkl), which is downloaded and converted to a map.
+
+        Returns:
+            A string containing the local filepath of the genomic identifier map.
+        """
+
+        f_name = 'Merged_gene_rna_protein_identifiers'; f_data = self.temp_dir + '/' + f_name + '.idmap'
+        if os.path.exists(f_data):
+            try: GenomicIdMap(f_data); return f_data
+            except ValueError: os.remove(f_data)  # not a map, e.g. an error page saved by an earlier download
+        if self.processed_data and finds_data_file(self.bucket, None, self.processed_data, f_name + '.idmap'):
+            return downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data,
+                                                  f_name + '.idmap', self.temp_dir)
+        url = 'https://storage.googleapis.com/pheknowlator/current_build/data/processed_data/' + f_name
+        try: data_downloader(url + '.idmap', self.temp_dir + '/')
+        except requests.HTTPError:
+            log_str = 'Converting {}.pkl to a Genomic Identifier Map'.format(f_name)
+            print(log_str); logger.info(log_str)
+            data_downloader(url + '.pkl', self.temp_dir + '/'); f_pkl = self.temp_dir + '/' + f_name + '.pkl'
+            with open(f_pkl, 'rb') as f_in:  # write to a temporary file so an interrupted conversion is not reused
+                writes_genomic_id_map(((k, sorted(v)) for k, v in pickle.load(f_in).items()), f_data + '.tmp')
+            os.replace(f_data + '.tmp', f_data); os.remove(f_pkl)
+
+        return f_data
 
     def reads_gcs_bucket_data_to_graph(self, f_name: str) -> Graph:
         """Reads data corresponding to the input file_location variable into a Pandas DataFrame.
@@ -111,8 +142,7 @@ class OntologyCleaner(object):
         """
 
         x = downloads_data_from_gcs_bucket(self.bucket, self.original_data, self.processed_data, f_name, self.temp_dir)
-        if x is not None: graph = Graph().parse(x, format='xml')
-        else: graph = Graph().parse(self.temp_dir + '/' + f_name, format='xml')
+        graph = Graph().parse(x, format='xml')
 
         return graph
 
@@ -277,53 +307,59 @@ class OntologyCleaner(object):
 
         log_str = 'Fixing Identifier Errors'; print(log_str); logger.info(log_str)
 
-        known_errors = ['PRO', 'PR']  # known errors
-        kg_classes, bad_cls, key = gets_ontology_classes(self.ont_graph), set(), self.ont_file_location
+        known_errors, key = ['PRO', 'PR'], self.ont_file_location  # known errors
+        kg_classes = gets_ontology_classes(self.ont_graph)
         class_list = [res for res in kg_classes if isinstance(res, URIRef) and 'obo/' in str(res)]
-        all_cls = set([x.split('/')[-1].split('_')[0] for x in class_list])
-        errors = [x for x in all_cls if any(i for i in all_cls if i != x and (i in x or x in i))]
-        self.ontology_info[key]['IdentifierErrors'] = 'Possible ' + '-'.join(errors) if len(errors) > 0 else 'None'
-        for edge in self.ont_graph:
-            if 'http://purl.obolibrary.org/obo/{}_'.format(known_errors[0]) in str(edge[0]):
-                self.ont_graph.add((URIRef(str(edge[0]).replace(known_errors[0], known_errors[1])), edge[1], edge[2]))
-                self.ont_graph.remove(edge); bad_cls.add(str(edge[0]))
-            if 'http://purl.obolibrary.org/obo/{}_'.format(known_errors[0]) in str(edge[2]):
-                self.ont_graph.add((edge[0], edge[1], URIRef(str(edge[2]).replace(known_errors[0], known_errors[1]))))
-                self.ont_graph.remove(edge); bad_cls.add(str(edge[2]))
-
-            self.ontology_info[key]['IdentifierErrors'] = ', '.join(list(bad_cls)) if len(bad_cls) > 0 else 'None'
+        all_cls, errors = sorted(set([x.split('/')[-1].split('_')[0] for x in class_list])), set()
+        for i, x in enumerate(all_cls):  # prefixes starting with x sort directly after it
+            j = i + 1
+            while j < len(all_cls) and all_cls[j].startswith(x): errors |= {x, all_cls[j]}; j += 1
+        if len(errors) > 0: logger.info('Possible Identifier Errors: {}'.format('-'.join(sorted(errors))))
+        # map each bad term to its repaired term once, then rewrite all triples using a bad term in one batch
+        bad_id = 'http://purl.obolibrary.org/obo/{}_'.format(known_errors[0])
+        term_map = {x: URIRef(str(x).replace(*known_errors)) for x in self.ont_graph.all_nodes() if bad_id in str(x)}
+        bad_edges = set([e for x in term_map for e in self.ont_graph.triples((x, None, None))] +
+                        [e for x in term_map for e in self.ont_graph.triples((None, None, x))])
+        self.ont_graph = remove_edges_from_graph(self.ont_graph, bad_edges)
+        fixed_edges = set((term_map.get(s, s), p, term_map.get(o, o)) for s, p, o in bad_edges)
+        self.ont_graph = adds_edges_to_graph(self.ont_graph, fixed_edges, False)
+        bad_cls = set(str(x) for x in term_map)
+        self.ontology_info[key]['IdentifierErrors'] = ', '.join(list(bad_cls)) if len(bad_cls) > 0 else 'None'
 
         return None
 
-    def path_finder(self, triples: List, master_triples: Set) -> Set:
-        """Method takes a triple an RDFLib graph object and searches the graph to return all triples associated with
-        BNodes in the input triple list.
+    def finds_bnode_closure(self, nodes: Set) -> Set:
+        """Method takes a set of nodes and, in a single traversal of the graph, returns every triple that uses one of
+        the nodes as well as every triple of the anonymous (BNode) structures that reference the nodes. Each BNode that
+        points to a node is followed up through its BNode parents to the root of its structure (e.g. the owl:Axiom,
+        owl:Restriction, or class expression a class is asserted to be a subclass or equivalent of) and all triples of
+        the structure are returned, including triples linking the structure to a named entity. BNodes that the nodes
+        point to are handled the same way.
 
         Args:
-            triples: A list of triples where each item in the list is an RDFLib object.
-            master_triples: None or a list of triples where each item in the list is an RDFLib object.
+            nodes: A set of RDFLib objects (i.e. URIRefs or BNodes).
 
         Returns:
-            triple_list: A set of triples, where each item in the list is an RDFLib object.
+            triples: A set of triples, where each item in the set is an RDFLib object.
         """
 
-        if len(triples) != 0 and len([x for x in triples if isinstance(x[0], BNode)]) > 0:
-            s, p, o = triples.pop(0)
-            if isinstance(s, BNode) and (s, p, o) not in master_triples:
-                master_triples |= {(s, p, o)}
-                out_edges = set(self.ont_graph.triples((s, None, None)))
-                in_edges = set(self.ont_graph.triples((None, None, s)))
-                new_trips = [x for x in out_edges | in_edges if x not in triples and x not in master_triples]
-                new_bnodes = [x for x in new_trips if isinstance(x[2], BNode)]
-                if len(new_trips) > 0 and len(new_bnodes) > 0:  triples += new_trips
-                else: master_triples |= set(new_trips)
-            else:
-                if (s, p, o) not in master_triples: master_triples |= {(s, p, o)}
-            return self.path_finder(triples, master_triples)
-        else: return master_triples | set(triples)
+        triples = set(x for x in self.ont_graph if x[0] in nodes or x[2] in nodes)
+        up = deque(set(x[0] for x in triples if isinstance(x[0], BNode))); seen = set(up)
+        while up:  # find the root of each BNode structure pointing to a node
+            for edge in self.ont_graph.triples((None, None, up.popleft())):
+                triples.add(edge)
+                if isinstance(edge[0], BNode) and edge[0] not in seen: seen.add(edge[0]); up.append(edge[0])
+        down = deque(seen | set(x[2] for x in triples if isinstance(x[2], BNode))); seen |= set(down)
+        while down:  # collect the contents of each BNode structure
+            for edge in self.ont_graph.triples((down.popleft(), None, None)):
+                triples.add(edge)
+                if isinstance(edge[2], BNode) and edge[2] not in seen: seen.add(edge[2]); down.append(edge[2])
+
+        return triples
 
     def removes_deprecated_obsolete_entities(self) -> None:
-        """Identifies and removes all deprecated and obsolete classes.
+        """Identifies and removes all deprecated and obsolete classes, along with the axioms that use them, in a single
+        batch.
 
         Returns:
             None.
@@ -337,11 +373,7 @@ class OntologyCleaner(object):
         obs_oth = set([x[0] for x in self.ont_graph if
                        (str(x[2]).startswith('OBSOLETE. ') or
                         str(x[2]).lower().startswith('obsolete ')) and x[0] not in obs_cls | dep_cls])
-        for node in tqdm(dep_cls | obs_cls | obs_oth):
-            axioms = set(self.ont_graph.triples((node, None, None))) | set(self.ont_graph.triples((None, None, node)))
-            bnode_triples = set([x for x in axioms if isinstance(x[0], BNode)])
-            triples = self.path_finder(list(bnode_triples), set())
-            self.ont_graph = remove_edges_from_graph(self.ont_graph, axioms | triples)
+        self.ont_graph = remove_edges_from_graph(self.ont_graph, self.finds_bnode_closure(dep_cls | obs_cls | obs_oth))
 
         self.ontology_info[key]['Deprecated'] = dep_cls if len(dep_cls) > 0 else 'None'
         self.ontology_info[key]['Obsolete'] = obs_cls if len(obs_cls | obs_oth) > 0 else 'None'
@@ -361,31 +393,23 @@ class OntologyCleaner(object):
 
         log_str = 'Resolving Punning Errors'; print(log_str); logger.info(log_str)
 
-        key, bad_cls, bad_obj = self.ont_file_location, set(), set()
-        onts_entities = set([x[0] for x in tqdm(self.ont_graph)])
-        for x in tqdm(onts_entities):
-            ent_types = list(self.ont_graph.triples((x, RDF.type, None)))
-            if len(ent_types) > 1:
-                if not any([x for x in ent_types if 'owl' not in str(x[2])]):
-                    # class + object properties --> remove object properties
-                    class_prop, obj_prop = (x, RDF.type, OWL.Class), (x, RDF.type, OWL.ObjectProperty)
-                    if class_prop in ent_types and obj_prop in ent_types and str(x) not in bad_cls:
-                        self.ont_graph.remove(obj_prop); bad_cls.add(str(x))
-                    # class + individual --> remove individual
-                    class_prop, ind_prop = (x, RDF.type, OWL.Class), (x, RDF.type, OWL.NamedIndividual)
-                    if class_prop in ent_types and ind_prop in ent_types and str(x) not in bad_cls:
-                        self.ont_graph.remove(ind_prop); bad_cls.add(str(x))
-                    # object property + annotation property --> remove annotation property
-                    obj_prop, a_prop = (x, RDF.type, OWL.ObjectProperty), (x, RDF.type, OWL.AnnotationProperty)
-                    if obj_prop in ent_types and a_prop in ent_types and str(x) not in bad_obj:
-                        self.ont_graph.remove(a_prop); bad_obj.add(str(x))
-                        # check if the object property is used beyond definition -- if not, delete it
-                        e = set(self.ont_graph.triples((x, None, None))) | set(self.ont_graph.triples((None, None, x)))
-                        val_nodes = [i for i in e if len(
-                            [j[2] for j in list(self.ont_graph.triples((i[0], RDF.type, OWL.Class)))] +
-                            [j[2] for j in list(self.ont_graph.triples((i[0], RDF.type, OWL.NamedIndividual)))] +
-                            [j[2] for j in list(self.ont_graph.triples((None, OWL.someValuesFrom, i[0])))]) > 0]
-                        if len(val_nodes) == 0: self.ont_graph.remove((x, None, None))
+        key, ent_types = self.ont_file_location, dict()
+        for x, y in self.ont_graph.subject_objects(RDF.type): ent_types.setdefault(x, set()).add(y)
+        punned = {x: y for x, y in ent_types.items() if len(y) > 1 and all('owl' in str(i) for i in y)}
+        cls, ind, obj, ann = OWL.Class, OWL.NamedIndividual, OWL.ObjectProperty, OWL.AnnotationProperty
+        cls_obj = set(x for x, y in punned.items() if cls in y and obj in y)  # class + object property
+        cls_ind = set(x for x, y in punned.items() if cls in y and ind in y) - cls_obj  # class + individual
+        obj_ann = set(x for x, y in punned.items() if obj in y and ann in y)  # object property + annotation property
+        bad_edges = set((x, RDF.type, obj) for x in cls_obj) | set((x, RDF.type, ind) for x in cls_ind) | \
+            set((x, RDF.type, ann) for x in obj_ann)
+        # object properties are kept if used beyond their definition, i.e. by a class, individual, or restriction
+        used = set(x for x, y in ent_types.items() if cls in y or ind in y) | \
+            set(self.ont_graph.objects(None, OWL.someValuesFrom))
+        for x in obj_ann:
+            if x not in used and not any(i in used for i in self.ont_graph.subjects(None, x)):
+                bad_edges |= set(self.ont_graph.triples((x, None, None)))
+        self.ont_graph = remove_edges_from_graph(self.ont_graph, bad_edges)
+        bad_cls = set(str(x) for x in cls_obj | cls_ind); bad_obj = set(str(x) for x in obj_ann)
 
         self.ontology_info[key]['PunningErrors - Classes'] = ', '.join(bad_cls) if len(bad_cls) > 0 else 'None'
         self.ontology_info[key]['PunningErrors - ObjectProperty'] = ', '.join(bad_obj) if len(bad_obj) > 0 else 'None'
@@ -430,7 +454,7 @@ class OntologyCleaner(object):
         """Checks for inconsistencies in ontology classes that overlap with non-ontology entity identifiers (e.g. if
         HP includes HGNC identifiers, but PheKnowLator utilizes Entrez gene identifiers). While there are other types of
         identifiers, we focus primarily on resolving the genomic types, since we have a master dictionary we can used to
-        help with this (Merged_gene_rna_protein_identifiers.pkl). This can be updated in future iterations to include
+        help with this (Merged_gene_rna_protein_identifiers.idmap). This can be updated in future iterations to include
         other types of identifiers, but given our detailed examination of the v2.0.0 ontologies, these were the
         identifier types that needed repair.
 
@@ -553,11 +577,69 @@ class OntologyCleaner(object):
 
         return None
 
+    def cleans_individual_ontology(self, ont: str) -> Dict:
+        """Performs the individual ontology cleaning steps (i.e. (1) Parsing Errors, (2) Identifier Errors, (3)
+        Deprecated/Obsolete Errors, and (4) Punning Errors) on a single ontology, verifies the result with the ELK
+        reasoner, and records the starting and final statistics.
+
+        Args:
+            ont: A string containing the file name of the ontology to clean.
+
+        Returns:
+            The ontology_info dictionary entry for the ontology.
+        """
+
+        log_str = '\nProcessing Ontology: {}'.format(ont.upper()); print(log_str); logger.info(log_str)
+        self.ont_file_location, self.ont_graph = ont, self.reads_gcs_bucket_data_to_graph(ont)
+        self.updates_ontology_reporter()  # get starting statistics
+        self.fixes_ontology_parsing_errors()
+        self.fixes_identifier_errors()
+        self.removes_deprecated_obsolete_entities()
+        self.fixes_punning_errors()
+        self._logically_verifies_cleaned_ontologies()
+        # read in cleaned, verified, and updated ontology containing inference
+        log_str = 'Reading in Cleaned Ontology -- Needed to Calculate Final Statistics'
+        print(log_str); logger.info(log_str)
+        self.ont_graph = Graph().parse(self.temp_dir + '/' + ont)
+        self.updates_ontology_reporter()  # get finishing statistics
+
+        return self.ontology_info[ont]
+
+    def cleans_individual_ontologies(self) -> None:
+        """Cleans each individual ontology (see cleans_individual_ontology). When cpus is greater than 1, the
+        ontologies, which are independent until they are merged, are cleaned concurrently in a pool of processes (see
+        BuildProcessPool); as each ontology finishes, its ontology_info entry is collected and its log is appended to
+        the build log.
+
+        Returns:
+            None.
+        """
+
+        onts = [x for x in self.ontology_info.keys() if x != self.merged_ontology_filename]
+        if self.cpus <= 1 or len(onts) < 2:
+            for ont in onts:
+                self.cleans_individual_ontology(ont)
+                if self.bucket != '': uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+        else:
+            log_str = 'Cleaning {} Ontologies Using {} Processes'.format(len(onts), min(self.cpus, len(onts)))
+            print(log_str); logger.info(log_str)
+            with BuildProcessPool(self, min(self.cpus, len(onts)), log_dir, log) as pool:
+                for ont in onts: pool.submits(ont, 'cleans_individual_ontology', ont)
+                while len(pool.running) > 0:
+                    for ont, future in pool.collects():
+                        try: self.ontology_info[ont] = future.result()
+                        except Exception as e:
+                            log_str = 'Cleaning {} Failed: {}'.format(ont, e); logger.error(log_str); raise
+                        log_str = 'Finished Cleaning Ontology: {}'.format(ont); print(log_str); logger.info(log_str)
+                        if self.bucket != '': uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+
+        return None
+
     def cleans_ontology_data(self) -> None:
         """Performs all needed ontology cleaning tasks by resolving different types of ontology cleaning steps at the
         individual ontology- and the merged ontology-level, each are described below:
             - Individual Ontologies: (1) Parsing Errors, (2) Identifier Errors, (3) Deprecated/Obsolete Errors, and (4)
-              Punning Errors.
+              Punning Errors. These are run concurrently for each ontology when cpus is greater than 1.
             - Merged Ontologies: (1) Identifier Errors, (2) Normalizes Duplicate and Existing Concepts, and (3) Punning
               Errors.
 
@@ -576,23 +658,7 @@ class OntologyCleaner(object):
 
         log_str = '*** CLEANING INDIVIDUAL ONTOLOGY DATA SOURCES ***'; print(log_str); logger.info(log_str)
 
-        for ont in self.ontology_info.keys():
-            if ont != self.merged_ontology_filename:
-                print('\nProcessing Ontology: {}'.format(ont.upper()))
-                logger.info('\nProcessing Ontology: {}'.format(ont.upper()))
-                self.ont_file_location, self.ont_graph = ont, self.reads_gcs_bucket_data_to_graph(ont)
-                self.updates_ontology_reporter()  # get starting statistics
-                self.fixes_ontology_parsing_errors()
-                self.fixes_identifier_errors()
-                self.removes_deprecated_obsolete_entities()
-                self.fixes_punning_errors()
-                self._logically_verifies_cleaned_ontologies()
-                # read in cleaned, verified, and updated ontology containing inference
-                log_str = 'Reading in Cleaned Ontology -- Needed to Calculate Final Statistics'
-                print(log_str); logger.info(log_str)
-                self.ont_graph = Graph().parse(self.temp_dir + '/' + ont)
-                self.updates_ontology_reporter()  # get finishing statistics
-                if self.bucket != '': uploads_data_to_gcs_bucket(self.bucket, self.log_location, log_dir, log)
+        self.cleans_individual_ontologies()
 
         log_str = '*** CLEANING MERGED ONTOLOGY DATA ***'
         print('\n\n' + log_str); logger.info(log_str)
@@ -2,9 +2,11 @@
 # -*- coding: utf-8 -*-
 
 # import needed libraries
+import argparse
 import glob
 import logging.config
 import os
+import psutil  # type: ignore
 import shutil
 import traceback
 
@@ -28,6 +30,10 @@ logging.config.fileConfig(log_config[0], disable_existing_loggers=False, default
 
 def main():
 
+    parser = argparse.ArgumentParser(description='PheKnowLator Build Phases 1-2: downloads and pre-processes build data')
+    parser.add_argument('-p', '--cpus', help='# processes to use; defaults to use all available cores', default=None)
+    args = parser.parse_args(); cpus = psutil.cpu_count(logical=True) if args.cpus is None else int(args.cpus)
+
     start_time = datetime.now()
 
     # initialize Google Cloud Storage Bucket object and delete prior logs (if present) from current_build directory
@@ -50,7 +56,7 @@ def main():
     # run phase 2 build
     log_str = 'BUILD PHASE 2: DATA PRE-PROCESSING'
     print('#' * 35 + '\n' + log_str + '\n' + '#' * 35); logger.info('#' * 5 + log_str + '#' * 5)
-    try: run_phase_2()
+    try: run_phase_2(cpus)
     except: logger.error('ERROR: Uncaught Exception: {}'.format(traceback.format_exc()))
     uploads_data_to_gcs_bucket(bucket, gcs_log_loc, log_dir, log)
 
@@ -30,12 +30,16 @@ __all__ = [
     'FullBuild',
 
     'Metadata',
-    'OwlNets'
+    'MetadataStore',
+    'OwlNets',
+
+    'WorkerPool'
 ]
 
 from pkt_kg.construction_approaches import KGConstructionApproach
 from pkt_kg.downloads import LinkedData, OntData
 from pkt_kg.edge_list import CreatesEdgeList
 from pkt_kg.knowledge_graph import PartialBuild, PostClosureBuild, FullBuild
-from pkt_kg.metadata import Metadata
+from pkt_kg.metadata import Metadata, MetadataStore
 from pkt_kg.owlnets import OwlNets
+from pkt_kg.worker_pool import WorkerPool
@@ -42,6 +42,8 @@ class KGConstructionApproach(object):
 
     Attributes:
         write_location: A string pointing to the 'resources' directory.
+        subclass_dict: An optional dictionary of subclass mappings that was already loaded, in which case the
+            subclass_construction_map.pkl file is not read (default=None).
 
     Raises:
         TypeError: If graph is not an rdflib.graph object.
@@ -50,7 +52,7 @@ class KGConstructionApproach(object):
         OSError: If there is no subclass_dict file in the resources/construction_approach directory.
     """
 
-    def __init__(self, write_location: str) -> None:
+    def __init__(self, write_location: str, subclass_dict: Optional[Dict] = None) -> None:
         self.subclass_dict: Dict = dict()
         self.subclass_error: Dict = dict()
 
@@ -62,7 +64,8 @@ class KGConstructionApproach(object):
 
         # LOADING SUBCLASS DICTIONARY
         file_name = self.write_location + '/construction_*/*.pkl'
-        if len(glob.glob(file_name)) == 0:
+        if subclass_dict is not None: self.subclass_dict = subclass_dict
+        elif len(glob.glob(file_name)) == 0:
             log_str = 'subclass_construction_map.pkl does not exist!'; logger.error('OSError: ' + log_str)
             raise OSError(log_str)
         elif os.stat(glob.glob(file_name)[0]).st_size == 0:
@@ -332,10 +332,14 @@ class LinkedData(DataSource):
 
         return None
 
-    def downloads_data_from_url(self) -> None:
+    def downloads_data_from_url(self, keep_compressed: bool = False) -> None:
         """Takes a string representing a file path/name to a text file as an argument. The function assumes that
         each item in the input file list is a valid URL.
 
+        Args:
+            keep_compressed: If True, gzipped and zipped sources are kept compressed on disk (the '.gz' or '.zip'
+                extension is kept in the data_files path) and are decompressed when they are read.
+
         Returns:
             data_files: A dictionary mapping each source identifier to the local location where it was downloaded.
                 For example: {'chemical-gomf', 'resources/edge_data/chemical-gomf_CTD_chem_go_enriched.tsv',
@@ -349,7 +353,8 @@ class LinkedData(DataSource):
 
         for i in tqdm(self.source_list.keys()):
             source = self.source_list[i]; file_name = re.sub('.gz|.zip|\\?.*', '', source.split('/')[-1])
-            write_path = file_loc
+            write_path, ext = file_loc, '.zip' if '.zip' in source else '.gz' if '.gz' in source else ''
+            if keep_compressed: file_name += ext
             print('\nEdge: {edge}'.format(edge=i)); logger.info('Edge: {edge}'.format(edge=i))
             # if file has already been downloaded, rename it
             if any(x for x in os.listdir(write_path) if '_'.join(x.split('_')[1:]) == file_name):
@@ -359,7 +364,7 @@ class LinkedData(DataSource):
                     logger.error('{}'.format(shutil.SameFileError)); pass
             else:
                 self.data_files[i] = write_path + i + '_' + file_name
-                data_downloader(source, write_path, i + '_' + file_name)
+                data_downloader(source, write_path, i + '_' + file_name, keep_compressed)
         self.generates_source_metadata()
 
         return None
@@ -4,17 +4,26 @@
 # import needed libraries
 import csv
 import glob
+import hashlib
 import json
 import logging.config
+import numpy as np  # type: ignore
 import os
 import pandas as pd  # type: ignore
 import ray  # type: ignore
 import re
 
-from collections import ChainMap
 from difflib import SequenceMatcher
 from tqdm import tqdm  # type: ignore
-from typing import Any, Dict, IO, List, Optional, TextIO, Tuple, Union
+from typing import Any, Dict, IO, List, Optional, Set, TextIO, Tuple, Union
+
+try:  # optional arrow-native edge list backend
+    import pyarrow as pa  # type: ignore
+    import pyarrow.compute as pc  # type: ignore
+except ImportError: pa, pc = None, None
+
+from pkt_kg.utils import opens_data_file
+from pkt_kg.worker_pool import WorkerPool
 
 # logging
 log_dir, log, log_config = 'builds/logs', 'pkt_build_log.log', glob.glob('**/logging.ini', recursive=True)
@@ -42,10 +51,24 @@ class CreatesEdgeList(object):
     Attributes:
         data_files: A list that contains the full file path and name of each downloaded data source.
         source_file: A string containing the filepath to resource information.
+        backend: A string containing the name of the dataframe engine used to reduce, format, and map the edge data.
+            Options are "pandas" (default) and "pyarrow", which uses vectorized pyarrow compute string functions and
+            multithreaded joins. Both backends produce the same edges.
+
+    Raises:
+        ValueError: If backend is not "pandas" or "pyarrow".
+        ImportError: If backend is "pyarrow" and pyarrow is not installed.
     """
 
-    def __init__(self, data_files: Dict[str, str], source_file: str) -> None:
+    def __init__(self, data_files: Dict[str, str], source_file: str, backend: str = 'pandas') -> None:
 
+        if backend not in ['pandas', 'pyarrow']:
+            log_str = 'backend must be "pandas" or "pyarrow"'; logger.error('ValueError: ' + log_str)
+            raise ValueError(log_str)
+        elif backend == 'pyarrow' and pa is None:
+            log_str = 'The pyarrow backend requires pyarrow, install it with: pip install pkt_kg[arrow]'
+            logger.error('ImportError: ' + log_str); raise ImportError(log_str)
+        else: self.backend = backend
         self.data_files = data_files
         self.source_file = source_file
         self.source_info: Dict[str, Dict[str, Any]] = dict()
@@ -78,7 +101,7 @@ class CreatesEdgeList(object):
         function was modified from a Stack Overflow post: https://stackoverflow.com/a/40193509
 
         Args:
-            file_path: A filepath to a data file.
+            file_path: A filepath to a (plain text, gzipped, or zipped) data file.
             delimiter: A character specifying how the rows of the data are delimited.
             skip_rows: A list of indices to skip when reading in the data.
 
@@ -86,8 +109,10 @@ class CreatesEdgeList(object):
             - 0, if the data should be read in with a header else None.
         """
 
-        df_with_header = pd.read_csv(file_path, header='infer', nrows=1, delimiter=delimiter, skiprows=skip_rows)
-        df_without_header = pd.read_csv(file_path, header=None, nrows=1, delimiter=delimiter, skiprows=skip_rows)
+        with opens_data_file(file_path) as f:
+            df_with_header = pd.read_csv(f, header='infer', nrows=1, delimiter=delimiter, skiprows=skip_rows)
+        with opens_data_file(file_path) as f:
+            df_without_header = pd.read_csv(f, header=None, nrows=1, delimiter=delimiter, skiprows=skip_rows)
         # calculate similarity between header and first row
         with_header_test = SequenceMatcher(None, '|'.join([str(x) for x in list(df_with_header.iloc[0])]),
                                            '|'.join([str(x) for x in list(df_with_header)])).ratio()
@@ -98,7 +123,7 @@ class CreatesEdgeList(object):
 
     def data_reader(self, file_path: str, delim: str = 't') -> pd.DataFrame:
         """Takes a filepath pointing to data source and reads it into a Pandas DataFrame using information in the file
-        and line splitter variables.
+        and line splitter variables. Gzipped ('.gz') and zipped ('.zip') files are decompressed as they are read.
 
         Args:
             file_path: A Filepath to data.
@@ -111,17 +136,14 @@ class CreatesEdgeList(object):
             Exception: If the Pandas DataFrame does not contain at least 2 columns and more than 10 rows.
         """
 
-        with open(file_path, 'r') as input_data_r:  # type: IO[Any]
-            try: data = input_data_r.read().splitlines()
-            except OSError: data = [line.strip('\n').strip('\r') for line in input_data_r]
-        input_data_r.close()
-
         # clean up data to only keep valid rows (rows that are not empty space or metadata)
         spt = '\t' if 't' in delim else r"\s+" if '' in delim else delim
-        if delim == '' or delim == ' ': skip = [row for row in range(0, len(data)) if delim not in data[row]]
-        else: skip = [row for row in range(0, len(data)) if spt not in data[row]]
+        chk = delim if delim == '' or delim == ' ' else spt
+        with opens_data_file(file_path) as input_data_r:  # type: IO[Any]
+            skip = [row for row, line in enumerate(input_data_r) if chk not in line.rstrip('\n').rstrip('\r')]
         head = self.identify_header(file_path, spt, skip)
-        df = pd.read_csv(file_path, header=head, delimiter=spt, low_memory=False, skiprows=skip); del data, skip
+        with opens_data_file(file_path) as input_data_r:
+            df = pd.read_csv(input_data_r, header=head, delimiter=spt, low_memory=False, skiprows=skip); del skip
 
         return df.fillna('None', inplace=False)
 
@@ -194,19 +216,99 @@ class CreatesEdgeList(object):
             return df
 
     @staticmethod
-    def data_reducer(cols: str, edge_data: pd.DataFrame) -> pd.DataFrame:
+    def _is_arrow(edge_data: Any) -> bool:
+        """Checks whether edge data is stored as a pyarrow Table (i.e. is being processed by the pyarrow backend)."""
+
+        return pa is not None and isinstance(edge_data, pa.Table)
+
+    @staticmethod
+    def converts_to_arrow(df: pd.DataFrame, cols: Optional[str] = None) -> 'pa.Table':
+        """Converts a Pandas DataFrame into a pyarrow Table for use with the pyarrow backend. Column names are converted
+        to strings and all non-numeric columns are converted to string columns, which mirrors the string conversion
+        that the pandas backend performs before mapping identifiers.
+
+        Args:
+            df: A Pandas DataFrame.
+            cols: An optional ';'-delimited string containing column indices (e.g. 0;3 - which maps to columns 0 and 3).
+                When provided, only these columns are converted, in the order they are listed.
+
+        Returns:
+            A pyarrow Table containing the data in df.
+        """
+
+        if cols is not None: df = df.iloc[:, [int(i) for i in cols.split(';')]]
+        arrays = {}
+        for col in list(df):
+            values = df[col].to_numpy()
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+                arrays[str(col)] = pa.array(values)
+            else: arrays[str(col)] = pa.array(values.astype(str), type=pa.string())
+
+        return pa.table(arrays)
+
+    @staticmethod
+    def _arrow_drop_duplicates(edge_data: 'pa.Table') -> 'pa.Table':
+        """Removes duplicate rows from a pyarrow Table, keeping the first occurrence of each row in its original order
+        (i.e. the same result as pandas.DataFrame.drop_duplicates(keep='first')).
+
+        Args:
+            edge_data: A pyarrow Table.
+
+        Returns:
+            A pyarrow Table without duplicate rows.
+        """
+
+        idx = '__row_index'; rows = edge_data.append_column(idx, pa.array(np.arange(edge_data.num_rows)))
+        keep = rows.group_by(edge_data.column_names).aggregate([(idx, 'min')]).column(idx + '_min')
+
+        return edge_data.take(keep.take(pc.sort_indices(keep)))
+
+    @staticmethod
+    def _arrow_inner_join(left: 'pa.Table', right: 'pa.Table', left_on: List[str], right_on: List[str]) -> 'pa.Table':
+        """Performs a multithreaded inner join of two pyarrow Tables. The rows of the result are sorted by their
+        position in the left and then the right table, so the output order is deterministic.
+
+        Args:
+            left: A pyarrow Table.
+            right: A pyarrow Table.
+            left_on: A list of column names from the left table to join on.
+            right_on: A list of column names from the right table to join on.
+
+        Returns:
+            A pyarrow Table containing the columns from left and the non-key columns from right.
+        """
+
+        l_idx, r_idx = '__left_index', '__right_index'
+        left = left.append_column(l_idx, pa.array(np.arange(left.num_rows)))
+        right = right.append_column(r_idx, pa.array(np.arange(right.num_rows)))
+        merged = left.join(right, keys=left_on, right_keys=right_on, join_type='inner', use_threads=True)
+        merged = merged.sort_by([(l_idx, 'ascending'), (r_idx, 'ascending')])
+
+        return merged.drop_columns([l_idx, r_idx])
+
+    @staticmethod
+    def data_reducer(cols: str, edge_data: Union[pd.DataFrame, 'pa.Table']) -> Union[pd.DataFrame, 'pa.Table']:
         """Reduces a Pandas DataFrame to the 2 columns specified by resource_info.txt. Prior to returning the data, the
         function checks the data type of each column in the reduced Pandas DataFrame to make sure that neither column is
-        of type float.
+        of type float. When edge_data is a pyarrow Table, both columns are also converted to strings.
 
         Args:
             cols: A ';'-delimited string containing column indices (e.g. 0;3 - which maps to columns 0 and 3).
-            edge_data: A Pandas DataFrame.
+            edge_data: A Pandas DataFrame or pyarrow Table.
 
         Returns:
-            A Pandas DataFrame that consists of the two columns provided by the 'col' variable.
+            A Pandas DataFrame (or pyarrow Table) that consists of the two columns provided by the 'col' variable.
         """
 
+        if CreatesEdgeList._is_arrow(edge_data):
+            names = [edge_data.column_names[int(cols.split(';')[0])], edge_data.column_names[int(cols.split(';')[1])]]
+            edge_data = CreatesEdgeList._arrow_drop_duplicates(edge_data.select(names))
+            for i in range(0, edge_data.num_columns):
+                column = edge_data.column(i)
+                if pa.types.is_floating(column.type): column = column.cast(pa.int64())
+                edge_data = edge_data.set_column(i, names[i], column.cast(pa.string()))
+            return edge_data
+
         edge_data = edge_data[[list(edge_data)[int(cols.split(';')[0])], list(edge_data)[int(cols.split(';')[1])]]]
         edge_data = edge_data.drop_duplicates(subset=None, keep='first', inplace=False)
         # make sure neither column is float
@@ -216,35 +318,49 @@ class CreatesEdgeList(object):
         return edge_data
 
     @staticmethod
-    def label_formatter(edge_data: pd.DataFrame, label_criteria: str) -> pd.DataFrame:
+    def label_formatter(edge_data: Union[pd.DataFrame, 'pa.Table'],
+                        label_criteria: str) -> Union[pd.DataFrame, 'pa.Table']:
         """Applies criteria to reformat edge data labels.
 
         Args:
-            edge_data: A Pandas DataFrame containing a column for each node in the edge
+            edge_data: A Pandas DataFrame (or pyarrow Table) containing a column for each node in the edge
             label_criteria: A ';' delimited string containing 3 arguments:
                 1 - string splitter
                 2 - string to append to subject node
                 3 - string to append to object node
 
         Returns:
-            edge_data: A Pandas DataFrame with updated value labels.
+            edge_data: A Pandas DataFrame (or pyarrow Table) with updated value labels.
         """
 
         cut = label_criteria.split(';')[0]
+        if CreatesEdgeList._is_arrow(edge_data):
+            for col in range(0, len(label_criteria.split(';')[1:])):
+                formatter, name = label_criteria.split(';')[col + 1], edge_data.column_names[col]
+                col_to_check = edge_data.column(col).cast(pa.string())
+                if (cut == '' and formatter != '') or not pc.any(pc.match_substring(col_to_check, cut)).as_py():
+                    col_to_check = pc.binary_join_element_wise(formatter, col_to_check, '')
+                elif cut != '':
+                    col_to_check = pc.replace_substring_regex(col_to_check, '(^.*{})'.format(cut), formatter)
+                edge_data = edge_data.set_column(col, name, col_to_check)
+            return edge_data
+
         for col in range(0, len(label_criteria.split(';')[1:])):
             formatter, col_to_check = label_criteria.split(';')[col + 1], edge_data[list(edge_data)[col]].astype(str)
             if (cut == '' and formatter != '') or not any(i for i in list(col_to_check) if cut in i):
                 edge_data[list(edge_data)[col]] = edge_data[list(edge_data)[col]].apply(lambda x: formatter + str(x))
             elif cut != '' and formatter != '':
-                edge_data[list(edge_data)[col]].replace('(^.*{})'.format(cut), formatter, inplace=True, regex=True)
+                edge_data[list(edge_data)[col]] = edge_data[list(edge_data)[col]].replace('(^.*{})'.format(cut),
+                                                                                          formatter, regex=True)
             elif cut != '' and formatter == '':
-                edge_data[list(edge_data)[col]].replace('(^.*{})'.format(cut), formatter, inplace=True, regex=True)
+                edge_data[list(edge_data)[col]] = edge_data[list(edge_data)[col]].replace('(^.*{})'.format(cut),
+                                                                                          formatter, regex=True)
             else:
                 pass
 
         return edge_data
 
-    def data_merger(self, node: int, mapping_data: str, edge_data: pd.DataFrame) -> List[Union[str, pd.DataFrame]]:
+    def data_merger(self, node: int, mapping_data: str, edge_data: Union[pd.DataFrame, 'pa.Table']) -> List[Any]:
         """Processes a string that contains instructions for mapping a column in the edge_data Pandas DataFrame. This
         function assumes that the mapping data pointed to contains two columns: (1) identifier in edge_data to be
         mapped and (2) the desired identifier to map to. If one of the columns does not need to be mapped to an
@@ -255,23 +371,28 @@ class CreatesEdgeList(object):
             mapping_data: A ';' delimited string containing information on identifier mapping data. Each item
                 contains an index of an edge_data column and a filepath to an identifier mapping data set:
                     '0:./filepath/mapping_data_0.txt;1:./filepath/mapping_data_1.txt'
-            edge_data: A Pandas DataFrame row containing two columns of identifiers.
+            edge_data: A Pandas DataFrame (or pyarrow Table) row containing two columns of identifiers.
 
         Returns:
             A nested list containing:
                 1 - column that needs mapping
-                2 - a Pandas DataFrame containing the merged data
+                2 - a Pandas DataFrame (or pyarrow Table) containing the merged data
         """
 
+        arrow = self._is_arrow(edge_data); edge_cols = edge_data.column_names if arrow else list(edge_data)
         # check if node needs to be mapped to an outside data source
         if str(node) in re.sub('(?:(?!:)\\D)*', '', mapping_data).split(':'):  # MAPPING TO OUTSIDE DATA SOURCE
-            node2map = list(edge_data)[node]
+            node2map = edge_cols[node]
             try: map_data = self.data_reader(mapping_data.split(';')[node].split(':')[1]).astype(str)
             except IndexError: map_data = self.data_reader(mapping_data.split(';')[0].split(':')[1]).astype(str)
             # process mapping data
             map_col = list(map_data)[0]
             col_to_map = str(node2map) + '_' + str(map_col) + '_mapped'
             map_data.rename(columns={list(map_data)[1]: str(col_to_map)}, inplace=True)
+            if arrow:
+                map_data, map_col = self.converts_to_arrow(map_data), str(map_col)
+                merged_data = self._arrow_inner_join(edge_data, map_data, [node2map], [map_col])
+                return [col_to_map, merged_data.select([edge_cols[0], edge_cols[1], col_to_map])]
             try: merged_data = pd.merge(edge_data, map_data, left_on=node2map, right_on=map_col, how='inner')
             except ValueError:
                 # update map_data merge col to match edge_data merge col type
@@ -280,13 +401,18 @@ class CreatesEdgeList(object):
             # drop all columns but merge key and value columns
             merged_data = merged_data[[list(edge_data)[0], list(edge_data)[1], col_to_map]]
         else:   # NOT MAPPING TO OUTSIDE DATA SOURCE
-            col_to_map = str(list(edge_data)[node]) + '_mapped'
+            col_to_map = str(edge_cols[node]) + '_mapped'
+            if arrow:
+                merged_data = edge_data.select([edge_cols[0], edge_cols[1]]).append_column(col_to_map,
+                                                                                            edge_data.column(node))
+                return [col_to_map, merged_data]
             edge_data[col_to_map] = edge_data[[list(edge_data)[node]]]
             merged_data = edge_data[[list(edge_data)[0], list(edge_data)[1], col_to_map]]
 
         return [col_to_map, merged_data]
 
-    def process_mapping_data(self, mapping_data: str, edge_data: pd.DataFrame) -> Tuple[Tuple[Any, Any], ...]:
+    def process_mapping_data(self, mapping_data: str,
+                             edge_data: Union[pd.DataFrame, 'pa.Table']) -> Tuple[Tuple[Any, Any], ...]:
         """Merges two mapped Pandas DataFrames into a single DataFrame. After merging the DataFrames, the function
         removes all columns except the the mapped columns and removes any duplicate rows.
 
@@ -294,13 +420,25 @@ class CreatesEdgeList(object):
             mapping_data: A ';' delimited string containing information on identifier mapping data. Each item
                 contains an index of an edge_data column and a filepath to an identifier mapping data set:
                     '0:./filepath/mapping_data_0.txt;1:./filepath/mapping_data_1.txt'
-            edge_data: A Pandas DataFrame row containing two columns of identifiers.
+            edge_data: A Pandas DataFrame (or pyarrow Table) row containing two columns of identifiers.
 
         Returns:
             A tuple of tuples, where each tuple contains a mapped identifier from each node column in the edge_data
             Pandas DataFrame. For example: [['CHEBI_24505', 'R-HSA-1006173'], ['CHEBI_28879', 'R-HSA-1006173']]
         """
 
+        if self._is_arrow(edge_data):
+            if mapping_data == 'None':
+                cols = [edge_data.column(i).cast(pa.string()).to_pylist() for i in range(2)]
+                return tuple(zip(cols[0], cols[1]))
+            maps = [self.data_merger(node, mapping_data, edge_data) for node in range(2)]
+            merged_cols = [x for x in maps[0][1].column_names if x in maps[1][1].column_names]
+            merged_data = self._arrow_inner_join(maps[0][1], maps[1][1], merged_cols, merged_cols)
+            keep_cols = [x for x in merged_data.column_names if 'mapped' in str(x)]  # remove unwanted columns
+            merged_data = self._arrow_drop_duplicates(merged_data.select(keep_cols))
+            cols = [merged_data.column(maps[i][0]).cast(pa.string()).to_pylist() for i in range(2)]
+            return tuple(zip(cols[0], cols[1]))
+
         if mapping_data == 'None':
             edge_data = edge_data.astype(str)
             return tuple(zip(list(edge_data[list(edge_data)[0]]), list(edge_data[list(edge_data)[1]])))
@@ -365,11 +503,15 @@ class CreatesEdgeList(object):
         # STEP 1: Apply filtering/evidence criteria, reduce columns, and remove duplicates
         df = self.data_reader(self.data_files[x], self.source_info[x]['delimiter']); n1, n2 = x.split('-')
         df = self.filter_data(df, self.source_info[x]['filter_criteria'], self.source_info[x]['evidence_criteria'])
-        df = self.data_reducer(self.source_info[x]['column_idx'], df)
+        if self.backend == 'pyarrow':  # only convert the two columns that are kept
+            df = self.data_reducer('0;1', self.converts_to_arrow(df, self.source_info[x]['column_idx']))
+        else: df = self.data_reducer(self.source_info[x]['column_idx'], df)
 
         # STEP 2: Update node column values and rename columns
         df = self.label_formatter(df, self.source_info[x]['source_labels'])
-        df = df.rename(columns={list(df)[0]: str(list(df)[0]) + '-' + n1, list(df)[1]: str(list(df)[1]) + '-' + n2})
+        if self._is_arrow(df): df = df.rename_columns([df.column_names[0] + '-' + n1, df.column_names[1] + '-' + n2])
+        else: df = df.rename(columns={list(df)[0]: str(list(df)[0]) + '-' + n1,
+                                      list(df)[1]: str(list(df)[1]) + '-' + n2})
 
         # STEP 3: Map identifiers and get namespace
         mapped_data = self.process_mapping_data(self.source_info[x]['identifier_maps'], df)
@@ -384,15 +526,104 @@ class CreatesEdgeList(object):
 
         return None
 
+    def gets_edge_type_size(self, x: str) -> int:
+        """Estimates the amount of work needed to build an edge type as the number of bytes in its input data file plus
+        the number of bytes in any identifier mapping files it needs.
+
+        Args:
+            x: A string containing an edge type (e.g. "gene-gene").
+
+        Returns:
+            size: An integer containing the combined size, in bytes, of the edge type's input files.
+        """
+
+        size = sum([os.path.getsize(f) for f in self.gets_edge_type_files(x) if os.path.exists(f)])
+
+        return size
+
+    def gets_edge_type_files(self, x: str) -> List[str]:
+        """Returns the input data file of an edge type and any identifier mapping files it needs.
+
+        Args:
+            x: A string containing an edge type (e.g. "gene-gene").
+
+        Returns:
+            files: A list of strings, where each string is a file path.
+        """
+
+        files = [self.data_files[x]]
+        if self.source_info[x]['identifier_maps'] != 'None':
+            files += [i.split(':', 1)[-1] for i in self.source_info[x]['identifier_maps'].split(';')]
+
+        return files
+
+    def hashes_edge_type_inputs(self, x: str) -> str:
+        """Hashes the inputs of an edge type, which are the edge type itself, its resource information, and the path,
+        size, and modification time of its input data file and identifier mapping files. The contents of the files are
+        not read, so the inputs can be checked on every run without re-reading all of the edge data.
+
+        Args:
+            x: A string containing an edge type (e.g. "gene-gene").
+
+        Returns:
+            A string containing the MD5 hex digest of the inputs.
+        """
+
+        files = [[f, os.stat(f).st_size, os.stat(f).st_mtime_ns] for f in self.gets_edge_type_files(x)
+                 if os.path.exists(f)]
+
+        return hashlib.md5(json.dumps([x, self.source_info[x], files], sort_keys=True).encode()).hexdigest()
+
+    def schedules_edge_types(self, edge_types: List[str]) -> List[str]:
+        """Orders edge types by the size of their input data, largest first, so that the longest running edge types are
+        started before the short ones and do not end up determining the total run time.
+
+        Args:
+            edge_types: A list of strings, where each string is an edge type (e.g. "gene-gene").
+
+        Returns:
+            A list of edge type strings sorted by decreasing input size (ties are broken by edge type name).
+        """
+
+        return sorted(edge_types, key=lambda x: (-self.gets_edge_type_size(x), x))
+
+    @staticmethod
+    def _creates_edge_type_task(edge_lists: 'CreatesEdgeList', x: str) -> Tuple[str, Dict[str, Any]]:
+        """Builds a single edge type as an independent ray task and returns only that edge type's results. The edge
+        type is removed from source_info afterwards, as workers keep their copy of edge_lists between tasks.
+
+        Args:
+            edge_lists: A CreatesEdgeList instance (shared with all tasks through a WorkerPool).
+            x: A string containing an edge type (e.g. "gene-gene").
+
+        Returns:
+            A tuple where the first item is the edge type and the second is its source_info dictionary.
+        """
+
+        edge_lists.creates_knowledge_graph_edges(x)
+
+        return x, edge_lists.source_info.pop(x)
+
     @staticmethod
-    def runs_creates_knowledge_graph_edges(source_file: str, data_files: Dict, cpus: int = 1) -> None:
+    def runs_creates_knowledge_graph_edges(source_file: str, data_files: Dict, cpus: int = 1,
+                                           backend: str = 'pandas', pool: Optional[WorkerPool] = None) -> None:
         """Method facilitates the parallel processing, using whatever cpus are available, of the master edge list
-        construction.
+        construction. The resource information is parsed once and shared with the workers of a WorkerPool. Each edge
+        type is then run as an independent task, largest input first, with no more than one task per worker running
+        at once. As each edge type finishes, it is appended to a partial results file that sits next to the
+        source_file, which means that if a build crashes, re-running it only processes the edge types that did not
+        finish. Each edge type's result is stored with a hash of its inputs (see hashes_edge_type_inputs), so only the
+        edge types whose inputs have changed are discarded and processed again. Once all edge types have been
+        processed, the results are written to Master_Edge_List_Dict.json and, if no edge type failed, the partial
+        results file is removed.
 
         Args:
             data_files: A list that contains the full file path and name of each downloaded data source.
             source_file: A string containing the filepath to resource information.
             cpus: An integer specifying the number of cores to use when processing the edge data (default=1).
+            backend: A string containing the dataframe engine to use, either "pandas" (default) or "pyarrow".
+            pool: An optional WorkerPool to run the edge types on (default=a pool with cpus workers that is shut down
+                once all edge types are processed).
 
         Returns:
              None.
@@ -400,19 +631,51 @@ class CreatesEdgeList(object):
 
         logger.info('*' * 10 + 'PKT STEP: GENERATING KNOWLEDGE GRAPH MASTER EDGE LIST' + '*' * 10)
 
-        try: ray.init()
-        except RuntimeError: pass
-        actors = [ray.remote(CreatesEdgeList).remote(data_files, source_file) for _ in range(cpus)]  # type: ignore
-        edge_types = [x for x in data_files.keys() if '-' in x]
-        for i in range(0, len(edge_types)):
-            actors[i % cpus].creates_knowledge_graph_edges.remote(edge_types[i])  # type: ignore
-
-        # extract results, aggregate actor dictionaries into single dictionary, and write data to json file
-        _ = ray.wait([x.gets_source_info.remote() for x in actors], num_returns=len(actors))  # type: ignore
-        results = ray.get([x.gets_source_info.remote() for x in actors]); del actors  # type: ignore
-        actor_result_dicts = [{k: v for k, v in x.items() if len(v['edge_list']) > 0} for x in results]
-        with open('/'.join(source_file.split('/')[:-1]) + '/Master_Edge_List_Dict.json', 'w') as filepath:
-            json.dump(dict(ChainMap(*actor_result_dicts)), filepath)
+        write_location = '/'.join(source_file.split('/')[:-1])
+        partial_file = write_location + '/Master_Edge_List_Dict_partial.jsonl'
+        edge_lists = CreatesEdgeList(data_files, source_file, backend); master_edges: Dict[str, Dict[str, Any]] = dict()
+        inputs = {x: edge_lists.hashes_edge_type_inputs(x) for x in data_files.keys() if '-' in x}
+        if os.path.exists(partial_file):  # recover edge types finished by a previous run that did not complete
+            discarded: Set[str] = set(); rewrite = False
+            with open(partial_file, 'r') as partial_results:
+                for line in partial_results:
+                    try: line_dict = json.loads(line); inputs_hash = line_dict.pop('__inputs__')
+                    except (json.JSONDecodeError, AttributeError, KeyError, TypeError): rewrite = True; continue
+                    if len(line_dict) == 0: rewrite = True  # header of a file written by an earlier version
+                    for x, result in line_dict.items():
+                        if inputs.get(x) == inputs_hash: master_edges[x] = result
+                        else: discarded.add(x); rewrite = True
+            discarded -= set(master_edges.keys())
+            log_str = 'Recovered {} Completed Edge Types From: {}'.format(len(master_edges), partial_file)
+            if len(discarded) > 0: log_str += '; Discarded Edge Types Created From Different Inputs: {}'.format(
+                ', '.join(sorted(discarded)))
+            print(log_str); logger.info(log_str)
+            if rewrite:  # only keep the recovered edge types
+                with open(partial_file, 'w') as partial_results:
+                    for x, result in master_edges.items():
+                        partial_results.write(json.dumps({x: result, '__inputs__': inputs[x]}) + '\n')
+        edge_types = [x for x in data_files.keys() if '-' in x and x not in master_edges.keys()]
+        queue = edge_lists.schedules_edge_types(edge_types)
+
+        workers = WorkerPool(max(cpus, 1)) if pool is None else pool; failed: List[str] = []
+        workers.shares('edge_lists', edge_lists)
+        task = CreatesEdgeList._creates_edge_type_task
+        with open(partial_file, 'a') as partial_results:
+            for x, result_ref in workers.runs(task, queue, WorkerPool.Shared('edge_lists')):
+                try: edge_type, result = ray.get(result_ref)  # type: ignore
+                except (ray.exceptions.RayTaskError, ray.exceptions.RayActorError) as e:
+                    log_str = 'Unable to Create Edge: {} - {}'.format(x, str(e)); print(log_str); logger.error(log_str)
+                    failed += [x]; continue
+                master_edges[edge_type] = result
+                partial_results.write(json.dumps({edge_type: result, '__inputs__': inputs[edge_type]}) + '\n')
+                partial_results.flush()
+        workers.releases('edge_lists')
+        if pool is None: workers.shutdown()
+
+        # write all edge types that produced edges to json file
+        with open(write_location + '/Master_Edge_List_Dict.json', 'w') as filepath:
+            json.dump({k: v for k, v in master_edges.items() if len(v['edge_list']) > 0}, filepath)
         filepath.close()
+        if len(failed) == 0: os.remove(partial_file)  # keep partial results so a re-run only repeats failed edges
 
         return None
@@ -12,7 +12,6 @@ import os
 import os.path
 import pandas  # type: ignore
 import pickle
-import ray  # type: ignore
 import shutil
 import subprocess
 
@@ -27,6 +26,7 @@ from pkt_kg.__version__ import __version__
 from pkt_kg.construction_approaches import KGConstructionApproach
 from pkt_kg.metadata import Metadata
 from pkt_kg.owlnets import OwlNets
+from pkt_kg.worker_pool import WorkerPool
 from pkt_kg.utils import *
 
 # set global attributes
@@ -56,6 +56,8 @@ class KGBuilder(object):
         decode_owl: A string containing "yes" or "no" indicating whether owl semantics should be removed.
         cpus: An integer indicating the number of workers to use.
         write_location: An optional string passed to specify the primary directory to write to.
+        pool: An optional WorkerPool to run the parallel build steps on; one with cpus workers is created when needed
+            if no pool is passed and is shut down once the build finishes.
 
     Raises:
         ValueError: If the formatting of kg_version is incorrect (i.e. not "v.#.#.#").
@@ -71,9 +73,12 @@ class KGBuilder(object):
     __metaclass__ = ABCMeta
 
     def __init__(self, construction: str, node_data: str, inverse_relations: str, decode_owl: str, cpus: int = 1,
-                 write_location: str = os.path.abspath('./resources/knowledge_graphs')) -> None:
+                 write_location: str = os.path.abspath('./resources/knowledge_graphs'),
+                 pool: Optional[WorkerPool] = None) -> None:
 
         self.cpus: int = cpus
+        self.pool: Optional[WorkerPool] = pool
+        self.owns_pool: bool = pool is None
         self.build: str = self.gets_build_type().lower().split()[0]
         self.graph: Graph = Graph()
         self.kg_version: str = 'v' + __version__
@@ -158,6 +163,55 @@ class KGBuilder(object):
 
         return None
 
+    def gets_worker_pool(self) -> WorkerPool:
+        """Returns the worker pool used by all parallel build steps, creating one if no pool was passed in."""
+
+        if self.pool is None: self.pool = WorkerPool(self.cpus)
+
+        return self.pool
+
+    def shuts_down_worker_pool(self) -> None:
+        """Shuts down the worker pool if it was created by gets_worker_pool. A pool that was passed in is left running
+        for the caller to re-use."""
+
+        if self.owns_pool and self.pool is not None: self.pool.shutdown(); self.pool = None
+
+        return None
+
+    def constructs_edges(self, kg_owl: str, meta: Metadata) -> List[Tuple[Graph, Graph]]:
+        """Constructs the edges in edge_dict with one EdgeConstructor per worker in the worker pool. Edge types are
+        balanced across workers by edge count. Large inputs (i.e. the edge data, relations dictionaries, ontology
+        classes and object properties, node metadata, and the subclass map) are shared with the pool once rather than
+        being shipped to each worker separately. Subclass mapping errors are written to subclass_map_log.json.
+
+        Args:
+            kg_owl: A string containing the filename of the OWL knowledge graph being built.
+            meta: A Metadata instance used to create node metadata for the new edges.
+
+        Returns:
+            A list of tuples (one per worker), where each tuple contains the graph of the worker's new edges and the
+            same edges with the pkt namespace removed from BNodes.
+        """
+
+        pool = self.gets_worker_pool(); edge_types = {k: len(v['edge_list']) for k, v in self.edge_dict.items()}
+        shared = {'edge_dict': self.edge_dict, 'rel_dict': self.relations_dict, 'ont_cls': self.ont_classes,
+                  'inverse_dict': self.inverse_relations_dict, 'obj_props': self.obj_properties,
+                  'metadata': meta.creates_node_metadata,
+                  'subclass_dict': KGConstructionApproach(self.res_dir).subclass_dict}
+        for k, v in shared.items(): pool.shares(k, v)
+        args = {'construction': self.construct_approach, 'write_loc': self.write_location, 'kg_owl': kg_owl,
+                'node_data': self.node_data, **{k: WorkerPool.Shared(k) for k in shared.keys()}}
+        edges = sublist_creator(edge_types, pool.cpus); pool.creates('edges', self.EdgeConstructor, args)
+        for i in range(0, len(edges)): [pool.calls(i, 'edges', 'creates_new_edges', j) for j in edges[i]]
+        graph_res = pool.gathers('edges', 'graph_getter')
+        error_dicts = dict(ChainMap(*pool.gathers('edges', 'error_dict_getter')))
+        for k in ['edges'] + list(shared.keys()): pool.releases(k)
+        if len(error_dicts.keys()) > 0:  # output error logs
+            log_file = glob.glob(self.res_dir + '/construction*')[0] + '/subclass_map_log.json'
+            logger.info('See log: {}'.format(log_file)); outputs_dictionary_data(error_dicts, log_file)
+
+        return graph_res
+
     def construct_knowledge_graph(self) -> None:
         """Builds a knowledge graph. The knowledge graph build is completed differently depending on the build type
         that the user requested. The build types include: "full", "partial", or "post-closure". The knowledge graph
@@ -189,6 +243,7 @@ class KGBuilder(object):
             inverse_dict: A dictionary keyed by URI containing all relations and their inverse relation.
             node_data: A string ("yes" or "no") indicating whether or not to add node data to the knowledge graph.
             metadata: An instance of the metadata class with bound method needed for created edge metadata.
+            subclass_dict: A dictionary of subclass mappings, loaded once instead of for each edge type.
             ont_cls: A set of RDFLib URIRef terms representing all classes in the core merged ontologies.
             obj_props: A set of RDFLib URIRef terms representing all object properties in the core merged ontologies.
             write_loc: A string passed specifying the primary directory to write to.
@@ -208,6 +263,7 @@ class KGBuilder(object):
             self.obj_properties: Set = params.get('obj_props')
             self.ont_classes: Set = params.get('ont_cls')
             self.relations_dict: Optional[Dict] = params.get('rel_dict')
+            self.subclass_dict: Optional[Dict] = params.get('subclass_dict')
             self.res_dir: str = os.path.abspath('/'.join(params.get('write_loc').split('/')[:-1]))
             self.write_location: str = params.get('write_loc')
 
@@ -322,27 +378,30 @@ class KGBuilder(object):
                 graph: An RDFLib Graph object.
             """
 
-            kg_bld = KGConstructionApproach(self.res_dir)
+            kg_bld = KGConstructionApproach(self.res_dir, self.subclass_dict)
             f_name = self.write_location + '_'.join(self.kg_owl.split('_')[0:-1]) + '_OWL'
             anot = f_name + '_AnnotationsOnly.nt'; logic = f_name + '_LogicOnly.nt'
             edge_list = self.edge_dict[edge_type]['edge_list']; s, o = self.edge_dict[edge_type]['data_type'].split('-')
             rel, uri = self.edge_dict[edge_type]['edge_relation'], self.edge_dict[edge_type]['uri']
             invrel = self.checks_relations(rel, edge_list) if self.inverse_relations_dict is not None else None
-            n1, n2, rels = set(), set(), 0; res: Set = set()  # ; pbar = tqdm(total=len(edge_list))
+            n1, n2, rels = set(), set(), 0; res: Set = set(); meta_edges: List = []
             while len(edge_list) > 0:
                 edge = edge_list.pop(0)  # ; pbar.update(1)
                 edge_info = {'n1': s, 'n2': o, 'rel': rel, 'inv_rel': invrel, 'uri': uri, 'edges': edge}
-                meta = self.node_metadata_func(ent=[''.join(x) for x in list(zip(uri, edge))], e_type=[s, o])
+                if not self.checks_classes(edge_info): continue
+                meta = self.node_metadata_func(ent=[''.join(x) for x in list(zip(uri, edge))], e_type=[s, o],
+                                               emit_once=True)
                 meta_logic = [True if (self.node_data is None and meta is None) or [s, o] == ['class', 'class']
                               or (self.node_data is not None and meta is not None) else False][0]
-                if self.checks_classes(edge_info) and meta_logic:
+                if meta_logic:
                     if self.construction == 'subclass': edges = set(kg_bld.subclass_constructor(edge_info, edge_type))
                     else: edges = set(kg_bld.instance_constructor(edge_info, edge_type))
                     res |= edges; n1 |= {edge[0]}; n2 |= {edge[1]}; rels = rels + 1 if invrel is None else rels + 2
                     self.graph = adds_edges_to_graph(self.graph, edges, False); appends_to_existing_file(edges, logic)
-                    if meta is not None: appends_to_existing_file(meta, anot)
+                    if meta is not None: meta_edges += meta
                     cleaned_graph = updates_pkt_namespace_identifiers(edges, self.construction, False)
                     self.clean_graph = adds_edges_to_graph(self.clean_graph, cleaned_graph, False)
+            if len(meta_edges) > 0: appends_to_existing_file(meta_edges, anot)
             stat = self.gets_edge_statistics(edge_type, res, [n1, n2, rels]); del [n1, n2, rels], res  # ; pbar.close()
             p = 'Created {} ({}-{}) Edges: {}'.format(edge_type.upper(), s, o, stat); print('\n' + p); logger.info(p)
             if len(kg_bld.subclass_error.keys()) > 0: self.error_dict = kg_bld.subclass_error
@@ -390,7 +449,7 @@ class PartialBuild(KGBuilder):
         # STEP 3: PROCESS NODE METADATA
         log_str = '*** Loading Node Metadata Data ***'; print(log_str); logger.info(log_str)
         meta = Metadata(self.kg_version, self.write_location, self.full_kg, self.node_data, self.node_dict)
-        if self.node_data: meta.metadata_processor(); meta.extract_metadata(self.graph)
+        if self.node_data: meta.metadata_processor(store=True); meta.extract_metadata(self.graph, self.cpus)
 
         # STEP 4: CREATE GRAPH SUBSETS
         log_str = '*** Splitting Graph ***'; print(log_str); logger.info(log_str)
@@ -404,25 +463,9 @@ class PartialBuild(KGBuilder):
         # STEP 5: ADD EDGE DATA TO KNOWLEDGE GRAPH DATA
         log_str = '*** Building Knowledge Graph Edges ***'; print(log_str); logger.info(log_str)
         self.ont_classes = gets_ontology_classes(self.graph); self.obj_properties = gets_object_properties(self.graph)
-        # instantiate inner class to construct edge sets
-        try: ray.init()
-        except RuntimeError: pass
-        args = {'construction': self.construct_approach, 'edge_dict': self.edge_dict, 'write_loc': self.write_location,
-                'rel_dict': self.relations_dict, 'inverse_dict': self.inverse_relations_dict, 'kg_owl': kg_owl,
-                'node_data': self.node_data, 'ont_cls': self.ont_classes, 'metadata': meta.creates_node_metadata,
-                'obj_props': self.obj_properties}
-        edges = sublist_creator({k: len(v['edge_list']) for k, v in self.edge_dict.items()}, self.cpus)
-        actors = [ray.remote(self.EdgeConstructor).remote(args) for _ in range(self.cpus)]  # type: ignore
-        for i in range(0, len(edges)): [actors[i].creates_new_edges.remote(j) for j in edges[i]]  # type: ignore
-        # extract results, aggregate actor dictionaries into single dictionary, and write data to json file
-        _ = ray.wait([x.graph_getter.remote() for x in actors], num_returns=len(actors))  # type: ignore
-        graph_res = ray.get([x.graph_getter.remote() for x in actors])  # type: ignore
+        try: graph_res = self.constructs_edges(kg_owl, meta)
+        finally: self.shuts_down_worker_pool()
         graphs = [self.graph] + [x[0] for x in graph_res]  # ; clean_graphs = [x[1] for x in graph_res]
-        error_dicts = dict(ChainMap(*ray.get([x.error_dict_getter.remote() for x in actors])))  # type: ignore
-        del actors
-        if len(error_dicts.keys()) > 0:  # output error logs
-            log_file = glob.glob(self.res_dir + '/construction*')[0] + '/subclass_map_log.json'
-            logger.info('See log: {}'.format(log_file)); outputs_dictionary_data(error_dicts, log_file)
         results = set(x for y in [set(x) for x in graphs] for x in y)
         stats = 'Full Logic {}'.format(derives_graph_statistics(results)); print(stats); logger.info(stats)
 
@@ -479,7 +522,7 @@ class PostClosureBuild(KGBuilder):
         # STEP 3: PROCESS NODE METADATA
         log_str = '*** Loading Node Metadata Data ***'; print(log_str); logger.info(log_str)
         meta = Metadata(self.kg_version, self.write_location, self.full_kg, self.node_data, self.node_dict)
-        if self.node_data: meta.metadata_processor(); meta.extract_metadata(self.graph)
+        if self.node_data: meta.metadata_processor(store=True); meta.extract_metadata(self.graph, self.cpus)
 
         # STEP 4: CREATE GRAPH SUBSETS
         log_str = '*** Splitting Graph ***'; print(log_str); logger.info(log_str)
@@ -499,7 +542,8 @@ class PostClosureBuild(KGBuilder):
         if self.decode_owl:
             self.graph = updates_pkt_namespace_identifiers(self.graph, self.construct_approach)
             owlnets = OwlNets(self.graph, self.write_location, kg_owl_main, self.construct_approach, self.owl_tools)
-            results = [results[0]] + list(owlnets.runs_owlnets(self.cpus))
+            try: results = [results[0]] + list(owlnets.runs_owlnets(self.cpus, self.gets_worker_pool()))
+            finally: self.shuts_down_worker_pool()
 
         # STEP 7: WRITE OUT KNOWLEDGE GRAPH METADATA AND CREATE EDGE LISTS
         log_str = '*** Writing Knowledge Graph Edge Lists ***'; print('\n' + log_str); logger.info(log_str)
@@ -514,7 +558,7 @@ class PostClosureBuild(KGBuilder):
 
                 # STEP 8: EXTRACT AND WRITE NODE METADATA
                 meta.full_kg = kg_owl[:-8] + f_prefix[x] + '.owl'
-                if self.node_data: meta.output_metadata(node_int_map, graph)
+                if self.node_data: meta.output_metadata(node_int_map)
 
         # deduplicate logic and annotation files and then merge them
         deduplicates_file(_ + annot); deduplicates_file(_ + logic); merges_files(_ + annot, _ + logic, _ + full)
@@ -560,7 +604,7 @@ class FullBuild(KGBuilder):
         # STEP 3: PROCESS NODE METADATA
         log_str = '*** Loading Node Metadata Data ***'; print(log_str); logger.info(log_str)
         meta = Metadata(self.kg_version, self.write_location, self.full_kg, self.node_data, self.node_dict)
-        if self.node_data: meta.metadata_processor(); meta.extract_metadata(self.graph)
+        if self.node_data: meta.metadata_processor(store=True); meta.extract_metadata(self.graph, self.cpus)
 
         # STEP 4: CREATE GRAPH SUBSETS
         log_str = '*** Splitting Graph ***'; print(log_str); logger.info(log_str)
@@ -574,34 +618,20 @@ class FullBuild(KGBuilder):
         # STEP 5: ADD EDGE DATA TO KNOWLEDGE GRAPH DATA
         log_str = '*** Building Knowledge Graph Edges ***'; print('\n' + log_str); logger.info(log_str)
         self.ont_classes = gets_ontology_classes(self.graph); self.obj_properties = gets_object_properties(self.graph)
-        try: ray.init()
-        except RuntimeError: pass
-        args = {'construction': self.construct_approach, 'edge_dict': self.edge_dict, 'node_data': self.node_data,
-                'rel_dict': self.relations_dict, 'inverse_dict': self.inverse_relations_dict, 'kg_owl': kg_owl,
-                'ont_cls': self.ont_classes, 'obj_props': self.obj_properties, 'metadata': meta.creates_node_metadata,
-                'write_loc': self.write_location}
-        edges = sublist_creator({k: len(v['edge_list']) for k, v in self.edge_dict.items()}, self.cpus)
-        actors = [ray.remote(self.EdgeConstructor).remote(args) for _ in range(self.cpus)]  # type: ignore
-        for i in range(0, len(edges)): [actors[i].creates_new_edges.remote(j) for j in edges[i]]  # type: ignore
-        _ = ray.wait([x.graph_getter.remote() for x in actors], num_returns=len(actors))  # type: ignore
-        res = ray.get([x.graph_getter.remote() for x in actors]); g1 = [x[0] for x in res]  # type: ignore
-        g2 = [x[1] for x in res]
-        error_dicts = dict(ChainMap(*ray.get([x.error_dict_getter.remote() for x in actors])))  # type: ignore
-        del actors
-        if len(error_dicts.keys()) > 0:  # output error logs
-            log_file = glob.glob(self.res_dir + '/construction*')[0] + '/subclass_map_log.json'
-            logger.info('See log: {}'.format(log_file)); outputs_dictionary_data(error_dicts, log_file)
-
-        # STEP 6: DECODE OWL SEMANTICS
-        results = [set(x for y in [set(x) for x in [self.graph] + g1] for x in y), None, None]
-        stats = 'Full Logic {}'.format(derives_graph_statistics(results[0])); print(stats); logger.info(stats)
-        s1 = convert_to_networkx(self.write_location, kg_owl[:-4], results[0], True)
-        if s1 is not None: log_stats = 'Full Logic Subset (OWL) {}'.format(s1); logger.info(log_stats); print(log_stats)
-        # aggregates processed owl-nets output derived when constructing non-ontology edges
-        if self.decode_owl is not None:
-            graphs = [updates_pkt_namespace_identifiers(self.graph, self.construct_approach)] + g2
-            owlnets = OwlNets(graphs, self.write_location, kg_owl_main, self.construct_approach, self.owl_tools)
-            results = [results[0]] + list(owlnets.runs_owlnets(self.cpus))
+        try:
+            res = self.constructs_edges(kg_owl, meta); g1 = [x[0] for x in res]; g2 = [x[1] for x in res]
+
+            # STEP 6: DECODE OWL SEMANTICS
+            results = [set(x for y in [set(x) for x in [self.graph] + g1] for x in y), None, None]
+            stats = 'Full Logic {}'.format(derives_graph_statistics(results[0])); print(stats); logger.info(stats)
+            s1 = convert_to_networkx(self.write_location, kg_owl[:-4], results[0], True)
+            if s1 is not None: log_str = 'Full Logic Subset (OWL) {}'.format(s1); logger.info(log_str); print(log_str)
+            # aggregates processed owl-nets output derived when constructing non-ontology edges
+            if self.decode_owl is not None:
+                graphs = [updates_pkt_namespace_identifiers(self.graph, self.construct_approach)] + g2
+                owlnets = OwlNets(graphs, self.write_location, kg_owl_main, self.construct_approach, self.owl_tools)
+                results = [results[0]] + list(owlnets.runs_owlnets(self.cpus, self.gets_worker_pool()))
+        finally: self.shuts_down_worker_pool()
 
         # STEP 7: WRITE OUT KNOWLEDGE GRAPH METADATA AND CREATE EDGE LISTS
         log_str = '*** Writing Knowledge Graph Edge Lists ***'; print('\n' + log_str); logger.info(log_str)
@@ -616,7 +646,7 @@ class FullBuild(KGBuilder):
 
                 # STEP 8: EXTRACT AND WRITE NODE METADATA
                 meta.full_kg = kg_owl[:-8] + f_prefix[x] + '.owl'
-                if self.node_data: meta.output_metadata(node_int_map, graph)
+                if self.node_data: meta.output_metadata(node_int_map)
 
         # deduplicate logic and annotation files, merge them, and print final stats
         deduplicates_file(f + annot); deduplicates_file(f + logic); merges_files(f + annot, f + logic, f + full)
@@ -3,20 +3,25 @@
 
 # import needed libraries
 import glob
-# import json
+import json
 import logging.config
 # import os
 import os.path
 import pandas  # type: ignore
 import pickle
+import ray  # type: ignore
 import re
+import sqlite3
 # import subprocess
 
+from collections import ChainMap
+from collections.abc import MutableMapping
 from datetime import datetime
+from itertools import chain, islice
 from rdflib import Graph, Literal, Namespace, URIRef   # type: ignore
 from rdflib.namespace import RDF, RDFS, OWL  # type: ignore
 from tqdm import tqdm  # type: ignore
-from typing import Dict, List, Optional, Set, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 from pkt_kg.utils import *
 
@@ -34,6 +39,186 @@ logger = logging.getLogger(__name__)
 logging.config.fileConfig(log_config[0], disable_existing_loggers=False, defaults={'log_file': log_dir + '/' + log})
 
 
+class MetadataStore(object):
+    """Class provides an on-disk keyed store of node and relation metadata, backed by SQLite. Each identifier's
+    metadata record (e.g. "Label", "Description", and "Synonym") is stored whole as JSON. String values are normalized
+    (i.e. newlines and repeated whitespace removed) when they are written, so they never need to be tidied on read.
+    The database connection is opened lazily and is not pickled, which allows the store to be shipped to ray actors,
+    where each actor opens its own read connection.
+
+    Attributes:
+        filepath: A string containing the filepath to the SQLite database (e.g. 'node_data/node_metadata_dict.db').
+        created: A bool indicating whether or not the metadata table was created (i.e. the store was empty or was
+            written with an older schema) when the store was opened.
+    """
+
+    version = 2
+
+    def __init__(self, filepath: str) -> None:
+
+        self.filepath: str = filepath
+        self._conn: Optional[sqlite3.Connection] = None
+        conn = self.connection(); self.created: bool = conn.execute('PRAGMA user_version').fetchone()[0] != self.version
+        if self.created:
+            conn.execute('DROP TABLE IF EXISTS metadata'); conn.execute('PRAGMA user_version = {}'.format(self.version))
+        conn.execute('CREATE TABLE IF NOT EXISTS metadata (key_type TEXT, uri TEXT, record TEXT, '
+                     'PRIMARY KEY (key_type, uri))'); conn.commit()
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy(); state['_conn'] = None
+
+        return state
+
+    def connection(self) -> sqlite3.Connection:
+        """Returns the SQLite connection for the store, opening it on first use."""
+
+        if self._conn is None: self._conn = sqlite3.connect(self.filepath, check_same_thread=False)
+
+        return self._conn
+
+    @staticmethod
+    def _tidies(value: Any) -> Any:
+        """Removes newlines and repeated whitespace from a metadata string."""
+
+        return re.sub(r'\s\s+', ' ', value.replace('\n', ' ')) if isinstance(value, str) else value
+
+    def updates(self, key_type: str, metadata: Dict) -> None:
+        """Inserts or replaces the metadata for a set of identifiers.
+
+        Args:
+            key_type: A string indicating if the key should be 'nodes' or 'relations'.
+            metadata: A dictionary keyed by identifier, where each value is a dictionary of metadata (e.g. "Label",
+                "Description", and "Synonym").
+
+        Returns:
+            None.
+        """
+
+        rows = [(key_type, k, json.dumps({i: self._tidies(j) for i, j in v.items()})) for k, v in metadata.items()]
+        conn = self.connection()
+        conn.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?, ?)', rows); conn.commit()
+
+        return None
+
+    def loads_dict(self, node_dict: Dict) -> None:
+        """Loads a nested node metadata dictionary (see Metadata.node_dict) into the store."""
+
+        for key_type, metadata in node_dict.items(): self.updates(key_type, metadata)
+
+        return None
+
+    def dumps_dict(self) -> Dict:
+        """Returns the contents of the store as a nested node metadata dictionary (see Metadata.node_dict)."""
+
+        node_dict: Dict = {'nodes': dict(), 'relations': dict()}
+        for row in self.connection().execute('SELECT key_type, uri, record FROM metadata'):
+            node_dict.setdefault(row[0], dict())[row[1]] = json.loads(row[2])
+
+        return node_dict
+
+    def gets(self, key_type: str, uri: str) -> Optional[Dict]:
+        """Returns the metadata dictionary for a single identifier or None if the identifier is not in the store."""
+
+        row = self.connection().execute('SELECT record FROM metadata WHERE key_type = ? AND uri = ?',
+                                        (key_type, uri)).fetchone()
+
+        return json.loads(row[0]) if row is not None else None
+
+    def gets_batch(self, key_type: str, uris: Iterable[str], batch: int = 500) -> Dict[str, Dict]:
+        """Returns the metadata for a collection of identifiers, querying the store in batches.
+
+        Args:
+            key_type: A string indicating if the key should be 'nodes' or 'relations'.
+            uris: An iterable of identifiers.
+            batch: An integer specifying the number of identifiers to query at once (default=500).
+
+        Returns:
+            A dictionary keyed by identifier, where each value is a dictionary of metadata. Identifiers that are not
+            in the store are not included.
+        """
+
+        uris, results = list(uris), dict()
+        for i in range(0, len(uris), batch):
+            chunk = uris[i:i + batch]; params = ', '.join(['?'] * len(chunk))
+            for row in self.connection().execute('SELECT uri, record FROM metadata WHERE key_type = ? AND uri IN '
+                                                 '({})'.format(params), [key_type] + chunk):
+                results[row[0]] = json.loads(row[1])
+
+        return results
+
+    def deletes(self, key_type: str, uri: str) -> None:
+        """Removes the metadata for a single identifier from the store."""
+
+        conn = self.connection()
+        conn.execute('DELETE FROM metadata WHERE key_type = ? AND uri = ?', (key_type, uri)); conn.commit()
+
+        return None
+
+    def keys(self, key_type: str) -> Iterator[str]:
+        """Yields the identifiers stored for a key type."""
+
+        for row in self.connection().execute('SELECT uri FROM metadata WHERE key_type = ?', (key_type,)): yield row[0]
+
+    def counts(self, key_type: str) -> int:
+        """Returns the number of identifiers stored for a key type."""
+
+        return self.connection().execute('SELECT COUNT(*) FROM metadata WHERE key_type = ?', (key_type,)).fetchone()[0]
+
+    def view(self, key_type: str) -> 'MetadataView':
+        """Returns a dictionary-like view over the identifiers stored for a key type."""
+
+        return MetadataView(self, key_type)
+
+
+class MetadataView(MutableMapping):
+    """Class provides a dictionary-like view of a single key type (i.e. "nodes" or "relations") in a MetadataStore,
+    allowing it to be used anywhere a Metadata.node_dict value is expected. Lookups and updates are sent to the store,
+    so the metadata is never loaded into memory as a whole.
+
+    Attributes:
+        store: A MetadataStore object.
+        key_type: A string indicating if the key should be 'nodes' or 'relations'.
+    """
+
+    def __init__(self, store: MetadataStore, key_type: str) -> None:
+
+        self.store: MetadataStore = store
+        self.key_type: str = key_type
+
+    def __getitem__(self, uri: str) -> Dict:
+        value = self.store.gets(self.key_type, uri)
+        if value is None: raise KeyError(uri)
+
+        return value
+
+    def get(self, uri: str, default: Optional[Dict] = None) -> Optional[Dict]:  # type: ignore
+        value = self.store.gets(self.key_type, uri)
+
+        return value if value is not None else default
+
+    def __contains__(self, uri: object) -> bool:
+        return isinstance(uri, str) and self.store.gets(self.key_type, uri) is not None
+
+    def __setitem__(self, uri: str, value: Dict) -> None:
+        self.store.updates(self.key_type, {uri: value})
+
+    def __delitem__(self, uri: str) -> None:
+        if uri not in self: raise KeyError(uri)
+        self.store.deletes(self.key_type, uri)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.store.keys(self.key_type)
+
+    def __len__(self) -> int:
+        return self.store.counts(self.key_type)
+
+    def update(self, other: Dict) -> None:  # type: ignore
+        self.store.updates(self.key_type, dict(other))
+
+    def gets_batch(self, uris: Iterable[str]) -> Dict[str, Dict]:
+        return self.store.gets_batch(self.key_type, uris)
+
+
 class Metadata(object):
     """Class helps manage knowledge graph metadata.
 
@@ -56,6 +241,9 @@ class Metadata(object):
                         'Description': 'Any individual unit of a collection of like units arranged in a linear order',
                         'Synonym': 'None'} ... }
                 }
+        emitted: A set of (key_type, identifier) tuples for nodes whose metadata triples were already emitted by this
+            instance. Each worker receives its own copy of the instance, so the cache is local to a worker.
+        store: A MetadataStore object that backs node_dict when metadata_processor is run with store=True.
     """
 
     def __init__(self, kg_version: str, write_location: str, kg_location: str, node_data: Optional[List],
@@ -66,19 +254,37 @@ class Metadata(object):
         self.full_kg: str = kg_location
         self.node_data = node_data
         self.node_dict = node_dict
+        self.emitted: Set = set()
+        self.store: Optional[MetadataStore] = None
 
-    def metadata_processor(self) -> None:
+    def metadata_processor(self, store: bool = False) -> None:
         """Loads a directory of node and relations data. The dictionary is nested with the outer keys corresponding
         to the metadata type (i.e. "nodes" or "relations") and the values containing dictionaries keyed by URI and
         values containing a dictionary of metadata.
 
+        When store is True, the metadata is instead accessed through an on-disk MetadataStore, which is saved next to
+        the pickled dictionary (e.g. node_metadata_dict.db). The store is only (re)built from the pickled dictionary
+        when it does not exist, was written with an older schema, or is older than the pickled dictionary, and the
+        values of self.node_dict are replaced with MetadataView objects.
+
+        Args:
+            store: A bool indicating whether or not to use an on-disk MetadataStore (default=False).
+
         Returns:
             None.
         """
 
         if self.node_data:
             log_str = 'Loading and Processing Node Metadata'; print(log_str); logger.info(log_str)
-            self.node_dict = pickle.load(open(self.node_data[0], 'rb'), encoding="utf8")
+            if not store: self.node_dict = pickle.load(open(self.node_data[0], 'rb'), encoding="utf8")
+            else:
+                db = os.path.splitext(self.node_data[0])[0] + '.db'
+                stale = not os.path.exists(db) or os.path.getmtime(db) < os.path.getmtime(self.node_data[0])
+                if stale and os.path.exists(db): os.remove(db)
+                self.store = MetadataStore(db)
+                if stale or self.store.created:
+                    self.store.loads_dict(pickle.load(open(self.node_data[0], 'rb'), encoding="utf8"))
+                self.node_dict = {'nodes': self.store.view('nodes'), 'relations': self.store.view('relations')}
 
         return None
 
@@ -86,7 +292,7 @@ class Metadata(object):
         """Function checks the node_dict object, verifying that all associated strings do not contain random newline
         characters which can cause errors when writing our metadata"""
 
-        if self.node_data and self.node_dict is not None:
+        if self.node_data and self.node_dict is not None and self.store is None:
             temp_copy = self.node_dict.copy(); self.node_dict = dict()
             for key, value in tqdm(temp_copy.items()):
                 self.node_dict[key] = {}
@@ -98,7 +304,34 @@ class Metadata(object):
 
         return None
 
-    def extract_metadata(self, graph: Graph) -> None:
+    @staticmethod
+    def _indexes_metadata(triples: Iterable[Tuple], entities: Optional[Set], synonyms: Set) -> Dict:
+        """Walks a set of label, definition, and synonym triples once and collects the metadata for the subjects in the
+        input set of entities.
+
+        Args:
+            triples: An iterable of RDFLib (subject, predicate, object) tuples, where the predicate is rdfs:label,
+                obo:IAO_0000115, or a synonym predicate.
+            entities: A set of RDFLib URIRef objects to collect metadata for or None, to collect metadata for all of the
+                subjects in triples.
+            synonyms: A set of RDFLib URIRef objects, where each is a synonym predicate.
+
+        Returns:
+            A dictionary keyed by entity string, where the value is a dictionary of metadata (i.e. "Label",
+            "Description", and "Synonym"). Only entities that have a label are included.
+        """
+
+        labels: Dict = dict(); descriptions: Dict = dict(); syns: Dict = dict()
+        for s, p, o in triples:
+            if entities is not None and s not in entities: continue
+            if p in synonyms: syns.setdefault(s, []).append(str(o)); continue
+            res = labels if p == RDFS.label else descriptions
+            if s not in res and ('@' not in n3(o) or '@en' in n3(o)): res[s] = str(o)
+
+        return {str(i): {'Label': labels[i], 'Description': descriptions.get(i),
+                         'Synonym': '|'.join(syns[i]) if i in syns else None} for i in labels.keys()}
+
+    def extract_metadata(self, graph: Graph, cpus: int = 1) -> None:
         """Functions queries the knowledge graph to obtain labels, definitions/descriptions, and synonyms for all
         owl:Class, owl:NamedIndividual, and owl:ObjectProperty objects. This information is then added to the existing
         self.node_dict dictionary under the key of "nodes" (for owl:Class and owl:NamedIndividual) or "relations" (for
@@ -106,8 +339,15 @@ class Metadata(object):
         value. The metadata types are packaged as a dictionary which is stored as the value to the node identifier as
         the key.
 
+        The graph's rdf:type triples are scanned once to find the entities and each metadata predicate is then walked
+        once (see _indexes_metadata). When cpus > 1, the metadata triples of the entities are split by subject into
+        partitions and each partition (rather than the graph) is sent to a ray worker, which processes it in parallel.
+        The updated metadata are written back to the pickled dictionary or, when a MetadataStore is used, only the
+        updated records are written to the store (the pickled dictionary can be updated with exports_metadata).
+
         Args:
             graph: An rdflib graph object.
+            cpus: An integer specifying the number of subject partitions to process in parallel (default=1).
 
         Returns:
             None.
@@ -116,43 +356,90 @@ class Metadata(object):
         log_str = 'Extracting Class and Relation Metadata'; print('\n' + log_str); logger.info(log_str)
 
         if self.node_dict:
-            domains = [
-                ('nodes', [i[0] for i in list(graph.triples((None, RDF.type, None)))
-                           if isinstance(i[0], URIRef)
-                           and (OWL.Class in i[2] or OWL.NamedIndividual in i[2])
-                           and ('#' not in str(i[0]) or '#' not in str(i[2]))]),
-                ('relations', [i[0] for i in list(graph.triples((None, RDF.type, None)))
-                               if isinstance(i[0], URIRef) and i[2] == OWL.ObjectProperty])
-            ]
-            for key, entities in domains:
-                temp_dict = dict()
-                for i in tqdm(entities):
-                    labels = [x for x in graph.triples((i, RDFS.label, None))
-                              if '@' not in n3(x[2]) or '@en' in n3(x[2])]
-                    descriptions = [x for x in graph.triples((i, obo.IAO_0000115, None))
-                                    if '@' not in n3(x[2]) or '@en' in n3(x[2])]
-                    synonyms = [x for x in graph.triples((i, None, None)) if 'synonym' in str(x[1]).lower()]
-                    if len(labels) != 0:
-                        temp_dict[str(i)] = {
-                            'Label': str(labels[0][2]) if len(labels) > 0 else None,
-                            'Description': str(descriptions[0][2]) if len(descriptions) > 0 else None,
-                            'Synonym': '|'.join([str(c[2]) for c in synonyms]) if len(synonyms) > 0 else None
-                        }
-                self.node_dict[key] = {**self.node_dict[key], **temp_dict}
+            nodes, relations = set(), set()
+            for s, o in graph.subject_objects(RDF.type):
+                if not isinstance(s, URIRef): continue
+                if (str(OWL.Class) in str(o) or str(OWL.NamedIndividual) in str(o)) and \
+                        ('#' not in str(s) or '#' not in str(o)):
+                    nodes.add(s)
+                if o == OWL.ObjectProperty: relations.add(s)
+            synonyms = {x for x in graph.predicates() if 'synonym' in str(x).lower()}
+            entities = nodes | relations
+            triples = chain.from_iterable(graph.triples((None, p, None))
+                                          for p in [RDFS.label, obo.IAO_0000115] + sorted(synonyms, key=str))
+            if cpus > 1 and len(entities) > 0:
+                parts: List[List] = [[] for _ in range(cpus)]
+                for t in triples:
+                    if t[0] in entities: parts[hash(t[0]) % cpus].append(t)
+                try: ray.init()
+                except RuntimeError: pass
+                task = ray.remote(Metadata._indexes_metadata)  # type: ignore
+                metadata = dict(ChainMap(*ray.get([task.remote(x, None, synonyms) for x in parts if len(x) > 0])))
+            else: metadata = self._indexes_metadata(triples, entities, synonyms)
+            for key, ents in [('nodes', nodes), ('relations', relations)]:
+                self.node_dict[key].update({str(i): metadata[str(i)] for i in ents if str(i) in metadata})
 
             # add rdfs:subclassof and rdf:type
-            self.node_dict['relations'] = {
-                **self.node_dict['relations'],
-                **{'http://www.w3.org/2000/01/rdf-schema#subClassOf': {
+            self.node_dict['relations'].update({
+                'http://www.w3.org/2000/01/rdf-schema#subClassOf': {
                     'Label': 'subClassOf', 'Description': 'The subject is a subclass of a class.', 'Synonym': 'None'},
-                    'http://www.w3.org/1999/02/22-rdf-syntax-ns#type': {
-                        'Label': 'type', 'Description': 'The subject is an instance of a class.', 'Synonym': 'None'}}}
+                'http://www.w3.org/1999/02/22-rdf-syntax-ns#type': {
+                    'Label': 'type', 'Description': 'The subject is an instance of a class.', 'Synonym': 'None'}})
 
-            if self.node_data: pickle.dump(self.node_dict, open(self.node_data[0], 'wb'))
+            if self.node_data and self.store is None: pickle.dump(self.node_dict, open(self.node_data[0], 'wb'))
 
         return None
 
-    def creates_node_metadata(self, ent: List, e_type: Optional[List] = None, key_type: str = 'nodes') -> Graph:
+    def exports_metadata(self) -> None:
+        """Writes the contents of the MetadataStore to the pickled dictionary (e.g. when the dictionary is published
+        with a build). The store is then marked as newer than the dictionary, so it is not rebuilt from it.
+
+        Returns:
+            None.
+        """
+
+        if self.node_data and self.store is not None:
+            log_str = 'Exporting Node Metadata Store'; print(log_str); logger.info(log_str)
+            pickle.dump(self.store.dumps_dict(), open(self.node_data[0], 'wb'), protocol=4)
+            os.utime(self.store.filepath)
+
+        return None
+
+    def creates_bulk_node_metadata(self, ents: Union[List, Set], key_type: str = 'nodes',
+                                   emit_once: bool = False) -> List:
+        """Creates the label, description, and synonym triples for a collection of node identifiers, such as the
+        unique set of non-class entities in an edge type. Identifiers without metadata are skipped. When emit_once is
+        True, the emission cache (self.emitted) is used so that each identifier's triples are only created once by
+        this instance (i.e. once per worker per build).
+
+        Args:
+            ents: A list or set of node identifiers (e.g. {'http://example/3075', 'http://example/1080'}).
+            key_type: A string indicating if the key should be 'nodes' or 'relations (default='nodes').
+            emit_once: A bool indicating whether or not to skip identifiers that were already emitted.
+
+        Returns:
+            edges: A list of tuples containing RDFLib objects used to add metadata to a knowledge graph.
+        """
+
+        edges: List = []
+        if not self.node_dict or not isinstance(self.node_dict, Dict): return edges
+        key_dict = self.node_dict.get(key_type, dict())
+        for i in ents:
+            if emit_once and (key_type, i) in self.emitted: continue
+            metadata_info = key_dict.get(i)
+            if metadata_info is None: continue
+            if emit_once: self.emitted.add((key_type, i))
+            node = URIRef(i)
+            label, desc, syn = [metadata_info.get(x) for x in ['Label', 'Description', 'Synonym']]
+            if label is not None and 'None' not in label: edges += [(node, RDFS.label, Literal(label))]
+            if desc is not None and 'None' not in desc: edges += [(node, URIRef(obo + 'IAO_0000115'), Literal(desc))]
+            if syn is not None and 'None' not in syn:
+                edges += [(node, URIRef(oboinowl + 'hasSynonym'), Literal(x)) for x in syn.split('|')]
+
+        return edges
+
+    def creates_node_metadata(self, ent: List, e_type: Optional[List] = None, key_type: str = 'nodes',
+                              emit_once: bool = False) -> Optional[List]:
         """Given a node in the knowledge graph, if the node is not an ontology class and if it has metadata information,
         then new edges are created to add the metadata to the knowledge graph. Metadata that is added includes: labels,
         descriptions, and synonyms.
@@ -161,36 +448,27 @@ class Metadata(object):
             ent: A list of two node identifiers (e.g. ['http://example/3075', 'http://example/1080']).
             e_type: A list of types for each node in nodes (e.g. ['entity', 'entity']).
             key_type: A string indicating if the key should be 'nodes' or 'relations (default='nodes').
+            emit_once: A bool indicating whether or not to only return triples for nodes that have not already been
+                emitted by this instance. When True, an empty list is returned for matching nodes that were already
+                emitted, so the result can still be used to check whether the nodes have metadata.
 
         Returns:
             edges: A list of tuples containing RDFLib objects used to add metadata to a knowledge graph.
         """
 
-        key, edges, x = key_type, [], []
+        key = key_type
         if self.node_dict and isinstance(self.node_dict, Dict):
+            key_dict = self.node_dict[key]
             if key == 'nodes' and isinstance(e_type, List):
-                x = [i for i in ent if e_type[ent.index(i)] != 'class' and i in self.node_dict[key].keys()]
-            elif key == 'relations': x = [i for i in ent if i in self.node_dict[key].keys()]
+                x = [i for i, t in zip(ent, e_type) if t != 'class' and i in key_dict]
+            elif key == 'relations': x = [i for i in ent if i in key_dict]
             else: return None
             # check for matches
             if (key == 'relations' and e_type is None) and len(x) == 0: return None
             elif e_type == ['class', 'class'] and len(x) == 0: return None
             elif (e_type == ['class', 'entity'] or e_type == ['entity', 'class']) and len(x) == 0: return None
             elif e_type == ['entity', 'entity'] and len(x) != 2: return None
-            else:
-                for i in x:
-                    metadata_info = self.node_dict[key][i]
-                    if 'Label' in metadata_info.keys():
-                        if metadata_info['Label'] is not None and 'None' not in metadata_info['Label']:
-                            edges += [(URIRef(i), RDFS.label, Literal(metadata_info['Label']))]
-                    if 'Description' in metadata_info.keys():
-                        if metadata_info['Description'] is not None and 'None' not in metadata_info['Description']:
-                            edges += [(URIRef(i), URIRef(obo + 'IAO_0000115'), Literal(metadata_info['Description']))]
-                    if 'Synonym' in metadata_info.keys():
-                        if metadata_info['Synonym'] is not None and 'None' not in metadata_info['Synonym']:
-                            for syn in metadata_info['Synonym'].split('|'):
-                                edges += [(URIRef(i), URIRef(oboinowl + 'hasSynonym'), Literal(syn))]
-                return edges
+            else: return self.creates_bulk_node_metadata(x, key, emit_once)
         else: return None
 
     def adds_ontology_annotations(self, filename: str, graph: Graph) -> Graph:
@@ -230,10 +508,39 @@ class Metadata(object):
 
         return graph
 
-    def output_metadata(self, node_integer_map: Dict, graph: Union[Set, Graph]) -> None:
-        """Loops over the self.node_dict dictionary and writes out the data to a file locally. The data is stored as
-        a tab-delimited '.txt' file with four columns: (1) node identifier; (2) node label; (3) node description or
-        definition; and (4) node synonym.
+    def _gets_entity_metadata(self, uris: List[str]) -> Dict[str, Tuple[str, str]]:
+        """Joins a batch of entity identifiers with the node and relation metadata and formats the metadata columns
+        of the NodeLabels file. Nodes take precedence over relations and identifiers without metadata are assigned
+        'NA'. When the metadata are backed by a MetadataStore, the batch is read through the store, so only the
+        current batch of metadata is held in memory.
+
+        Args:
+            uris: A list of entity identifiers (i.e. URIs without angle brackets).
+
+        Returns:
+            A dictionary keyed by entity identifier, where each value is a tuple containing the entity type and the
+            tab-delimited label, description/definition, and synonym columns.
+        """
+
+        meta: Dict = {'nodes': {}, 'relations': {}}; node_labels: Dict = dict()
+        for key in ['relations', 'nodes']:
+            key_dict = self.node_dict[key]  # type: ignore
+            if hasattr(key_dict, 'gets_batch'): meta[key] = key_dict.gets_batch(uris)
+            else: meta[key] = {x: key_dict[x] for x in uris if x in key_dict}
+        for x in uris:
+            etyp = 'NODES' if x in meta['nodes'] else 'RELATIONS' if x in meta['relations'] else 'NA'
+            if etyp == 'NA': node_labels[x] = (etyp, 'NA\tNA\tNA'); continue
+            vals = meta['nodes' if etyp == 'NODES' else 'relations'][x]
+            node_labels[x] = (etyp, '\t'.join([vals[i] if vals.get(i) is not None else 'None'
+                                               for i in ['Label', 'Description', 'Synonym']]))
+
+        return node_labels
+
+    def output_metadata(self, node_integer_map: Dict, batch: int = 10000) -> None:
+        """Streams the entities in the node_integer_map, joins them in batches with the node and relation metadata,
+        and writes out the data to a file locally. The data is stored as a tab-delimited '.txt' file with six
+        columns: (1) entity type; (2) integer identifier; (3) node identifier; (4) node label; (5) node description or
+        definition; and (6) node synonym. Rows are written in integer identifier order.
 
         NOTE. Not every node in the knowledge class will have metadata. There are some non-ontology nodes that are
         added (e.g. Ensembl transcript identifiers) that at the time of adding did not include labels, synonyms,
@@ -241,8 +548,9 @@ class Metadata(object):
         been available for download and thus would not have been added to the node_dict.
 
         Args:
-            node_integer_map: A dictionary where keys are integers and values are node and relation identifiers.
-            graph: A set of RDFLib Graph object triples or an RDFLib Graph.
+            node_integer_map: A dictionary where keys are node and relation identifiers and values are integers (i.e.
+                the output of maps_ids_to_integers).
+            batch: An integer specifying the number of entities to join with the metadata at once (default=10000).
 
         Returns:
             None.
@@ -252,27 +560,18 @@ class Metadata(object):
             log_str = 'Writing Class Metadata'; print(log_str); logger.info(log_str)
 
             # make sure that the metadata dict contains valid entries
-            self._tidy_metadata(); pickle.dump(self.node_dict, open(self.node_data[0], 'wb'))
+            if self.store is None: self._tidy_metadata(); pickle.dump(self.node_dict, open(self.node_data[0], 'wb'))
             # write metadata in flat-file
-            entities = set([i for j in tqdm(graph) for i in j]); filename = self.full_kg[:-4] + '_NodeLabels.txt'
-            with open(self.write_location + filename, 'w', encoding='utf-8') as out:
+            filename = self.full_kg[:-4] + '_NodeLabels.txt'; entities = iter(node_integer_map.items())
+            with open(self.write_location + filename, 'w', encoding='utf-8', errors='backslashreplace') as out:
                 out.write('entity_type' + '\t' + 'integer_id' + '\t' + 'entity_uri' + '\t' + 'label' + '\t' +
                           'description/definition' + '\t' + 'synonym' + '\n')
-                for x in tqdm(entities):
-                    nid, nint = n3(x), node_integer_map[n3(x)]
-                    if str(x) in self.node_dict['nodes'].keys():
-                        etyp, meta = 'NODES', self.node_dict['nodes'][str(x)]
-                    elif str(x) in self.node_dict['relations'].keys():
-                        etyp, meta = 'RELATIONS', self.node_dict['relations'][str(x)]
-                    else: meta, etyp, lab, dsc, syn = None, 'NA', 'NA', 'NA', 'NA'
-                    if meta is not None:
-                        lab = meta['Label'] if meta['Label'] is not None else 'None'
-                        dsc = meta['Description'] if meta['Description'] is not None else 'None'
-                        syn = meta['Synonym'] if meta['Synonym'] is not None else 'None'
-                    try: out.write(etyp + '\t' + str(nint) + '\t' + nid + '\t' + lab + '\t' + dsc + '\t' + syn + '\n')
-                    except UnicodeEncodeError:
-                        out.write(etyp.encode().decode() + '\t' + str(nint).encode().decode() +
-                                  '\t' + nid.encode().decode() + '\t' + lab.encode().decode() +
-                                  '\t' + dsc.encode().decode() + '\t' + syn.encode().decode() + '\n')
+                chunk = list(islice(entities, batch))
+                while len(chunk) > 0:
+                    uris = [x[1:-1] for x, _ in chunk if x.startswith('<')]; meta = self._gets_entity_metadata(uris)
+                    for nid, nint in chunk:
+                        etyp, cols = meta[nid[1:-1]] if nid.startswith('<') else ('NA', 'NA\tNA\tNA')
+                        out.write(etyp + '\t' + str(nint) + '\t' + nid + '\t' + cols + '\n')
+                    chunk = list(islice(entities, batch))
 
         return None
@@ -3,26 +3,29 @@
 
 # import needed libraries
 import glob
+import heapq
 import logging.config
 import networkx  # type: ignore
+import numpy as np  # type: ignore
 import os
 import os.path
 import pickle
-import ray  # type: ignore
 # import re
 
-from collections import ChainMap  # type: ignore
-from random import sample, shuffle
+from collections import ChainMap, Counter, deque  # type: ignore
 from rdflib import BNode, Graph, Literal, Namespace, URIRef  # type: ignore
 from rdflib.namespace import RDF, RDFS, OWL  # type: ignore
-from statistics import mode, StatisticsError
 from tqdm import tqdm  # type: ignore
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from pkt_kg.utils import *
+from pkt_kg.worker_pool import WorkerPool
 
 # add global variables
 obo = Namespace('http://purl.obolibrary.org/obo/')
+# term classification flags (see OwlNets.classifies_terms and OwlNets.classifies_graph_terms)
+EXCLUDED, SUPPORT, OWL_NS, XSD_NS, OBSOLETE, SUBCLASS, TYPE = 1, 2, 4, 8, 16, 32, 64
+CLASS, PROPERTY, OBJECT_PROPERTY = 128, 256, 512
 
 # logging
 log_dir, log, log_config = 'builds/logs', 'pkt_build_log.log', glob.glob('**/logging.ini', recursive=True)
@@ -40,6 +43,140 @@ logging.config.fileConfig(log_config[0], disable_existing_loggers=False, default
 #  (2) Method is currently built to handle class axioms; small modifications needed to handle propertyChainAxioms
 
 
+class EncodedGraph(object):
+    """Class provides a read-only, integer-encoded copy of an RDFLib Graph that can be shared by ray workers. Triples
+    are stored as a numpy array of term identifiers, grouped by subject (keeping the input graph's triple order within
+    each subject) and indexed by an array of subject offsets. Terms are stored as a single utf-8 encoded byte buffer
+    with an array of offsets and a sorted permutation used to look up term identifiers. Since all data is stored in
+    numpy arrays, placing an instance in the ray object store (i.e. ray.put) lets every worker read the same memory
+    without copying it. Terms are decoded lazily and cached per worker.
+
+    The class implements the subset of the RDFLib Graph API used to decode OWL-encoded classes and axioms (i.e.
+    triples, objects, subjects, predicates, __iter__, __len__, and __contains__).
+
+    Attributes:
+        spo: A numpy array of shape (n, 3) containing the subject, predicate, and object identifiers of each triple.
+        s_offsets: A numpy array where the triples of subject i are stored in spo[s_offsets[i]:s_offsets[i + 1]].
+        p_index: A numpy array of the rows of spo stably sorted by predicate (i.e. in spo order within a predicate).
+        p_offsets: A numpy array where the rows of the triples of predicate i are stored in
+            p_index[p_offsets[i]:p_offsets[i + 1]].
+        o_index: A numpy array of the rows of spo stably sorted by object (i.e. in spo order within an object).
+        o_offsets: A numpy array where the rows of the triples of object i are stored in
+            o_index[o_offsets[i]:o_offsets[i + 1]].
+        term_buffer: A numpy array of bytes containing the encoded terms.
+        term_offsets: A numpy array where term i is stored in term_buffer[term_offsets[i]:term_offsets[i + 1]].
+        term_order: A numpy array of term identifiers sorted by encoded term.
+    """
+
+    def __init__(self, graph: Union[Graph, Set, List]) -> None:
+
+        term_ids: Dict = dict(); triples: List = []
+        if isinstance(graph, Graph):  # match the order RDFLib returns the triples of a subject in
+            graph = [t for x in dict.fromkeys(graph.subjects()) for t in graph.triples((x, None, None))]
+        for t in graph: triples.append([term_ids.setdefault(x, len(term_ids)) for x in t])
+        encoded = [self._encodes(x) for x in term_ids.keys()]
+        self.term_offsets: np.ndarray = np.cumsum([0] + [len(x) for x in encoded], dtype=np.int64)
+        self.term_buffer: np.ndarray = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        self.term_order: np.ndarray = np.array(sorted(range(len(encoded)), key=lambda x: encoded[x]), dtype=np.int64)
+        spo = np.array(triples, dtype=np.int64).reshape(-1, 3)
+        self.spo: np.ndarray = spo[np.argsort(spo[:, 0], kind='stable')]
+        self.s_offsets: np.ndarray = np.searchsorted(self.spo[:, 0], np.arange(len(encoded) + 1)).astype(np.int64)
+        self.p_index: np.ndarray = np.argsort(self.spo[:, 1], kind='stable').astype(np.int64)
+        self.p_offsets: np.ndarray = np.searchsorted(self.spo[self.p_index, 1],
+                                                     np.arange(len(encoded) + 1)).astype(np.int64)
+        self.o_index: np.ndarray = np.argsort(self.spo[:, 2], kind='stable').astype(np.int64)
+        self.o_offsets: np.ndarray = np.searchsorted(self.spo[self.o_index, 2],
+                                                     np.arange(len(encoded) + 1)).astype(np.int64)
+        self._terms: Dict = dict(); self._ids: Dict = dict()
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy(); state['_terms'] = dict(); state['_ids'] = dict()
+
+        return state
+
+    @staticmethod
+    def _encodes(term: Union[BNode, Literal, URIRef]) -> bytes:
+        """Encodes an RDFLib term as bytes (i.e. a type character followed by null-separated fields)."""
+
+        if isinstance(term, Literal):
+            enc = 'L' + str(term) + '\x00' + (term.language or '') + '\x00' + str(term.datatype or '')
+        else: enc = ('B' if isinstance(term, BNode) else 'U') + str(term)
+
+        return enc.encode('utf-8')
+
+    @staticmethod
+    def _decodes(enc: bytes) -> Union[BNode, Literal, URIRef]:
+        """Decodes bytes created by _encodes into an RDFLib term."""
+
+        value = enc.decode('utf-8'); kind, value = value[0], value[1:]
+        if kind == 'U': return URIRef(value)
+        elif kind == 'B': return BNode(value)
+        else:
+            lex, lang, datatype = value.split('\x00')
+            return Literal(lex, lang=lang or None, datatype=URIRef(datatype) if datatype else None)
+
+    def _gets_encoded(self, i: int) -> bytes:
+        return self.term_buffer[self.term_offsets[i]:self.term_offsets[i + 1]].tobytes()
+
+    def _gets_term(self, i: int) -> Union[BNode, Literal, URIRef]:
+        """Returns the RDFLib term for a term identifier."""
+
+        if i not in self._terms: self._terms[i] = self._decodes(self._gets_encoded(i))
+
+        return self._terms[i]
+
+    def _gets_id(self, term: Union[BNode, Literal, URIRef]) -> Optional[int]:
+        """Returns the identifier of an RDFLib term (or None if the term is not in the graph) by binary searching the
+        sorted term encodings."""
+
+        if term not in self._ids:
+            enc, lo, hi, match = self._encodes(term), 0, len(self.term_order), None
+            while lo < hi:
+                mid = (lo + hi) // 2; mid_enc = self._gets_encoded(int(self.term_order[mid]))
+                if mid_enc < enc: lo = mid + 1
+                elif mid_enc > enc: hi = mid
+                else: match = int(self.term_order[mid]); break
+            self._ids[term] = match
+
+        return self._ids[term]
+
+    def triples(self, triple: Tuple) -> Any:
+        """Yields the triples matching a triple pattern, where None matches any term. The triples are looked up
+        through the subject index or, when no subject is given, the smaller of the predicate and object index ranges,
+        so they are always returned in spo order."""
+
+        ids: List[Any] = [None if x is None else self._gets_id(x) for x in triple]
+        if any(x is not None and i is None for x, i in zip(triple, ids)): return
+        if ids[0] is not None: rows = self.spo[self.s_offsets[ids[0]]:self.s_offsets[ids[0] + 1]]
+        elif ids[1] is not None or ids[2] is not None:
+            indexes = [x for x in [(self.p_index, self.p_offsets, ids[1]), (self.o_index, self.o_offsets, ids[2])]
+                       if x[2] is not None]
+            index, offsets, i = min(indexes, key=lambda x: x[1][x[2] + 1] - x[1][x[2]])
+            rows = self.spo[index[offsets[i]:offsets[i + 1]]]
+        else: rows = self.spo
+        if ids[1] is not None: rows = rows[rows[:, 1] == ids[1]]
+        if ids[2] is not None: rows = rows[rows[:, 2] == ids[2]]
+        for s, p, o in rows.tolist(): yield self._gets_term(s), self._gets_term(p), self._gets_term(o)
+
+    def subjects(self, predicate: Any = None, object: Any = None) -> Any:
+        for s, _, _ in self.triples((None, predicate, object)): yield s
+
+    def predicates(self, subject: Any = None, object: Any = None) -> Any:
+        for _, p, _ in self.triples((subject, None, object)): yield p
+
+    def objects(self, subject: Any = None, predicate: Any = None) -> Any:
+        for _, _, o in self.triples((subject, predicate, None)): yield o
+
+    def __iter__(self) -> Any:
+        return self.triples((None, None, None))
+
+    def __len__(self) -> int:
+        return len(self.spo)
+
+    def __contains__(self, triple: Tuple) -> bool:
+        return any(True for _ in self.triples(triple))
+
+
 class OwlNets(object):
     """Class removes OWL semantics from an ontology or knowledge graph using the OWL-NETS method. OWL-encoded or
     semantic edges are needed in a graph in order to enable a rich semantic representation. Many of the nodes in
@@ -61,7 +198,7 @@ class OwlNets(object):
     Notebook Ex: https://github.com/callahantiff/PheKnowLator/blob/master/notebooks/OWLNETS_Example_Application.ipynb
 
     Attributes:
-        graph: An RDFLib object or a list of RDFLib Graph objects.
+        graph: An RDFLib object, an EncodedGraph, or a list of RDFLib Graph objects.
         write_location: A file path used for writing knowledge graph data (e.g. "resources/".
         filename: A string containing the filename for the full knowledge graph (e.g. "/hpo_owlnets").
         kg_construct_approach: A string containing the type of construction approach used to build the knowledge graph.
@@ -80,7 +217,7 @@ class OwlNets(object):
         TypeError: If the file containing owl object properties is empty.
     """
 
-    def __init__(self, graph: Union[Graph, List, str], write_location: str, filename: str,
+    def __init__(self, graph: Union[Graph, EncodedGraph, List, str], write_location: str, filename: str,
                  kg_construct_approach: Optional[str] = None, owl_tools: str = './pkt_kg/libs/owltools',
                  top_level: Optional[List] = None, support: Optional[List] = None,
                  relations: Optional[List] = None) -> None:
@@ -95,17 +232,23 @@ class OwlNets(object):
         self.relations: List = ['RO'] if relations is None else relations  # can only appear as relations
 
         # VERIFY INPUT GRAPH
-        if not isinstance(graph, Graph) and not isinstance(graph, List) and not isinstance(graph, str):
+        if not isinstance(graph, (Graph, EncodedGraph)) and not isinstance(graph, List) and not isinstance(graph, str):
             logs = 'Graph must be RDFLib Graph or set.'; logger.error('TypeError: ' + logs); raise TypeError(logs)
-        elif (isinstance(graph, Graph) or isinstance(graph, List)) and len(graph) == 0:
+        elif (isinstance(graph, (Graph, EncodedGraph)) or isinstance(graph, List)) and len(graph) == 0:
             log_str = 'Graph Object is empty.'; logger.error('ValueError: ' + log_str); raise ValueError(log_str)
         elif isinstance(graph, str) and not os.path.exists(graph):
             logs = "Can't find graph file"; logger.error("OSError: " + logs); raise OSError(logs)
         else:
-            graph = graph if isinstance(graph, Graph) or isinstance(graph, List) else Graph().parse(graph)
+            graph = graph if not isinstance(graph, str) else Graph().parse(graph)
             self.graph_list: List = [graph] if not isinstance(graph, List) else graph
         self.graph: Graph = self.graph_list[0]
 
+        # TERM CLASSIFICATION TABLE
+        self.term_table: Dict = dict()
+
+        # BNODE STRUCTURE MEMO (see gets_bnode_closure)
+        self.bnode_memo: Dict = dict(); self.memo_graph: Any = None
+
         # OWL-NETS CLEANING DICTIONARY
         self.owl_nets_dict: Dict = {'decoded_entities': {}, 'cardinality': {}, 'misc': {}, 'complementOf': {},
                                     'negation': {}, 'disjointWith': set(), 'filtered_triples': set()}
@@ -138,6 +281,61 @@ class OwlNets(object):
 
         return None
 
+    def classifies_terms(self, terms: Iterable) -> Dict:
+        """Adds the string-derived classification flags for each input term that has not already been classified to
+        the term table (self.term_table). The flags are computed once per unique term and do not depend on the graph
+        the term came from, so the table is shared by all of the graphs processed by the class. Flags include:
+            - EXCLUDED: the local name starts with a top-level, relation, or support ontology prefix (e.g. 'BFO_').
+            - SUPPORT: the local name starts with a support ontology prefix (e.g. 'IAO_').
+            - OWL_NS, XSD_NS, OBSOLETE: the term contains the OWL namespace, 'XMLSchema', or 'ObsoleteClass'.
+            - SUBCLASS, TYPE: the term contains rdfs:subClassOf or rdf:type.
+
+        Args:
+            terms: An iterable of RDFLib URIRef objects.
+
+        Returns:
+            term_table: A dictionary keyed by RDFLib URIRef object, where values are integer bit flags.
+        """
+
+        exclude = tuple(i + '_' for i in self.top_level + self.relations + self.support)
+        support = tuple(i + '_' for i in self.support); owl_ns = str(OWL)
+        for x in terms:
+            if x in self.term_table: continue
+            term, local = str(x), str(x).split('/')[-1]
+            self.term_table[x] = ((EXCLUDED if local.startswith(exclude) else 0) |
+                                  (SUPPORT if local.startswith(support) else 0) |
+                                  (OWL_NS if owl_ns in term else 0) | (XSD_NS if 'XMLSchema' in term else 0) |
+                                  (OBSOLETE if 'ObsoleteClass' in term else 0) |
+                                  (SUBCLASS if str(RDFS.subClassOf) in term else 0) |
+                                  (TYPE if str(RDF.type) in term else 0))
+
+        return self.term_table
+
+    @staticmethod
+    def classifies_graph_terms(graph: Graph) -> Dict:
+        """Scans the rdf:type triples of a graph once and returns the graph-dependent classification flags for each
+        typed URIRef. Flags include:
+            - CLASS: the term is an owl:Class or owl:NamedIndividual and does not contain '#'.
+            - PROPERTY: the term has at least one type that is not owl:AnnotationProperty or owl:DatatypeProperty.
+            - OBJECT_PROPERTY: the term is an owl:ObjectProperty.
+
+        Args:
+            graph: An RDFLib Graph object.
+
+        Returns:
+            type_table: A dictionary keyed by RDFLib URIRef object, where values are integer bit flags.
+        """
+
+        type_table: Dict = dict()
+        for s, o in graph.subject_objects(RDF.type):
+            if not isinstance(s, URIRef): continue
+            flags = CLASS if (OWL.Class in o or OWL.NamedIndividual in o) and '#' not in str(s) else 0
+            if o != OWL.AnnotationProperty and o != OWL.DatatypeProperty: flags |= PROPERTY
+            if o == OWL.ObjectProperty: flags |= OBJECT_PROPERTY
+            type_table[s] = type_table.get(s, 0) | flags
+
+        return type_table
+
     def removes_edges_with_owl_semantics(self, verbose: bool = True) -> Graph:
         """Creates a filtered knowledge graph, such that only nodes that are owl:Class/owl:Individual connected via a
         owl:ObjectProperty and not an owl:AnnotationProperty. For example:
@@ -147,6 +345,9 @@ class OwlNets(object):
             KEEP - biologically meaningful edges:
                 subject: obo:CHEBI_16130; predicate: obo:RO_0002606; object: obo:HP_0000832
 
+        Each term is classified once (see classifies_terms and classifies_graph_terms) and the triples are then
+        filtered using lookups into the resulting term tables.
+
         Args:
             verbose: A bool indicating whether or not to print/log method use.
 
@@ -156,31 +357,24 @@ class OwlNets(object):
 
         if verbose: log_str = 'Filtering Triples'; logger.info(log_str); print(log_str)
 
-        keep, filtered = set(), set(); exclude = self.top_level + self.relations + self.support
+        keep, filtered = set(), set(); type_table = self.classifies_graph_terms(self.graph)
+        term_table = self.classifies_terms(x for y in self.graph for x in y if isinstance(x, URIRef))
+        flags = {k: v | type_table.get(k, 0) for k, v in term_table.items()}
         pbar = tqdm(total=len(self.graph)) if verbose else None
         for x in self.graph:
             if verbose: pbar.update()
             if isinstance(x[0], URIRef) and isinstance(x[1], URIRef) and isinstance(x[2], URIRef):
                 # handle top-level, relation, and support ontologies (top/rel can only be rel; remove support onts)
-                subj = not any(i for i in exclude if str(x[0]).split('/')[-1].startswith(i + '_'))
-                obj = not any(i for i in exclude if str(x[2]).split('/')[-1].startswith(i + '_'))
-                rel = not any(i for i in self.support if str(x[1]).split('/')[-1].startswith(i + '_'))
-                if subj and obj and rel:
-                    s = [i for i in list(self.graph.triples((x[0], RDF.type, None)))
-                         if (OWL.Class in i[2] or OWL.NamedIndividual in i[2]) and '#' not in str(x[0])]
-                    o = [i for i in list(self.graph.triples((x[2], RDF.type, None)))
-                         if (OWL.Class in i[2] or OWL.NamedIndividual in i[2]) and '#' not in str(x[2])]
-                    p = [i for i in list(self.graph.triples((x[1], RDF.type, None)))
-                         if i[2] != OWL.AnnotationProperty and i[2] != OWL.DatatypeProperty]
-                    if len(s) > 0 and len(o) > 0 and len(p) > 0:
-                        if OWL.ObjectProperty in [x[2] for x in p]: keep.add(x)
+                fs, fp, fo = flags[x[0]], flags[x[1]], flags[x[2]]
+                if not fs & EXCLUDED and not fo & EXCLUDED and not fp & SUPPORT:
+                    s, o, p = fs & CLASS, fo & CLASS, fp & PROPERTY
+                    if s and o and p:
+                        if fp & OBJECT_PROPERTY: keep.add(x)
                         else: filtered |= {x}
-                    elif len(s) > 0 and len(o) > 0 and len(p) == 0:
-                        if RDFS.subClassOf in x[1]: keep.add(x)
-                        elif RDF.type in x[1]: keep.add(x)
+                    elif s and o and not p:
+                        if fp & SUBCLASS or fp & TYPE: keep.add(x)
                         else: filtered |= {x}
-                    elif x[1] == RDFS.subClassOf and (str(OWL) not in str(x[2]) and 'ObsoleteClass' not in str(x[2])):
-                        keep.add(x)
+                    elif x[1] == RDFS.subClassOf and not fo & OWL_NS and not fo & OBSOLETE: keep.add(x)
                     else: filtered |= {x}
                 else: filtered |= {x}
             else: filtered |= {x}
@@ -194,7 +388,8 @@ class OwlNets(object):
     def cleans_decoded_graph(self, verbose: bool = True) -> Graph:
         """Creates a filtered knowledge graph, such that only nodes that are owl:Class/owl:Individual connected via a
         owl:ObjectProperty and not an owl:AnnotationProperty. This method is a reduced version of the
-        removes_edges_with_owl_semantics method, which is meant to be applied to a graph after it's been decoded.
+        removes_edges_with_owl_semantics method, which is meant to be applied to a graph after it's been decoded. It
+        uses the same term table (see classifies_terms).
 
         Args:
             verbose: A bool indicating whether or not to print/log progress.
@@ -205,17 +400,15 @@ class OwlNets(object):
 
         if verbose: log_str = 'Filtering Triples'; logger.info(log_str); print(log_str)
 
-        keep_predicates, filtered_triples = set(), set(); exclude = self.top_level + self.relations + self.support
+        keep_predicates, filtered_triples = set(), set()
+        flags = self.classifies_terms(x for y in self.graph for x in y if isinstance(x, URIRef))
         for x in self.graph:
             if isinstance(x[0], URIRef) and isinstance(x[1], URIRef) and isinstance(x[2], URIRef):
                 # handle top-level, relation, and support ontologies (top/rel can only be rel; remove support onts)
-                subj = not any(i for i in exclude if str(x[0]).split('/')[-1].startswith(i + '_'))
-                obj = not any(i for i in exclude if str(x[2]).split('/')[-1].startswith(i + '_'))
-                rel = not any(i for i in self.support if str(x[1]).split('/')[-1].startswith(i + '_'))
-                if subj and obj and rel:
-                    if str(OWL) not in str(x[0]) and str(OWL) not in str(x[2]):
-                        if ('XMLSchema' not in str(x[0])) and ('XMLSchema' not in str(x[2])):
-                            keep_predicates.add(x)
+                fs, fp, fo = flags[x[0]], flags[x[1]], flags[x[2]]
+                if not fs & EXCLUDED and not fo & EXCLUDED and not fp & SUPPORT:
+                    if not fs & OWL_NS and not fo & OWL_NS:
+                        if not fs & XSD_NS and not fo & XSD_NS: keep_predicates.add(x)
                     else: filtered_triples |= {x}
                 else: filtered_triples |= {x}
             else: filtered_triples |= {x}
@@ -240,13 +433,40 @@ class OwlNets(object):
             seen_nodes: A list of knowledge graph BNodes.
         """
 
-        search_axioms: List = []; tracked: List = []
-        for axiom in axioms:
-            for element in axiom:
-                if isinstance(element, BNode) and element not in visited:
-                    tracked.append(element); search_axioms += list(self.graph.triples((element, None, None)))
-        if len(tracked) > 0: visited += list(set(tracked)); return self.recurses_axioms(visited, search_axioms)
-        else: return visited
+        seen = set(visited); search_axioms = axioms
+        while True:
+            tracked = set(x for axiom in search_axioms for x in axiom if isinstance(x, BNode) and x not in seen)
+            if len(tracked) == 0: return visited
+            visited += list(tracked); seen |= tracked
+            search_axioms = [x for y in tracked for x in self.graph.triples((y, None, None))]
+
+    def gets_bnode_closure(self, node: BNode) -> Set:
+        """Method returns the out edges of a BNode and of every BNode reachable from it. The traversal is iterative and
+        each result is memoized, so an anonymous structure that is shared by several entities (e.g. the
+        owl:equivalentClass BNode of a class which is also the owl:annotatedTarget of an owl:Axiom) is only walked
+        once per worker. Memoized structures reached while walking a new BNode are re-used rather than re-traversed.
+        The memo is reset whenever the graph changes.
+
+        Args:
+            node: An RDFLib BNode object.
+
+        Returns:
+            matches: A set of tuples, where each tuple contains a triple that is comprised of three RDFLib objects of
+                type URIRef, BNode, and/or Literal.
+        """
+
+        if self.memo_graph is not self.graph: self.bnode_memo = dict(); self.memo_graph = self.graph
+        if node in self.bnode_memo: return set(self.bnode_memo[node])
+        matches: Set = set(); seen = {node}; queue = deque([node])
+        while queue:
+            x = queue.popleft()
+            if x in self.bnode_memo: matches |= self.bnode_memo[x]; continue
+            for triple in self.graph.triples((x, None, None)):
+                matches.add(triple)
+                if isinstance(triple[2], BNode) and triple[2] not in seen: seen.add(triple[2]); queue.append(triple[2])
+        self.bnode_memo[node] = frozenset(matches)
+
+        return matches
 
     def finds_uri(self, n1: Union[BNode, URIRef], n2: Optional[URIRef], node_list: Optional[list] = None) -> URIRef:
         """Method searches for the RDFLib URIRef object that represents a BNode that is either an OWL.annotatedSource or
@@ -261,11 +481,14 @@ class OwlNets(object):
             node: A RDFLib URIRef object.
         """
 
-        n = list(self.graph.objects(n1)) if node_list is None else node_list
-        n = [x for x in n if x != n2 and (isinstance(x, BNode) or OWL.Class in set(self.graph.objects(x, RDF.type)))]
-        n1 = n.pop(0)
-        if n1 != n2 and OWL.Class in list(self.graph.objects(n1, RDF.type)): return n1
-        else: n += [x for x in set(self.graph.objects(n1)) if x not in n]; return self.finds_uri(n1, n2, n)
+        n: deque = deque(); seen: Set = set()
+        nodes: Iterable = self.graph.objects(n1) if node_list is None else node_list
+        while True:  # breadth-first, raises IndexError if no class is reachable
+            for x in (x for x in nodes if x not in seen and x != n2):
+                if isinstance(x, BNode) or OWL.Class in set(self.graph.objects(x, RDF.type)): seen.add(x); n.append(x)
+            n1 = n.popleft()
+            if OWL.Class in set(self.graph.objects(n1, RDF.type)): return n1
+            nodes = set(self.graph.objects(n1))
 
     def reconciles_axioms(self, src: Union[BNode, URIRef], tgt: Union[BNode, URIRef]) -> Tuple:
         """Method takes two RDFLib objects (both are either a URIRef or a BNode) and performs two steps: (1) if
@@ -288,11 +511,7 @@ class OwlNets(object):
             org_src, src = src, src if isinstance(src, URIRef) else self.finds_uri(src, tgt)
             org_tgt, tgt = tgt, tgt if isinstance(tgt, URIRef) else self.finds_uri(tgt, src)
             bnodes = [org_src] if isinstance(org_src, BNode) and not isinstance(org_tgt, BNode) else [org_tgt]
-        master, matches = set(), set()
-        while len(bnodes) > 0:
-            x = bnodes.pop(0); master |= {x}; matches |= set(self.graph.triples((x, None, None)))
-            node_list = set([x for y in [i[0::2] for i in matches] for x in y])
-            bnodes += [x for x in node_list if isinstance(x, BNode) and x not in master]
+        matches = set(x for y in bnodes for x in self.gets_bnode_closure(y))
 
         return src, matches
 
@@ -307,15 +526,8 @@ class OwlNets(object):
                 type URIRef, BNode, and/or Literal.
         """
 
-        matches: Set = set()
         out_edges = set(x for y in self.graph.triples((node, None, None)) for x in y if isinstance(x, BNode))
-        node_list = list(out_edges)
-        while len(node_list) != 0:
-            entity = node_list.pop(0)
-            for element in self.recurses_axioms([], list(self.graph.triples((entity, None, None)))):
-                matches |= set(self.graph.triples((element, None, None)))
-            hits = set(x for y in matches for x in y if isinstance(x, BNode) if x not in out_edges)
-            node_list = list(set(node_list) | hits); out_edges |= set(node_list)
+        matches: Set = set(x for y in out_edges for x in self.gets_bnode_closure(y))
 
         return matches
 
@@ -641,7 +853,7 @@ class OwlNets(object):
                                 edges = None; self.owl_nets_dict['misc'][n3(node)] = {tuple(misc)}
                     decoded_graph = adds_edges_to_graph(decoded_graph, list(cleaned_classes), False)
                     self.owl_nets_dict['decoded_entities'][n3(node)] = cleaned_classes
-        self.graph = decoded_graph; self.graph = self.cleans_decoded_graph(verbose)  # ; pbar.close()
+        self.graph = decoded_graph; self.graph = self.cleans_decoded_graph(verbose); self.bnode_memo = dict()
 
         return None
 
@@ -649,7 +861,11 @@ class OwlNets(object):
         """In order to prevent the filtered graph from becoming unnecessarily disconnected, all OWL-NETS nodes are
         checked to ensure that at least one of their ancestor concepts is a subclass of common_ancestor. While this is
         not the best solution long-term is the cleanest way to ensure the graph remains connected and to introduce the
-        least amount of extra edges (i.e. avoids having to make every node rdfs:subClassOf BFO_0000001).
+        least amount of extra edges (i.e. avoids having to make every node rdfs:subClassOf BFO_0000001). Roots are
+        found for all nodes in a single pass over the rdfs:subClassOf hierarchy, where each node takes the root of its
+        highest parent and the classes in a subClassOf cycle are treated as a single node. Nodes without ancestors take
+        the root shared by most of their neighbors. All ties are broken by the root's uri, so the result does not depend
+        on the order of the graph's triples.
 
         Args:
             graph: An RDFLib Graph object.
@@ -669,20 +885,27 @@ class OwlNets(object):
             nodes = set([x for x in tqdm(list(graph.subjects()) + list(graph.objects())) if isinstance(x, URIRef)])
 
             print('Identifying root nodes')
+            # condense subClassOf cycles and propagate the highest root from parents to children in topological order
+            hierarchy = networkx.DiGraph()
+            hierarchy.add_edges_from((o, s) for s, o in graph.subject_objects(RDFS.subClassOf))
+            dag = networkx.condensation(hierarchy); best: Dict = dict()
+            for c in networkx.topological_sort(dag):
+                if c not in best: root = min(dag.nodes[c]['members'], key=str); best[c] = (0, str(root), root)
+                h, uri, root = best[c]
+                for i in dag.successors(c): best[i] = min(best.get(i, (h - 1, uri, root)), (h - 1, uri, root))
+            tops = {x: best[c][2] for x, c in dag.graph['mapping'].items()}
+            # count the roots of the neighbors of nodes without ancestors
+            votes: Dict = dict()
+            for s, o in graph.subject_objects():
+                if s not in tops and o in tops: votes.setdefault(s, Counter())[tops[o]] += 1
             for x in tqdm(nodes):
-                ancs = gets_entity_ancestors(graph, [x], RDFS.subClassOf)
-                if len(ancs) == 0:
-                    nbhd = set(graph.objects(x))
-                    ancs = [x for y in [gets_entity_ancestors(graph, [i], RDFS.subClassOf) for i in nbhd] for x in y]
-                    if len(ancs) == 0: ancs = [x]
-                    else:
-                        try: ancs = [mode(ancs)]
-                        except StatisticsError: ancs = sample(ancs, 1) if not any(x for x in ancs if x in roots) else []
-                roots |= {ancs[0]} if len(ancs) > 0 else {x}
+                if x in tops: roots |= {tops[x]}
+                elif x in votes: roots |= {min(votes[x], key=lambda i: (-votes[x][i], str(i)))}
+                else: roots |= {x}
 
             log_str = 'Updating graph connectivity'; print(log_str); logger.info(log_str)
             rel = RDF.type if self.kg_construct_approach == 'instance' else RDFS.subClassOf
-            needed_triples = set((URIRef(x), rel, anc_node) for x in roots if x != anc_node)
+            needed_triples = set((x, rel, anc_node) for x in roots if x != anc_node)
             graph = adds_edges_to_graph(graph, needed_triples, False)
 
             logs = '{} triples added to make connected'.format(len(needed_triples)); logger.info(logs); print(logs)
@@ -695,6 +918,8 @@ class OwlNets(object):
         and the subjects of these triples are made RDFS.subClassOf all ancestors of the objects. If kg_construction is
         instance, all triples where the subject and object are connected by RDFS.subClassOf are updated to RDF.type and
         the subjects of these triples are made RDF.type all ancestors of the objects. Examples are provided below.
+        Triples are grouped by object and the ancestors of each object are found once, using an rdfs:subClassOf index
+        built from the input graph (including the typed subjects when kg_construction is subclass).
 
         Returns:
              graph: An RDFLib object that has been purified to the kg_construction approach.
@@ -706,14 +931,27 @@ class OwlNets(object):
         pure_rel = RDFS.subClassOf if org_rel == RDF.type else RDF.type
 
         log_str = 'Determining what triples need purification'; print(log_str); logger.info(log_str)
-        triples = list(graph.triples((None, org_rel, None)))
+        triples = list(graph.triples((None, org_rel, None))); groups: Dict = dict(); parents: Dict = dict()
+        for s, o in graph.subject_objects(RDFS.subClassOf): parents.setdefault(s, []).append(o)
+        for s, p, o in triples:
+            groups.setdefault(o, []).append(s)
+            if org_rel == RDF.type: parents.setdefault(s, []).append(o)  # typed subjects become subclasses
 
         log_str = 'Processing {} {} triples'.format(len(triples), org_rel); print(log_str); logger.info(log_str)
-        for edge in tqdm(triples):
-            graph.add((edge[0], pure_rel, edge[2])); graph.remove(edge)
-            o_ancs = gets_entity_ancestors(graph, [edge[2]], RDFS.subClassOf, [edge[2]])
-            ancs_filter = tuple([x for x in o_ancs if x.startswith('http') and URIRef(x) != edge[2]])
-            for node in ancs_filter: graph.add((edge[0], pure_rel, URIRef(node)))
+        closure: Dict = dict()  # ancestor closure of each object, re-used by objects sharing ancestors
+        for obj in tqdm(groups.keys()):
+            ancs, seen, queue = set(), {obj}, deque(parents.get(obj, []))
+            while queue:
+                x = queue.popleft()
+                if x in seen: continue
+                seen.add(x); ancs.add(x)
+                if x in closure: ancs |= closure[x]; seen |= closure[x]
+                else: queue.extend(parents.get(x, []))
+            closure[obj] = ancs
+        pure = set((s, pure_rel, x) for o, subs in groups.items()
+                   for x in {o} | set(y for y in closure[o] if str(y).startswith('http') and y != o) for s in subs)
+        for edge in triples: graph.remove(edge)
+        graph = adds_edges_to_graph(graph, list(pure), False)
 
         return graph
 
@@ -752,11 +990,59 @@ class OwlNets(object):
 
         return None
 
-    def runs_owlnets(self, cpus: int = 1) -> Tuple:
-        """Method facilitates the parallel processing of OWL-NETS over a list of n RDFLib Graph objects.
+    def gets_entity_subgraph(self, node: Union[BNode, URIRef]) -> List:
+        """Collects the triples needed to decode a single owl:Class or owl:Axiom, which are the out edges of the node,
+        the out edges of every BNode reachable from it (e.g. restrictions, RDF lists, and axiom sources/targets), and
+        the rdf:type edges of all URIRefs referenced by those triples (used by finds_uri to identify classes). Triples
+        are returned in the order they are stored in the graph.
+
+        Args:
+            node: An RDFLib BNode or URIRef object representing an owl:Class or owl:Axiom.
+
+        Returns:
+            triples: A list of tuples, where each tuple contains a triple.
+        """
+
+        triples: List = []; seen = {node}; queue = [node]
+        while queue:
+            for triple in self.graph.triples((queue.pop(0), None, None)):
+                triples.append(triple)
+                if isinstance(triple[2], BNode) and triple[2] not in seen: seen.add(triple[2]); queue.append(triple[2])
+        uris = set(x[2] for x in triples if isinstance(x[2], URIRef) and x[2] not in seen)
+        triples += [x for y in uris for x in self.graph.triples((y, RDF.type, None))]
+
+        return triples
+
+    def partitions_entities(self, node_list: List, cpus: int = 1) -> List[List]:
+        """Assigns each owl:Class and owl:Axiom to at most cpus partitions, largest first, always to the partition with
+        the fewest triples to decode, where an entity is sized by the anonymous subgraph it needs for decoding (see
+        gets_entity_subgraph). Only the sizes of the subgraphs are kept, the workers decode their partition against
+        the ontology's graph, which is shared by all of them.
+
+        Args:
+            node_list: A list of owl:Class and owl:Axiom entities to decode.
+            cpus: An integer representing the number of partitions to create (default=1).
+
+        Returns:
+            partitions: A list of lists, where each list contains the entities of a partition. Empty partitions are not
+                returned.
+        """
+
+        sizes = {x: len(self.gets_entity_subgraph(x)) for x in node_list}
+        parts: List = [[] for _ in range(cpus)]; heap = [(0, i) for i in range(cpus)]
+        for node in sorted(sizes, key=lambda x: (-sizes[x], str(x))):
+            load, i = heapq.heappop(heap); parts[i].append(node); heapq.heappush(heap, (load + sizes[node], i))
+
+        return [x for x in parts if len(x) > 0]
+
+    def runs_owlnets(self, cpus: int = 1, pool: Optional[WorkerPool] = None) -> Tuple:
+        """Method facilitates the parallel processing of OWL-NETS over a list of n RDFLib Graph objects. The same
+        workers are re-used for every graph in the list.
 
         Args:
             cpus: An integer representing the number of workers (default=1).
+            pool: An optional WorkerPool to decode the graphs on, in which case cpus is ignored (default=a pool with
+                cpus workers that is shut down once all graphs are decoded).
 
         Return:
             graph 1: A set of rdflib.Graph object triples.
@@ -765,7 +1051,7 @@ class OwlNets(object):
 
         log_str = '*** Running OWL-NETS ***'; print('\n' + log_str); logger.info(log_str)
 
-        full_graph = Graph(); res2 = []
+        full_graph = Graph(); res2 = []; workers = WorkerPool(cpus) if pool is None else pool
         loc, f, cons, ot = self.write_location, self.filename, self.kg_construct_approach, self.owl_tools
         for g in tqdm(self.graph_list):
             self.graph = g; self.removes_disjoint_with_axioms()
@@ -777,17 +1063,17 @@ class OwlNets(object):
                 if OWL.Class in src and OWL.Class in tgt: owl_axioms += [x]
                 elif (OWL.Class in src and len(tgt) == 0) or (OWL.Class in tgt and len(src) == 0): owl_axioms += [x]
                 else: pass
-            ents_to_decode = list(set(owl_classes) | set(owl_axioms)); shuffle(ents_to_decode)
+            ents_to_decode = list(set(owl_classes) | set(owl_axioms))
             if len(ents_to_decode) > 0:
-                entities = [ents_to_decode[i::cpus] for i in range(cpus)]
-                try: ray.init()
-                except RuntimeError: pass
-                acts = [ray.remote(OwlNets).remote(self.graph, loc, f, cons, ot) for _ in range(cpus)]  # type: ignore
-                for i in range(0, cpus): acts[i % cpus].cleans_owl_encoded_entities.remote(entities[i])  # type: ignore
-                _ = ray.wait([x.gets_owlnets_graph.remote() for x in acts], num_returns=len(acts))
-                graph_res = ray.get([x.gets_owlnets_graph.remote() for x in acts])  # type: ignore
-                full_graph = adds_edges_to_graph(full_graph, set(x for y in set(graph_res) for x in y), False)
-                res2 += ray.get([x.gets_owlnets_dict.remote() for x in acts]); del acts  # type: ignore
+                parts = self.partitions_entities(ents_to_decode, workers.cpus); acts = list(range(len(parts)))
+                workers.shares('owlnets_graph', EncodedGraph(self.graph))  # one copy of the graph read by all workers
+                workers.creates('owlnets', OwlNets, WorkerPool.Shared('owlnets_graph'), loc, f, cons, ot, workers=acts)
+                for i in acts: workers.calls(i, 'owlnets', 'cleans_owl_encoded_entities', parts[i])
+                graph_res = workers.gathers('owlnets', 'gets_owlnets_graph', acts)
+                full_graph = adds_edges_to_graph(full_graph, set(x for y in graph_res for x in y), False)
+                res2 += workers.gathers('owlnets', 'gets_owlnets_dict', acts)
+                workers.releases('owlnets'); workers.releases('owlnets_graph')
+        if pool is None: workers.shutdown()
         conn_graph = self.makes_graph_connected(full_graph); graph1 = set(conn_graph).copy(); graph2 = None
         g1 = derives_graph_statistics(graph1); g2 = 'None'; self.write_out_results(graph1)
         if self.kg_construct_approach is not None:
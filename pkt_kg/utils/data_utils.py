@@ -12,6 +12,10 @@ Downloads Data from a Url
 * gzipped_url_download
 * data_downloader
 
+Reads Data
+* opens_data_file
+* reads_gtf_records
+
 Generates Metadata
 * chunks
 * metadata_dictionary_mapper
@@ -19,7 +23,10 @@ Generates Metadata
 
 Miscellaneous data Processing Methods
 * explodes_data
+* genomic_id_indexer
 * genomic_id_mapper
+* writes_genomic_id_map
+* GenomicIdMap
 * deduplicates_file
 * merges_files
 * sublist_creator
@@ -32,6 +39,7 @@ Outputs data
 import ftplib
 import gzip
 import heapq
+import io
 import json
 import numpy as np  # type: ignore
 import os
@@ -41,16 +49,20 @@ import requests
 import shutil
 import urllib3  # type: ignore
 
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import closing
 from io import BytesIO
 from reactome2py import content  # type: ignore
 from tqdm import tqdm  # type: ignore
-from typing import Dict, Generator, List, Optional, Union
+from typing import Dict, Generator, IO, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from urllib.request import urlopen
 from zipfile import ZipFile
 
 # GLOBAL ENVIRONMENT VARIABLE
 zip_pat = '.gz|.zip'
+id_map_magic = b'PKTIDMAP'  # marks the start and end of a genomic identifier map file (see writes_genomic_id_map)
+gtf_attribute = re.compile(r'(\w+) "([^"]*)"')  # a key "value" pair from the attribute column of a GTF file
 
 # WARNING 1 - Pandas: disable chained assignment warning rationale:
 # https://stackoverflow.com/questions/20625582/how-to-deal-with-settingwithcopywarning-in-pandas
@@ -69,11 +81,14 @@ def url_download(url: str, write_location: str, filename: str) -> None:
 
     Returns:
         None.
+
+    Raises:
+        HTTPError: If the URL does not return a successful status, in which case no file is written.
     """
 
     print('Downloading Data from {}'.format(url))
 
-    r = requests.get(url, allow_redirects=True, verify=False)
+    r = requests.get(url, allow_redirects=True, verify=False); r.raise_for_status()
     with open(write_location + '{filename}'.format(filename=filename), 'wb') as outfile:
         try: outfile.write(r.content)
         except OSError:
@@ -107,13 +122,14 @@ def ftp_url_download(url: str, write_location: str, filename: str) -> None:
     return None
 
 
-def gzipped_ftp_url_download(url: str, write_location: str, filename: str) -> None:
+def gzipped_ftp_url_download(url: str, write_location: str, filename: str, keep_compressed: bool = False) -> None:
     """Downloads a gzipped file from an ftp server.
 
     Args:
         url: A string that points to the location of a temp mapping file that needs to be processed.
         write_location: A string that points to a file directory.
         filename: A string containing a filepath for where to write data to.
+        keep_compressed: If True, the gzipped file is kept as is (as filename + '.gz') instead of being decompressed.
 
     Returns:
         None.
@@ -127,10 +143,13 @@ def gzipped_ftp_url_download(url: str, write_location: str, filename: str) -> No
     print('Downloading Gzipped data from FTP Server: {}'.format(url))
     with closing(ftplib.FTP(server)) as ftp, open(write_loc, 'wb') as fid:
         ftp.login(); ftp.cwd(directory); ftp.retrbinary('RETR {}'.format(file), fid.write)
+    if keep_compressed:
+        if filename != '': os.rename(write_loc, write_location + filename + '.gz')
+        return None
     print('Decompressing and Writing Gzipped Data to File')
     with gzip.open(write_loc) as fid_in:
         with open(write_loc.replace('.gz', ''), 'wb') as file_loc:
-            file_loc.write(fid_in.read())
+            shutil.copyfileobj(fid_in, file_loc)
     # change filename and remove gzipped and original files
     if filename != '': os.rename(re.sub(zip_pat, '', write_loc), write_location + filename)
     os.remove(write_loc)  # remove compressed file
@@ -138,13 +157,14 @@ def gzipped_ftp_url_download(url: str, write_location: str, filename: str) -> No
     return None
 
 
-def zipped_url_download(url: str, write_location: str, filename: str = '') -> None:
+def zipped_url_download(url: str, write_location: str, filename: str = '', keep_compressed: bool = False) -> None:
     """Downloads a zipped file from a URL.
 
     Args:
         url: A string that points to the location of a temp mapping file that needs to be processed.
         write_location: A string that points to a file directory.
         filename: A string containing a filepath for where to write data to.
+        keep_compressed: If True, the zip archive is written as is (as filename + '.zip') instead of being extracted.
 
     Returns:
         None.
@@ -153,6 +173,10 @@ def zipped_url_download(url: str, write_location: str, filename: str = '') -> No
     print('Downloading Zipped Data from {}'.format(url))
 
     with requests.get(url, allow_redirects=True) as zip_data:
+        if keep_compressed:
+            file = filename if filename != '' else re.sub(zip_pat, '', url.split('/')[-1])
+            with open(write_location + file + '.zip', 'wb') as outfile: outfile.write(zip_data.content)
+            return None
         with ZipFile(BytesIO(zip_data.content)) as zip_file:
             zip_file.extractall(write_location[:-1])
     zip_data.close()
@@ -161,13 +185,14 @@ def zipped_url_download(url: str, write_location: str, filename: str = '') -> No
     return None
 
 
-def gzipped_url_download(url: str, write_location: str, filename: str) -> None:
+def gzipped_url_download(url: str, write_location: str, filename: str, keep_compressed: bool = False) -> None:
     """Downloads a gzipped file from a URL.
 
     Args:
         url: A string that points to the location of a temp mapping file that needs to be processed.
         write_location: A string that points to a file directory.
         filename: A string containing a filepath for where to write data to.
+        keep_compressed: If True, the gzipped file is kept as is (as filename + '.gz') instead of being decompressed.
 
     Returns:
         None.
@@ -175,30 +200,33 @@ def gzipped_url_download(url: str, write_location: str, filename: str) -> None:
 
     print('Downloading Gzipped Data from {}'.format(url))
 
-    with open(write_location + '{filename}'.format(filename=filename), 'wb') as outfile:
-        outfile.write(gzip.decompress(requests.get(url, allow_redirects=True, verify=False).content))
-    outfile.close()
+    data = requests.get(url, allow_redirects=True, verify=False).content
+    with open(write_location + '{filename}'.format(filename=filename) + ('.gz' if keep_compressed else ''), 'wb') as f:
+        f.write(data if keep_compressed else gzip.decompress(data))
+    f.close()
 
     return None
 
 
-def data_downloader(url: str, write_location: str, filename: str = '') -> None:
+def data_downloader(url: str, write_location: str, filename: str = '', keep_compressed: bool = False) -> None:
     """Downloads data from a URL and saves the file to the `/resources/processed_data/unprocessed_data' directory.
 
     Args:
         url: A string that points to the location of a temp mapping file that needs to be processed.
         write_location: A string that points to a file directory.
         filename: A string containing a filepath for where to write data to.
+        keep_compressed: If True, gzipped and zipped data are written to disk compressed, with their '.gz' or '.zip'
+            extension appended to filename (see opens_data_file for reading them back in), instead of decompressed.
 
     Returns:
         None.
     """
 
     file = re.sub(zip_pat, '', filename) if filename != '' else re.sub(zip_pat, '', url.split('/')[-1])
-    if '.zip' in url: zipped_url_download(url, write_location, file)
+    if '.zip' in url: zipped_url_download(url, write_location, file, keep_compressed)
     elif '.gz' in url or '.gz' in filename:
-        if url.startswith('ftp'): gzipped_ftp_url_download(url, write_location, file)
-        else: gzipped_url_download(url, write_location, file)
+        if url.startswith('ftp'): gzipped_ftp_url_download(url, write_location, file, keep_compressed)
+        else: gzipped_url_download(url, write_location, file, keep_compressed)
     else:
         if url.startswith('ftp'): ftp_url_download(url, write_location, file)
         else: url_download(url, write_location, file)
@@ -206,6 +234,117 @@ def data_downloader(url: str, write_location: str, filename: str = '') -> None:
     return None
 
 
+def opens_data_file(filepath: str, binary: bool = False) -> IO:
+    """Opens a data file for reading, decompressing gzipped ('.gz') and zipped ('.zip') files as they are read rather
+    than first writing a decompressed copy to disk. Zip archives are expected to contain a single data file or a data
+    file named after the archive (i.e. the archive filename without '.zip', which can be prefixed with an underscore
+    separated name, as is done for LinkedData edge data files).
+
+    Args:
+        filepath: A string containing a filepath to a plain text, gzipped, or zipped data file.
+        binary: A bool indicating whether or not to open the file in binary mode (default=False, text mode).
+
+    Returns:
+        A file object opened in text or binary mode, which should be closed (or used as a context manager) by the
+        caller.
+
+    Raises:
+        ValueError: If a zip archive contains more than one file and none are named after the archive.
+    """
+
+    if filepath.endswith('.gz'): return gzip.open(filepath, 'rb' if binary else 'rt')  # type: ignore
+    elif filepath.endswith('.zip'):
+        with ZipFile(filepath) as zip_file:  # archive is closed once the member file object is closed
+            members = [x for x in zip_file.namelist() if not x.endswith('/')]
+            name = filepath.split('/')[-1][:-4]
+            match = [x for x in members if name == x.split('/')[-1] or name.endswith('_' + x.split('/')[-1])]
+            if len(members) != 1 and len(match) == 0:
+                log_str = '{} contains more than one file, unable to determine which to read'.format(filepath)
+                raise ValueError(log_str)
+            member = zip_file.open(match[0] if len(match) > 0 else members[0])
+            return member if binary else io.TextIOWrapper(member)
+    else: return open(filepath, 'rb' if binary else 'r')
+
+
+def _reads_file_range(filepath: str, start: int, end: int) -> Generator:
+    """Reads the lines of a plain text file that start within a byte range.
+
+    Args:
+        filepath: A string containing a filepath to a plain text file.
+        start: An integer containing the first byte of the range.
+        end: An integer containing the byte after the end of the range.
+
+    Returns:
+        A generator of strings, one per line.
+    """
+
+    with open(filepath, 'rb') as f:
+        if start > 0: f.seek(start - 1); f.readline()  # skip the line that started in the prior range
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line: break
+            position += len(line); yield line.decode('utf-8')
+
+
+def _parses_gtf_lines(lines: Iterable[str], features: Set[str], attributes: List[str]) -> Dict[str, List]:
+    """Parses the records of a GTF file whose feature type is in features into columns, one per attribute. Comment
+    lines and records of other features are skipped. Attributes missing from a record are None.
+
+    Args:
+        lines: An iterable of strings, one per line of a GTF file.
+        features: A set of strings containing the feature types (e.g. gene or transcript) to keep.
+        attributes: A list of strings containing the attributes (e.g. gene_id) to extract.
+
+    Returns:
+        columns: A dict keyed by attribute, whose values are lists with an item per kept record.
+    """
+
+    columns: Dict[str, List] = {x: [] for x in ['feature'] + attributes}; markers = ['\t' + x + '\t' for x in features]
+    for line in lines:
+        if not any(x in line for x in markers): continue  # skips most lines without splitting them
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) == 9 and fields[2] in features:
+            record = dict(gtf_attribute.findall(fields[8])); columns['feature'].append(fields[2])
+            for x in attributes: columns[x].append(record.get(x))
+
+    return columns
+
+
+def _parses_gtf_range(filepath: str, start: int, end: int, features: Set[str], attributes: List[str]) -> Dict:
+    """Parses the records of a GTF file that start within a byte range (see _parses_gtf_lines)."""
+
+    return _parses_gtf_lines(_reads_file_range(filepath, start, end), features, attributes)
+
+
+def reads_gtf_records(filepath: str, features: List[str], attributes: List[str], cpus: int = 1) -> pd.DataFrame:
+    """Streams a Gene Transfer Format (GTF) file, keeping only the records of the input feature types (e.g. gene and
+    transcript), and extracts the input attributes of each record into columns. Plain text files can be read in
+    parallel by splitting the file into cpus byte ranges, each of which is parsed in a separate process. Gzipped and
+    zipped files are read by a single process.
+
+    Args:
+        filepath: A string containing a filepath to a plain text, gzipped, or zipped GTF file.
+        features: A list of strings containing the feature types to keep.
+        attributes: A list of strings containing the attributes (e.g. gene_id or transcript_biotype) to extract.
+        cpus: An integer containing the number of processes to use (default=1).
+
+    Returns:
+        A Pandas DataFrame containing a feature column and a column per attribute, with a row per kept record in file
+        order. Attributes missing from a record are None.
+    """
+
+    if cpus > 1 and not filepath.endswith(('.gz', '.zip')):
+        size = os.path.getsize(filepath); bounds = [size * i // cpus for i in range(cpus + 1)]
+        with ProcessPoolExecutor(max_workers=cpus) as executor:
+            results = list(executor.map(_parses_gtf_range, [filepath] * cpus, bounds[:-1], bounds[1:],
+                                        [set(features)] * cpus, [attributes] * cpus))
+    else:
+        with opens_data_file(filepath) as f: results = [_parses_gtf_lines(f, set(features), attributes)]
+
+    return pd.DataFrame({x: [i for result in results for i in result[x]] for x in ['feature'] + attributes})
+
+
 def chunks(lst: List[str], chunk_size: int) -> Generator:
     """Takes a list an integer and creates a list of lists, where each nested list is length chunk_size.
 
@@ -330,13 +469,47 @@ def explodes_data(df: pd.DataFrame, lst_cols: list, splitter: str, fill_value: s
         return explodes_data(res, lst_cols, splitter)
 
 
-def genomic_id_mapper(id_dict: Dict[str, str], filename: str, genomic1: str, genomic2: str,
+def genomic_id_indexer(id_dict: Mapping,
+                       prefixes: List[str]) -> Tuple[Dict[str, List[str]], Dict[str, Dict[str, List[str]]]]:
+    """Builds a prefix-partitioned index over a dictionary of genomic identifier mappings, so that the keys and values
+    that start with a given prefix can be looked up directly instead of re-scanning every value list. The index only
+    needs to be built once and can then be reused by each call to genomic_id_mapper.
+
+    Args:
+        id_dict: A dict (or GenomicIdMap) where keys are genomic identifiers and values are lists of cross-mappings.
+        prefixes: A list of strings, where each string is a genomic identifier prefix (e.g. "entrez_id") or a genomic
+            type prefix (e.g. "gene_type_update") to index.
+
+    Returns:
+        A tuple containing two dictionaries:
+            key_index: A dict keyed by prefix whose values are lists of the id_dict keys that start with the prefix.
+            value_index: A dict keyed by prefix whose values are dicts that map each id_dict key to the list of its
+                values that start with the prefix (in their original order). Keys without matching values are left out.
+    """
+
+    candidates: Dict[str, List[str]] = {}  # bucket prefixes by first character to minimize startswith checks
+    for prefix in set(prefixes): candidates.setdefault(prefix[:1], []).append(prefix)
+    key_index: Dict[str, List[str]] = {x: [] for x in set(prefixes)}
+    value_index: Dict[str, Dict[str, List[str]]] = {x: {} for x in set(prefixes)}
+    for key, values in tqdm(id_dict.items()):
+        for prefix in candidates.get(key[:1], []):
+            if key.startswith(prefix): key_index[prefix].append(key)
+        for value in values:
+            for prefix in candidates.get(value[:1], []):
+                if value.startswith(prefix): value_index[prefix].setdefault(key, []).append(value)
+
+    return key_index, value_index
+
+
+def genomic_id_mapper(id_dict: Mapping, filename: str, genomic1: str, genomic2: str,
                       src_genomic_type: Optional[str], tgt_genomic_type: Optional[str], src_update: Optional[str],
-                      tgt_update: Optional[str]) -> None:
-    """Searches a dictionary of genomic identifier mappings and processes them, writing out
+                      tgt_update: Optional[str],
+                      index: Optional[Tuple[Dict[str, List[str]], Dict[str, Dict[str, List[str]]]]] = None) -> None:
+    """Searches a dictionary of genomic identifier mappings and processes them, writing out each mapping to filename
+    as soon as it is found.
 
     Args:
-        id_dict: A dict where keys are genomic identifiers and values are lists of cross-mappings.
+        id_dict: A dict (or GenomicIdMap) where keys are genomic identifiers and values are lists of cross-mappings.
         filename: A string containing a filename to write results to.
         genomic1: A string indicating a genomic identifier type (e.g. transcript_stable_id, ensembl_gene_id).
         genomic2: A string indicating a genomic identifier type (e.g. transcript_stable_id, ensembl_gene_id).
@@ -344,51 +517,192 @@ def genomic_id_mapper(id_dict: Dict[str, str], filename: str, genomic1: str, gen
         tgt_genomic_type: A string indicating the prefix for the target genomic_type.
         src_update: A string indicating the prefix for the source genomic_type; protein-coding or NOT.
         tgt_update: A string indicating the prefix for the target genomic_type; protein-coding or NOT.
+        index: A tuple returned by genomic_id_indexer that covers all of the prefixes above. If None, an index is
+            built for id_dict (pass a pre-built index when calling this function several times on the same id_dict).
 
     Return:
         None.
     """
 
-    prots = ['uniprot_id', 'pro_id', 'protein_stable_id']; prot_types = genomic1 in prots and genomic2 in prots
-    results = set(); keys = set(x for x in id_dict.keys() if x.startswith(genomic1))
-    for key in tqdm(keys):
-        source, targets = key, [x for x in id_dict[key] if x.startswith(genomic2)]
-        src_type = 'None'; src_type_update = 'None'
-        if src_genomic_type is not None:
-            src = [x for x in id_dict[key] if x.startswith(src_genomic_type)]
-            src_type = src[0].replace(src_genomic_type + '_', '') if len(src) > 0 else 'None'
-        if src_update is not None:
-            src2 = [x for x in id_dict[key] if x.startswith(src_update)]
-            src_type_update = src2[0].replace(src_update + '_', '') if len(src2) > 0 else 'None'
-        for target in targets:
-            tgt_type = 'None'; tgt_type_update = 'None'
-            if tgt_genomic_type is not None:
-                tgt = [x for x in id_dict[target] if x.startswith(tgt_genomic_type)]
-                tgt_type = tgt[0].replace(tgt_genomic_type + '_', '') if len(tgt) > 0 else 'None'
-            if tgt_update is not None:
-                tgt2 = [x for x in id_dict[target] if x.startswith(tgt_update)]
-                tgt_type_update = tgt2[0].replace(tgt_update + '_', '') if len(tgt2) > 0 else 'None'
-            # format source and target entities
-            res1 = source.replace(genomic1 + '_', ''); res2 = target.replace(genomic2 + '_', '')
-            # write out protein entities -- they have no genomic type
-            if prot_types: results |= {(res1, res2, src_type, tgt_type, src_type_update, tgt_type_update)}
-            # if gene or transcript, only write out entities with a genomic type
-            elif (genomic1 in prots and genomic2 not in prots) and ('None' not in [tgt_type_update, tgt_type]):
-                results |= {(res1, res2, src_type, tgt_type, src_type_update, tgt_type_update)}
-            elif (genomic1 not in prots and genomic2 in prots) and ('None' not in [src_type_update, src_type]):
-                results |= {(res1, res2, src_type, tgt_type, src_type_update, tgt_type_update)}
-            else:
-                if 'None' not in [src_type_update, tgt_type_update, tgt_type, src_type]:
-                    results |= {(res1, res2, src_type, tgt_type, src_type_update, tgt_type_update)}
+    prefixes = [x for x in [genomic1, genomic2, src_genomic_type, tgt_genomic_type, src_update, tgt_update] if x]
+    key_index, value_index = index if index is not None else genomic_id_indexer(id_dict, prefixes)
 
+    def _first_type(prefix: Optional[str], key: str) -> str:
+        if prefix is None: return 'None'
+        match = value_index[prefix].get(key)
+        return match[0].replace(prefix + '_', '') if match else 'None'
+
+    prots = ['uniprot_id', 'pro_id', 'protein_stable_id']; prot_types = genomic1 in prots and genomic2 in prots
     with open(filename, 'w') as outfile:
-        for row in results: outfile.write(
-            row[0] + '\t' + row[1] + '\t' + row[2] + '\t' + row[3] + '\t' + row[4] + '\t' + row[5] + '\n')
+        for key in tqdm(dict.fromkeys(key_index[genomic1])):
+            source, targets = key, dict.fromkeys(value_index[genomic2].get(key, []))
+            src_type, src_type_update = _first_type(src_genomic_type, key), _first_type(src_update, key)
+            for target in targets:
+                tgt_type, tgt_type_update = _first_type(tgt_genomic_type, target), _first_type(tgt_update, target)
+                # format source and target entities
+                res1 = source.replace(genomic1 + '_', ''); res2 = target.replace(genomic2 + '_', '')
+                row = '\t'.join([res1, res2, src_type, tgt_type, src_type_update, tgt_type_update]) + '\n'
+                # write out protein entities -- they have no genomic type
+                if prot_types: outfile.write(row)
+                # if gene or transcript, only write out entities with a genomic type
+                elif (genomic1 in prots and genomic2 not in prots) and ('None' not in [tgt_type_update, tgt_type]):
+                    outfile.write(row)
+                elif (genomic1 not in prots and genomic2 in prots) and ('None' not in [src_type_update, src_type]):
+                    outfile.write(row)
+                else:
+                    if 'None' not in [src_type_update, tgt_type_update, tgt_type, src_type]: outfile.write(row)
     outfile.close()
 
     return None
 
 
+def _writes_id_map_section(outfile: IO, sections: Dict, name: str, data: Union[np.ndarray, List[bytes]]) -> None:
+    """Writes a section of a genomic identifier map file, starting at an 8-byte aligned offset, and records the
+    section's dtype, offset, and length in sections.
+
+    Args:
+        outfile: A file object opened for writing in binary mode.
+        sections: A dict keyed by section name whose values are lists of dtype, offset, and length.
+        name: A string containing the name of the section.
+        data: A numpy array or a list of bytes objects (written as a uint8 section).
+
+    Returns:
+        None.
+    """
+
+    outfile.write(b'\0' * (-outfile.tell() % 8)); start = outfile.tell()
+    if isinstance(data, np.ndarray): outfile.write(data.tobytes()); dtype = data.dtype.str
+    else:
+        for i in range(0, len(data), 100000): outfile.write(b''.join(data[i:i + 100000]))
+        dtype = '|u1'
+    sections[name] = [dtype, start, (outfile.tell() - start) // np.dtype(dtype).itemsize]
+
+    return None
+
+
+def writes_genomic_id_map(items: Iterable[Tuple[str, Iterable[str]]], filename: str) -> None:
+    """Writes genomic identifier mappings to a compact file that can be read with GenomicIdMap. Each distinct string is
+    stored once in a string table and the mappings are stored as a CSR adjacency (i.e. one array of value string
+    indices and one array of row offsets). Value indices are written to disk as each item is consumed, so only the
+    string table and one offset per key are held in memory. The file contains 8-byte aligned sections followed by a
+    JSON table of contents and a fixed-size trailer pointing to it:
+        - indices (int32): string indices of the values of each key, in key order.
+        - indptr (int64): offsets into indices, the values of key i are indices[indptr[i]:indptr[i + 1]].
+        - keys (int32): string indices of the keys.
+        - order (int32): key positions sorted by key, used to look up keys with a binary search.
+        - offsets (int64) and strings (uint8): the UTF-8 encoded string table, string i is
+          strings[offsets[i]:offsets[i + 1]].
+
+    Args:
+        items: An iterable of tuples, where the first item is a unique key (str) and the second item is an iterable of
+            values (str) mapped to the key (e.g. dict.items()).
+        filename: A string containing a filepath for where to write data to.
+
+    Returns:
+        None.
+    """
+
+    strings: Dict[str, int] = dict(); keys: List[int] = []; indptr: List[int] = [0]; sections: Dict = dict()
+    with open(filename, 'wb') as outfile:
+        outfile.write(id_map_magic); start = outfile.tell()
+        for key, values in items:
+            keys += [strings.setdefault(key, len(strings))]
+            ids = np.array([strings.setdefault(x, len(strings)) for x in values], dtype='<i4')
+            outfile.write(ids.tobytes()); indptr += [indptr[-1] + len(ids)]
+        sections['indices'] = ['<i4', start, indptr[-1]]
+        encoded = [x.encode('utf-8') for x in strings.keys()]; del strings  # keys are in string index order
+        order = sorted(range(len(keys)), key=lambda x: encoded[keys[x]])
+        _writes_id_map_section(outfile, sections, 'indptr', np.array(indptr, dtype='<i8'))
+        _writes_id_map_section(outfile, sections, 'keys', np.array(keys, dtype='<i4'))
+        _writes_id_map_section(outfile, sections, 'order', np.array(order, dtype='<i4'))
+        _writes_id_map_section(outfile, sections, 'offsets', np.cumsum([0] + [len(x) for x in encoded], dtype='<i8'))
+        _writes_id_map_section(outfile, sections, 'strings', encoded)
+        toc = outfile.tell(); outfile.write(json.dumps(sections).encode('utf-8'))
+        outfile.write(np.array([toc], dtype='<i8').tobytes() + id_map_magic)
+
+    return None
+
+
+class GenomicIdMap(Mapping):
+    """Class provides read-only, dictionary-like access to a genomic identifier map file written by
+    writes_genomic_id_map. The arrays in the file are memory-mapped rather than read into memory, so opening the map is
+    cheap and only the pages needed by a lookup are read from disk. Keys are found with a binary search over the sorted
+    key positions. Looking up a key returns the list of values mapped to it, in the order they were written. Iterating
+    over the map (and keys, items, and values) follows the order the keys were written.
+
+    Attributes:
+        filename: A string containing the filepath of a genomic identifier map file.
+
+    Raises:
+        ValueError: If the file is not a genomic identifier map file.
+    """
+
+    def __init__(self, filename: str) -> None:
+
+        self.filename: str = filename
+        with open(filename, 'rb') as f_in:
+            header = f_in.read(len(id_map_magic)); size = max(f_in.seek(0, 2) - 8 - len(id_map_magic), 0)
+            f_in.seek(size); trailer = f_in.read()
+            if header != id_map_magic or trailer[8:] != id_map_magic or size < len(id_map_magic):
+                raise ValueError('{} is not a genomic identifier map file'.format(filename))
+            toc = int(np.frombuffer(trailer[:8], dtype='<i8')[0]); f_in.seek(toc)
+            sections = json.loads(f_in.read(size - toc).decode('utf-8'))
+        self._arrays: Dict[str, memoryview] = {  # memoryviews index to Python ints and slice to bytes quickly
+            k: (np.memmap(filename, dtype=v[0], mode='r', offset=v[1], shape=(v[2],)) if v[2] > 0
+                else np.empty(0, v[0])).data for k, v in sections.items()}
+
+    def __reduce__(self) -> Tuple:
+        return GenomicIdMap, (self.filename,)  # re-open the file instead of copying the mapped arrays
+
+    def _gets_string(self, index: int) -> str:
+        """Decodes string index from the string table."""
+
+        offsets = self._arrays['offsets']
+
+        return self._arrays['strings'][offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
+
+    def _gets_values(self, row: int) -> List[str]:
+        """Returns the values of the key at position row."""
+
+        indptr = self._arrays['indptr']
+
+        return [self._gets_string(x) for x in self._arrays['indices'][indptr[row]:indptr[row + 1]]]
+
+    def _finds_row(self, key: str) -> Optional[int]:
+        """Returns the position of key (or None if it is not in the map) using a binary search."""
+
+        target, keys, order = key.encode('utf-8'), self._arrays['keys'], self._arrays['order']
+        strings, offsets = self._arrays['strings'], self._arrays['offsets']
+        low, high = 0, len(order)
+        while low < high:
+            mid = (low + high) // 2; x = keys[order[mid]]
+            if strings[offsets[x]:offsets[x + 1]].tobytes() < target: low = mid + 1
+            else: high = mid
+        if low == len(order): return None
+        x = keys[order[low]]
+
+        return order[low] if strings[offsets[x]:offsets[x + 1]].tobytes() == target else None
+
+    def __getitem__(self, key: str) -> List[str]:
+        row = self._finds_row(key) if isinstance(key, str) else None
+        if row is None: raise KeyError(key)
+        else: return self._gets_values(row)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._finds_row(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for x in self._arrays['keys']: yield self._gets_string(x)
+
+    def __len__(self) -> int:
+        return len(self._arrays['keys'])
+
+    def items(self) -> Iterator[Tuple[str, List[str]]]:  # type: ignore
+        """Yields each key and its values without looking the keys up."""
+
+        for row, x in enumerate(self._arrays['keys']): yield self._gets_string(x), self._gets_values(row)
+
+
 def outputs_dictionary_data(dict_object: Optional[Dict], filename: str) -> None:
     """Outputs a dictionary of data as a json file.
 
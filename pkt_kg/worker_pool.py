@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# import needed libraries
+import glob
+import logging.config
+import os.path
+import ray  # type: ignore
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# logging
+log_dir, log, log_config = 'builds/logs', 'pkt_build_log.log', glob.glob('**/logging.ini', recursive=True)
+try:
+    if not os.path.exists(log_dir): os.mkdir(log_dir)
+except FileNotFoundError:
+    log_dir, log_config = '../builds/logs', glob.glob('../builds/logging.ini', recursive=True)
+    if not os.path.exists(log_dir): os.mkdir(log_dir)
+logger = logging.getLogger(__name__)
+logging.config.fileConfig(log_config[0], disable_existing_loggers=False, defaults={'log_file': log_dir + '/' + log})
+
+
+class WorkerPool(object):
+    """Class provides a long-lived pool of ray actors. The pool is meant to be created once per build (i.e. in Main.py)
+    and re-used by each parallel step (i.e. edge list creation, edge construction, and OWL-NETS decoding) instead of
+    each step starting and shipping data to its own set of actors. Objects needed by several workers or steps (e.g.
+    ontology classes, the subclass map, and relations dictionaries) are placed in the ray object store once with
+    shares and are loaded once by every worker; they are referenced in arguments with WorkerPool.Shared. Stateful
+    objects (e.g. an EdgeConstructor or OwlNets instance) are created on the workers with creates and are driven with
+    calls and gathers, while independent tasks are run with runs. A worker that dies is restarted by ray up to
+    max_restarts times and reloads the shared objects it uses; a worker that cannot be restarted is replaced by runs.
+    Objects created on a worker that died are lost and must be created again.
+
+    Attributes:
+        cpus: An integer representing the number of workers in the pool (default=1).
+        max_restarts: An integer representing the number of times ray restarts a worker that dies (default=3).
+        max_task_retries: An integer representing the number of times a task running on a worker that dies is
+            retried once the worker is restarted (default=3).
+
+    Raises:
+        ValueError: If cpus is not a positive integer.
+    """
+
+    def __init__(self, cpus: int = 1, max_restarts: int = 3, max_task_retries: int = 3) -> None:
+
+        if not isinstance(cpus, int) or cpus < 1:
+            log_str = 'cpus must be a positive integer'; logger.error('ValueError: ' + log_str)
+            raise ValueError(log_str)
+        else: self.cpus: int = cpus
+        self.max_restarts: int = max_restarts; self.max_task_retries: int = max_task_retries
+        try: ray.init()
+        except RuntimeError: pass
+        self.shared: Dict = dict()
+        self.workers: List = [self.starts_worker() for _ in range(self.cpus)]
+
+    class Shared(object):
+        """Inner class used to mark an argument that should be replaced on the worker by a shared object.
+
+        Attributes:
+            key: A string containing the name the object was shared under.
+            ref: An optional ray ObjectRef for the shared object, set by the pool so that a restarted worker can
+                reload it.
+        """
+
+        def __init__(self, key: str, ref: Optional[Any] = None) -> None:
+
+            self.key: str = key
+            self.ref: Optional[Any] = ref
+
+    class Worker(object):
+        """Inner class object used as a ray actor by the pool. Each worker stores the shared objects it has loaded and
+        the stateful objects it has created, keyed by name."""
+
+        def __init__(self) -> None:
+
+            self.shared: Dict = dict()
+            self.objects: Dict = dict()
+
+        def gets_shared(self, arg: 'WorkerPool.Shared') -> Any:
+            """Returns the shared object arg names, reloading it from the ray object store if the worker was
+            restarted after the object was shared."""
+
+            if arg.key not in self.shared and arg.ref is not None: self.shared[arg.key] = ray.get(arg.ref)
+
+            return self.shared[arg.key]
+
+        def resolves(self, args: Iterable) -> List:
+            """Replaces each WorkerPool.Shared argument, or dictionary value, with the shared object it names."""
+
+            resolved: List = []
+            for arg in args:
+                if isinstance(arg, WorkerPool.Shared): resolved += [self.gets_shared(arg)]
+                elif isinstance(arg, dict):
+                    resolved += [{k: self.gets_shared(v) if isinstance(v, WorkerPool.Shared) else v
+                                  for k, v in arg.items()}]
+                else: resolved += [arg]
+
+            return resolved
+
+        def pings(self) -> bool:
+            """Returns True; used to check that the worker is alive."""
+
+            return True
+
+        def loads(self, key: str, value: Any) -> None:
+            """Stores a shared object (resolved from the ray object store) under key."""
+
+            self.shared[key] = value
+
+            return None
+
+        def creates(self, key: str, obj_type: Callable, *args: Any) -> None:
+            """Creates an instance of obj_type from args and stores it under key."""
+
+            self.objects[key] = obj_type(*self.resolves(args))
+
+            return None
+
+        def calls(self, key: str, method: str, *args: Any) -> Any:
+            """Calls method on the object stored under key and returns the result."""
+
+            return getattr(self.objects[key], method)(*self.resolves(args))
+
+        def releases(self, key: str) -> None:
+            """Removes the object or shared object stored under key."""
+
+            self.objects.pop(key, None); self.shared.pop(key, None)
+
+            return None
+
+        def runs(self, func: Callable, *args: Any) -> Any:
+            """Runs func on args and returns the result."""
+
+            return func(*self.resolves(args))
+
+    def starts_worker(self) -> Any:
+        """Starts a worker that ray restarts if it dies and loads every object shared with the pool onto it.
+
+        Returns:
+            A ray actor handle for the worker.
+        """
+
+        actor = ray.remote(max_restarts=self.max_restarts, max_task_retries=self.max_task_retries)(self.Worker)
+        worker = actor.remote()  # type: ignore
+        for key, ref in self.shared.items(): worker.loads.remote(key, ref)  # type: ignore
+
+        return worker
+
+    def binds(self, args: Iterable) -> List:
+        """Adds the ObjectRef of the shared object to each WorkerPool.Shared argument, or dictionary value, so that a
+        restarted worker can reload it."""
+
+        bound: List = []
+        for arg in args:
+            if isinstance(arg, WorkerPool.Shared): bound += [WorkerPool.Shared(arg.key, self.shared.get(arg.key))]
+            elif isinstance(arg, dict):
+                bound += [{k: WorkerPool.Shared(v.key, self.shared.get(v.key)) if isinstance(v, WorkerPool.Shared)
+                           else v for k, v in arg.items()}]
+            else: bound += [arg]
+
+        return bound
+
+    def replaces_dead_worker(self, worker: int) -> bool:
+        """Replaces a worker that has died and can no longer be restarted with a new worker.
+
+        Args:
+            worker: An integer naming the worker to check.
+
+        Returns:
+            True if the worker was replaced, False if it is alive.
+        """
+
+        try: ray.get(self.workers[worker].pings.remote()); return False
+        except ray.exceptions.RayActorError:
+            log_str = 'Replacing Worker {} That Died'.format(worker); print(log_str); logger.warning(log_str)
+            ray.kill(self.workers[worker], no_restart=True); self.workers[worker] = self.starts_worker()
+
+            return True
+
+    def shares(self, key: str, value: Any) -> None:
+        """Places an object in the ray object store once and has every worker load it under key. An object that was
+        already shared under key is replaced.
+
+        Args:
+            key: A string containing the name to share the object under.
+            value: Any object that can be serialized by ray.
+
+        Returns:
+            None.
+        """
+
+        self.shared[key] = ray.put(value)
+        for worker in self.workers: worker.loads.remote(key, self.shared[key])
+
+        return None
+
+    def creates(self, key: str, obj_type: Callable, *args: Any, workers: Optional[List[int]] = None) -> None:
+        """Creates an instance of obj_type on each worker and stores it under key. Arguments can include shared
+        objects (see WorkerPool.Shared).
+
+        Args:
+            key: A string containing the name to store the objects under.
+            obj_type: A class or callable returning the object to create.
+            *args: Arguments passed to obj_type.
+            workers: An optional list of integers naming the workers to create the object on (default=all workers).
+
+        Returns:
+            None.
+        """
+
+        for i in (range(self.cpus) if workers is None else workers):
+            self.workers[i].creates.remote(key, obj_type, *self.binds(args))
+
+        return None
+
+    def calls(self, worker: int, key: str, method: str, *args: Any) -> Any:
+        """Calls method on the object stored under key on a single worker without waiting for the result.
+
+        Args:
+            worker: An integer naming the worker to use.
+            key: A string containing the name the object is stored under.
+            method: A string containing the name of the method to call.
+            *args: Arguments passed to the method.
+
+        Returns:
+            A ray ObjectRef for the result.
+        """
+
+        return self.workers[worker].calls.remote(key, method, *self.binds(args))
+
+    def gathers(self, key: str, method: str, workers: Optional[List[int]] = None) -> List:
+        """Calls method on the object stored under key on each worker, once all prior calls to the worker have
+        finished, and returns the results.
+
+        Args:
+            key: A string containing the name the objects are stored under.
+            method: A string containing the name of the method to call.
+            workers: An optional list of integers naming the workers to use (default=all workers).
+
+        Returns:
+            A list of results ordered by worker.
+        """
+
+        workers = list(range(self.cpus)) if workers is None else workers
+
+        return ray.get([self.workers[i].calls.remote(key, method) for i in workers])
+
+    def releases(self, key: str) -> None:
+        """Removes the objects, or the shared object, stored under key from all workers.
+
+        Args:
+            key: A string containing the name the objects are stored under.
+
+        Returns:
+            None.
+        """
+
+        ray.get([worker.releases.remote(key) for worker in self.workers]); self.shared.pop(key, None)
+
+        return None
+
+    def runs(self, func: Callable, items: List, *args: Any) -> Iterator[Tuple[Any, Any]]:
+        """Runs func(*args, item) for each item as an independent task, in order, with no more than one task per
+        worker, and yields each item and the ray ObjectRef of its result as soon as it finishes. Calling ray.get on the
+        ObjectRef returns the result or raises the task's error (a ray.exceptions.RayActorError if the worker died).
+        A worker that died is replaced before it is given another task.
+
+        Args:
+            func: A callable that can be serialized by ray.
+            items: A list of items to process.
+            *args: Arguments passed to func before each item. Arguments can include shared objects.
+
+        Returns:
+            An iterator of tuples, where the first item is an item from items and the second is an ObjectRef.
+        """
+
+        queue = list(items); idle = list(range(self.cpus)); running: Dict = dict(); args = tuple(self.binds(args))
+        while len(queue) > 0 or len(running) > 0:
+            while len(queue) > 0 and len(idle) > 0:
+                x, i = queue.pop(0), idle.pop(0); running[self.workers[i].runs.remote(func, *args, x)] = (x, i)
+            done, _ = ray.wait(list(running.keys()), num_returns=1)
+            x, i = running.pop(done[0]); self.replaces_dead_worker(i); idle.append(i)
+            yield x, done[0]
+
+    def shutdown(self) -> None:
+        """Stops all workers in the pool."""
+
+        for worker in self.workers: ray.kill(worker)
+        self.workers, self.shared = [], dict()
+
+        return None
@@ -39,6 +39,7 @@ test_deps = [
 ]
 
 extras = {
+    'arrow': ['pyarrow>=13.0.0'],
     'test': test_deps,
 }
 
@@ -0,0 +1,316 @@
+import glob
+import gzip
+import logging
+import networkx
+import numpy
+import os
+import pandas
+import shutil
+import subprocess
+import unittest
+
+from mock import patch
+
+import builds.data_preprocessing
+
+from builds.benchmark_data_preprocessing import creates_source_data, loads_baseline_module, prepares_source_data
+from builds.benchmark_data_preprocessing import runs_method
+from builds.build_utilities import downloads_data_from_gcs_bucket, uploads_data_to_gcs_bucket
+from builds.data_preprocessing import DataPreprocessing, log, log_dir
+
+# last revision of builds/data_preprocessing.py that transformed the source data with iterrows loops
+loop_revision = '4899595'
+# last revision of builds/data_preprocessing.py that cross-mapped the genomic identifiers one group at a time
+row_wise_revision = 'add90e8'
+
+
+def creates_task(preprocessor, task, runs):
+    """Creates a build task method that records that it was run and writes the upper-cased contents of its input files
+    to its output file."""
+
+    def runs_task():
+        runs.append(task); data = ''
+        for x in preprocessor.tasks[task]['inputs']:
+            with open(preprocessor.temp_dir + '/' + x) as f: data += f.read().upper()
+        output = preprocessor.tasks[task]['outputs'][0]
+        with open(preprocessor.temp_dir + '/' + output, 'w') as out: out.write(data)
+        uploads_data_to_gcs_bucket(preprocessor.bucket, preprocessor.processed_data, preprocessor.temp_dir, output)
+
+    return runs_task
+
+
+class TestDataPreprocessing(unittest.TestCase):
+    """Class to test the build task scheduler and task cache of the DataPreprocessing class from the data_preprocessing
+    script."""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+        # create temporary directory containing source data
+        current_directory = os.path.dirname(__file__)
+        self.dir_loc = os.path.abspath(os.path.join(current_directory, 'data/preprocessing'))
+        for x in ['original_data', 'processed_data', 'temp']: os.makedirs(self.dir_loc + '/' + x)
+        self.writes_source_file('original_data/source_a.txt', 'a')
+        self.writes_source_file('original_data/source_b.txt', 'b')
+        self.writes_source_file('processed_data/source_c.txt', 'c')
+
+        return None
+
+    def writes_source_file(self, filename, data):
+        """Writes a source file to the temporary directory."""
+
+        with open(self.dir_loc + '/' + filename, 'w') as out: out.write(data)
+
+        return None
+
+    def creates_preprocessor(self, runs):
+        """Creates a DataPreprocessing instance with a small task graph, where merges_a_b waits on writes_a and
+        writes_b and writes_c reads a source file stored with the processed data."""
+
+        preprocessor = DataPreprocessing(None, self.dir_loc + '/original_data', self.dir_loc + '/processed_data',
+                                         self.dir_loc + '/temp')
+        preprocessor.tasks = {
+            'merges_a_b': {'step': 'MERGE', 'inputs': ['a.txt', 'b.txt'], 'outputs': ['merged.txt']},
+            'writes_a': {'step': 'A', 'inputs': ['source_a.txt'], 'outputs': ['a.txt']},
+            'writes_b': {'step': 'B', 'inputs': ['source_b.txt'], 'outputs': ['b.txt']},
+            'writes_c': {'step': 'C', 'inputs': ['source_c.txt'], 'outputs': ['c.txt']}}
+        for task in preprocessor.tasks: setattr(preprocessor, task, creates_task(preprocessor, task, runs))
+
+        return preprocessor
+
+    def test_preprocesses_build_data(self):
+        """Tests the preprocesses_build_data method when tasks are skipped and re-run using the task cache."""
+
+        # test all tasks are run in dependency order on the first run
+        runs = []; self.creates_preprocessor(runs).preprocesses_build_data()
+        self.assertEqual(['writes_a', 'writes_b', 'merges_a_b', 'writes_c'], runs)
+        with open(self.dir_loc + '/processed_data/merged.txt') as f: self.assertEqual('AB', f.read())
+        self.assertTrue(os.path.exists(self.dir_loc + '/processed_data/data_preprocessing_task_cache.json'))
+
+        # test no task is run the second time
+        runs = []; self.creates_preprocessor(runs).preprocesses_build_data()
+        self.assertEqual([], runs)
+
+        # test changing one source file only re-runs the tasks that depend on it
+        self.writes_source_file('original_data/source_b.txt', 'bb')
+        runs = []; self.creates_preprocessor(runs).preprocesses_build_data()
+        self.assertEqual(['writes_b', 'merges_a_b'], runs)
+        with open(self.dir_loc + '/processed_data/merged.txt') as f: self.assertEqual('ABB', f.read())
+
+        # test changing a source file stored with the processed data re-runs the task that reads it
+        self.writes_source_file('processed_data/source_c.txt', 'cc')
+        runs = []; self.creates_preprocessor(runs).preprocesses_build_data()
+        self.assertEqual(['writes_c'], runs)
+
+        # test a changed output file re-runs the task that writes it and all tasks are run without the cache
+        self.writes_source_file('processed_data/merged.txt', 'X')
+        runs = []; self.creates_preprocessor(runs).preprocesses_build_data()
+        self.assertEqual(['merges_a_b'], runs)
+        runs = []; self.creates_preprocessor(runs).preprocesses_build_data(use_cache=False)
+        self.assertEqual(['writes_a', 'writes_b', 'merges_a_b', 'writes_c'], runs)
+
+        return None
+
+    def test_preprocesses_build_data_processes(self):
+        """Tests the preprocesses_build_data method when independent tasks are run in 2 processes."""
+
+        runs = []; preprocessor = self.creates_preprocessor(runs); preprocessor.cpus = 2
+        preprocessor.preprocesses_build_data()
+        with open(self.dir_loc + '/processed_data/merged.txt') as f: self.assertEqual('AB', f.read())
+        with open(self.dir_loc + '/processed_data/c.txt') as f: self.assertEqual('C', f.read())
+        self.assertEqual(0, len(glob.glob(log_dir + '/*_' + log)))  # task logs merged into build log
+
+        # test the tasks run in the processes were recorded in the task cache
+        runs = []; self.creates_preprocessor(runs).preprocesses_build_data()
+        self.assertEqual([], runs)
+
+        return None
+
+    def test_preprocesses_build_data_overwritten_input(self):
+        """Tests the preprocesses_build_data method when a task overwrites one of its input files."""
+
+        self.writes_source_file('original_data/d.txt', 'd')
+
+        def formats_d(preprocessor, runs):
+            runs.append('formats_d')
+            with open(preprocessor.temp_dir + '/d.txt') as f: data = f.read()
+            with open(preprocessor.temp_dir + '/d.txt', 'w') as out: out.write(data + ' formatted')
+            uploads_data_to_gcs_bucket(preprocessor.bucket, preprocessor.processed_data, preprocessor.temp_dir, 'd.txt')
+
+        def creates_preprocessor(runs, use_cache=True):
+            preprocessor = self.creates_preprocessor(runs)
+            preprocessor.tasks = {'formats_d': {'step': 'D', 'inputs': ['d.txt'], 'outputs': ['d.txt']}}
+            preprocessor.formats_d = lambda: formats_d(preprocessor, runs)
+            preprocessor.preprocesses_build_data(use_cache)
+
+        # test back-to-back runs hit the cache and the task always reads the original file
+        runs = []; creates_preprocessor(runs); creates_preprocessor(runs)
+        self.assertEqual(['formats_d'], runs)
+        creates_preprocessor(runs, use_cache=False)
+        self.assertEqual(['formats_d', 'formats_d'], runs)
+        with open(self.dir_loc + '/processed_data/d.txt') as f: self.assertEqual('d formatted', f.read())
+
+        # test changing the original file re-runs the task
+        self.writes_source_file('original_data/d.txt', 'dd')
+        runs = []; creates_preprocessor(runs)
+        self.assertEqual(['formats_d'], runs)
+        with open(self.dir_loc + '/processed_data/d.txt') as f: self.assertEqual('dd formatted', f.read())
+
+        return None
+
+    def test_downloads_data_from_gcs_bucket(self):
+        """Tests the downloads_data_from_gcs_bucket method when the data directories are local."""
+
+        temp_dir = self.dir_loc + '/temp'
+        data_file = downloads_data_from_gcs_bucket(None, self.dir_loc + '/original_data',
+                                                   self.dir_loc + '/processed_data', 'source_*.txt', temp_dir)
+        self.assertEqual(temp_dir + '/source_c.txt', data_file)
+        self.writes_source_file('temp/e.txt', 'e')
+        self.assertEqual(temp_dir + '/e.txt', downloads_data_from_gcs_bucket(None, None, None, 'e.txt', temp_dir))
+        self.assertRaises(ValueError, downloads_data_from_gcs_bucket, None, self.dir_loc + '/original_data',
+                          self.dir_loc + '/processed_data', 'missing.txt', temp_dir)
+
+        # test a gzipped copy of a file is decompressed unless it is kept compressed
+        with gzip.open(self.dir_loc + '/original_data/f.txt.gz', 'wt') as out: out.write('f')
+        data_file = downloads_data_from_gcs_bucket(None, self.dir_loc + '/original_data', None, 'f.txt', temp_dir)
+        self.assertEqual(temp_dir + '/f.txt', data_file)
+        with open(data_file) as f: self.assertEqual('f', f.read())
+        self.assertEqual(temp_dir + '/f.txt.gz', downloads_data_from_gcs_bucket(
+            None, self.dir_loc + '/original_data', None, 'f.txt', temp_dir, keep_compressed=True))
+
+        return None
+
+    def test_preprocesses_build_data_cycle(self):
+        """Tests the preprocesses_build_data method when the task graph contains a cycle."""
+
+        runs = []; preprocessor = self.creates_preprocessor(runs)
+        preprocessor.tasks['writes_a']['inputs'] = ['merged.txt']
+        self.assertRaises(ValueError, preprocessor.preprocesses_build_data)
+        self.assertEqual(['writes_b', 'writes_c'], runs)
+
+        return None
+
+    def test_preprocesses_build_data_gcs_paths(self):
+        """Tests the preprocesses_build_data method when Google Cloud Storage paths are passed without a bucket."""
+
+        gcs_path = 'archived_builds/release_v3.0.0/build_{}/data/'.format(os.getpid())
+        preprocessor = DataPreprocessing(None, gcs_path + 'original_data/', gcs_path + 'processed_data/',
+                                         self.dir_loc + '/temp')
+        self.assertRaises(ValueError, preprocessor.preprocesses_build_data)
+        self.assertFalse(os.path.exists(gcs_path))
+
+        return None
+
+    def test_vectorized_methods(self):
+        """Tests the vectorized DataPreprocessing methods return the same output as the iterrows loops they replaced
+        on a small sample of random source data."""
+
+        try: baseline = loads_baseline_module(loop_revision)
+        except subprocess.CalledProcessError: self.skipTest('revision {} is not available'.format(loop_revision))
+
+        # the loops shared one set between the codes of a CUI (see creates_source_data), so codes mapped to several
+        # CUIs are only compared in test_creates_disease_identifier_mappings
+        data = creates_source_data(0.002)
+        data['disease_mappings.tsv'] = data['disease_mappings.tsv'].drop_duplicates('code', keep=False)
+        input_dir = self.dir_loc + '/temp'; methods = prepares_source_data(data, input_dir)
+        with patch.object(builds.data_preprocessing, 'downloads_data_from_gcs_bucket'), \
+                patch.object(builds.data_preprocessing, 'uploads_data_to_gcs_bucket'):
+            for method, args in methods:
+                loop_output = runs_method(baseline, data, input_dir, method, args)[1]
+                self.assertEqual(loop_output, runs_method(builds.data_preprocessing, data, input_dir, method, args)[1],
+                                 method)
+
+        return None
+
+    def test_creates_disease_identifier_mappings(self):
+        """Tests the creates_disease_identifier_mappings method when a vocabulary code is mapped to several CUIs."""
+
+        preprocessor = DataPreprocessing(None, self.dir_loc + '/original_data', self.dir_loc + '/processed_data',
+                                         self.dir_loc + '/temp')
+        preprocessor.reads_gcs_bucket_data_to_df = lambda f_name, **kwargs: pandas.DataFrame({
+            'diseaseId': ['C0000001', 'C0000001', 'C0000001', 'C0000002', 'C0000002', 'C0000003'],
+            'vocabulary': ['HPO', 'ICD10', 'ICD10', 'MONDO', 'ICD10', 'ICD10'],
+            'code': ['HP:0000001', 'A01', 'B01', '0000002', 'A01', 'A03']})
+        preprocessor._preprocess_mondo_mapping_data = lambda: {'umls:c0000003': {'MONDO:0000003'}}
+        preprocessor._preprocess_hpo_mapping_data = lambda: dict()
+        preprocessor.creates_disease_identifier_mappings()
+
+        # test the code mapped to both CUIs is mapped to the identifiers of each, without adding them to B01
+        with open(self.dir_loc + '/processed_data/DISEASE_MONDO_MAP.txt') as f:
+            self.assertEqual(['A01\tMONDO_0000002\n', 'C0000003\tMONDO_0000003\n'], sorted(f.readlines()))
+        with open(self.dir_loc + '/processed_data/PHENOTYPE_HPO_MAP.txt') as f:
+            self.assertEqual(['A01\tHP_0000001\n', 'B01\tHP_0000001\n', 'C0000001\tHP_0000001\n'],
+                             sorted(f.readlines()))
+
+        return None
+
+    def test_cross_maps_genomic_identifier_data(self):
+        """Tests the _cross_maps_genomic_identifier_data method returns the same mapping as the row-wise version it
+        replaced, both as a dict and as a columnar adjacency table."""
+
+        try: baseline = loads_baseline_module(row_wise_revision)
+        except subprocess.CalledProcessError: self.skipTest('revision {} is not available'.format(row_wise_revision))
+
+        merged_data = pandas.DataFrame({
+            'ensembl_gene_id': ['ENSG1', 'ENSG1', 'ENSG2', 'None', 'ENSG3'],
+            'transcript_stable_id': ['ENST1', 'ENST2', 'ENST3|None', 'ENST4', 'None'],
+            'uniprot_id': ['P1', 'P1|P2', 'None', 'unknown', ''],
+            'entrez_id': ['1', '1', '2', '4', 'None'],
+            'symbol': ['A', 'A', 'B', 'D', 'None'],
+            'master_gene_type': ['protein-coding', 'protein-coding', 'unknown', 'ncRNA', 'unknown']})
+        mappings = []
+        for module in [baseline, builds.data_preprocessing]:
+            preprocessor = module.DataPreprocessing(None, self.dir_loc + '/original_data',
+                                                    self.dir_loc + '/processed_data', self.dir_loc + '/temp')
+            preprocessor._fixes_genomic_symbols = lambda: merged_data.copy()
+            mappings.append(preprocessor._cross_maps_genomic_identifier_data())
+        row_wise = {k: set(v) for k, v in mappings[0].items()}
+        self.assertEqual(row_wise, {k: set(v) for k, v in mappings[1].items()})
+        self.assertEqual(len(row_wise), len(mappings[1]))
+        self.assertEqual({'entrez_id_1', 'master_gene_type_protein-coding', 'symbol_A', 'transcript_stable_id_ENST1',
+                          'transcript_stable_id_ENST2', 'uniprot_id_P1', 'uniprot_id_P1|P2'},
+                         row_wise['ensembl_gene_id_ENSG1'])
+
+        # test columnar output
+        preprocessor._fixes_genomic_symbols = lambda: merged_data.copy()
+        columnar = preprocessor._cross_maps_genomic_identifier_data(columnar=True)
+        self.assertEqual(['key', 'value'], list(columnar.columns))
+        self.assertFalse(columnar.duplicated().any())
+        self.assertEqual(row_wise, columnar.groupby('key')['value'].agg(set).to_dict())
+
+        return None
+
+    def test_finds_reachable_nodes(self):
+        """Tests the _finds_reachable_nodes and _labels_connected_components methods match networkx on graphs with
+        several components, self-loops, cycles, and isolated nodes."""
+
+        # nodes 0-3 are a chain with a self-loop, 4-6 a cycle, 7-8 a separate edge, and 9 and 10 are isolated
+        edges = [(0, 1), (1, 2), (2, 2), (3, 1), (4, 5), (5, 6), (6, 4), (7, 8), (10, 10)]
+        graphs = [(edges, 11)]
+        rng = numpy.random.default_rng(1)
+        for node_count in [1, 25, 100]:  # random graphs
+            graphs += [(rng.integers(0, node_count, (node_count, 2)).tolist(), node_count)]
+        for edges, node_count in graphs:
+            nx_graph = networkx.MultiDiGraph(); nx_graph.add_nodes_from(range(node_count))
+            nx_graph.add_edges_from(edges)
+            heads, tails = numpy.array([x[0] for x in edges], dtype=int), numpy.array([x[1] for x in edges], dtype=int)
+            for seed_list in [[0], [3, 9], list(range(0, node_count, 4))]:
+                seeds = numpy.array([x for x in seed_list if x < node_count], dtype=int)
+                bfs_edges = [e for x in seeds.tolist() for e in networkx.edge_bfs(nx_graph, x)]
+                expected = set(seeds.tolist()) | {x for e in bfs_edges for x in e[:2]}
+                reached = DataPreprocessing._finds_reachable_nodes(heads, tails, seeds, node_count)
+                self.assertEqual(expected, set(numpy.flatnonzero(reached).tolist()))
+            labels = DataPreprocessing._labels_connected_components(heads, tails, node_count).tolist()
+            components = networkx.connected_components(nx_graph.to_undirected())
+            self.assertEqual({min(x): x for x in components},
+                             {x: {i for i in range(node_count) if labels[i] == x} for x in set(labels)})
+
+        return None
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+        # remove temp directory
+        shutil.rmtree(self.dir_loc)
+
+        return None
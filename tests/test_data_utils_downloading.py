@@ -8,7 +8,9 @@ import unittest
 import urllib3
 
 from contextlib import closing
+from io import BytesIO
 from urllib.request import urlopen
+from zipfile import ZipFile
 
 from pkt_kg.utils import *
 
@@ -97,6 +99,11 @@ class TestDataUtilsDownloading(unittest.TestCase):
         r = requests.get(self.url, allow_redirects=True)
         self.assertFalse(r.ok)
 
+        # test that the error page is not saved
+        filename = self.url.split('/')[-1]
+        self.assertRaises(requests.HTTPError, url_download, self.url, self.write_location, filename)
+        self.assertFalse(os.path.exists(self.write_location + filename))
+
         return None
 
     @responses.activate
@@ -252,6 +259,67 @@ class TestDataUtilsDownloading(unittest.TestCase):
 
         return None
 
+    @responses.activate
+    def test_gzipped_url_download_keep_compressed(self):
+        """Tests gzipped_url_download method when keeping the downloaded data compressed."""
+
+        # fake file connection
+        responses.add(responses.GET, self.gzipped_url, body=gzip.compress(b'test data'), status=200,
+                      content_type='gzip')
+
+        # test method
+        gzipped_url_download(self.gzipped_url, self.write_location, 'disease_mappings.tsv', keep_compressed=True)
+        self.assertFalse(os.path.exists(self.write_location + 'disease_mappings.tsv'))
+        self.assertTrue(os.path.exists(self.write_location + 'disease_mappings.tsv.gz'))
+        with opens_data_file(self.write_location + 'disease_mappings.tsv.gz') as f:
+            self.assertEqual('test data', f.read())
+
+        return None
+
+    @responses.activate
+    def test_zipped_url_download_keep_compressed(self):
+        """Tests zipped_url_download method when keeping the downloaded data compressed."""
+
+        # fake file connection
+        zip_data = BytesIO()
+        with ZipFile(zip_data, 'w') as zip_file: zip_file.writestr('ReactomePathways.gmt', 'test data')
+        responses.add(responses.GET, self.zipped_url, body=zip_data.getvalue(), status=200,
+                      content_type='application/zip')
+
+        # test method
+        zipped_url_download(self.zipped_url, self.write_location, keep_compressed=True)
+        self.assertFalse(os.path.exists(self.write_location + 'ReactomePathways.gmt'))
+        self.assertTrue(os.path.exists(self.write_location + 'ReactomePathways.gmt.zip'))
+        with opens_data_file(self.write_location + 'ReactomePathways.gmt.zip') as f:
+            self.assertEqual('test data', f.read())
+
+        return None
+
+    def test_opens_data_file(self):
+        """Tests opens_data_file method."""
+
+        # plain text data
+        with opens_data_file(self.dir_loc + '/hgnc_complete_set.txt') as f: self.assertEqual('None', f.read())
+
+        # gzipped data
+        with opens_data_file(self.dir_loc + '/variant_summary.txt.gz') as f:
+            self.assertEqual('Lots of content here', f.read())
+
+        # zipped data with more than one file
+        with ZipFile(self.dir_loc + '/data.txt.zip', 'w') as zip_file:
+            zip_file.writestr('other.txt', 'other data'); zip_file.writestr('data.txt', 'test data')
+        with opens_data_file(self.dir_loc + '/data.txt.zip') as f: self.assertEqual('test data', f.read())
+        shutil.copyfile(self.dir_loc + '/data.txt.zip', self.dir_loc + '/edge_data.txt.zip')
+        with opens_data_file(self.dir_loc + '/edge_data.txt.zip') as f: self.assertEqual('test data', f.read())
+        with ZipFile(self.dir_loc + '/unknown.zip', 'w') as zip_file:
+            zip_file.writestr('other.txt', 'other data'); zip_file.writestr('data.txt', 'test data')
+        self.assertRaises(ValueError, opens_data_file, self.dir_loc + '/unknown.zip')
+        shutil.copyfile(self.dir_loc + '/data.txt.zip', self.dir_loc + '/metadata.txt.zip')  # not named after archive
+        self.assertRaises(ValueError, opens_data_file, self.dir_loc + '/metadata.txt.zip')
+        with opens_data_file(self.dir_loc + '/data.txt.zip', binary=True) as f: self.assertEqual(b'test data', f.read())
+
+        return None
+
     def test_data_downloader(self):
         """Tests data_downloader method."""
 
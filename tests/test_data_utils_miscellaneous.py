@@ -1,3 +1,4 @@
+import gzip
 import os.path
 import pandas
 import random
@@ -79,6 +80,88 @@ class TestDataUtilsMisc(unittest.TestCase):
 
         return None
 
+    def test_genomic_id_indexer(self):
+        """Tests the genomic_id_indexer method."""
+
+        prefixes = ['entrez_id', 'ensembl_gene_id', 'gene_type_update']
+        key_index, value_index = genomic_id_indexer(self.genomic_id_dict, prefixes)
+        self.assertEqual(['entrez_id_57147', 'entrez_id_7105'], sorted(key_index['entrez_id']))
+        self.assertEqual([], key_index['gene_type_update'])
+        self.assertEqual(['entrez_id_7105'], value_index['entrez_id']['ensembl_gene_id_ENSG00000000003'])
+        self.assertNotIn('entrez_id_7105', value_index['entrez_id'].keys())
+        self.assertEqual(4, len(value_index['gene_type_update']))
+
+        # reuse index when mapping identifiers
+        write_location = self.dir_loc + '/genomic_maps.txt'
+        genomic_id_mapper(self.genomic_id_dict, write_location, 'entrez_id', 'ensembl_gene_id', 'gene_type_update',
+                          'gene_type_update', 'gene_type_update', 'gene_type_update', (key_index, value_index))
+        with open(write_location) as f: data = sorted(f.readlines())
+        self.assertEqual(['57147\tENSG00000000457' + '\tprotein-coding' * 4 + '\n',
+                          '7105\tENSG00000000003' + '\tprotein-coding' * 4 + '\n'], data)
+
+        return None
+
+    def test_genomic_id_map(self):
+        """Tests the writes_genomic_id_map method and the GenomicIdMap class."""
+
+        filepath = self.dir_loc + '/genomic_maps.idmap'
+        writes_genomic_id_map(self.genomic_id_dict.items(), filepath)
+        id_map = GenomicIdMap(filepath)
+        self.assertEqual(4, len(id_map))
+        self.assertEqual(list(self.genomic_id_dict.keys()), list(id_map))
+        self.assertEqual(self.genomic_id_dict, dict(id_map.items()))
+        self.assertEqual(["entrez_id_7105", "gene_type_update_protein-coding"],
+                         id_map['ensembl_gene_id_ENSG00000000003'])
+        self.assertIn('entrez_id_57147', id_map)
+        self.assertNotIn('entrez_id_1', id_map)
+        self.assertRaises(KeyError, id_map.__getitem__, 'entrez_id_1')
+        self.assertIsNone(id_map.get('ensembl_gene_id'))
+
+        # test mapping identifiers from the map
+        genomic_id_mapper(id_map, self.dir_loc + '/genomic_maps.txt', 'entrez_id', 'ensembl_gene_id',
+                          'gene_type_update', 'gene_type_update', 'gene_type_update', 'gene_type_update')
+        with open(self.dir_loc + '/genomic_maps.txt') as f: data = sorted(f.readlines())
+        self.assertEqual(['57147\tENSG00000000457' + '\tprotein-coding' * 4 + '\n',
+                          '7105\tENSG00000000003' + '\tprotein-coding' * 4 + '\n'], data)
+
+        # test empty map and a file that is not a map
+        writes_genomic_id_map([], filepath)
+        self.assertEqual(0, len(GenomicIdMap(filepath)))
+        self.assertNotIn('entrez_id_7105', GenomicIdMap(filepath))
+        self.assertRaises(ValueError, GenomicIdMap, self.dir_loc + '/../INVERSE_RELATIONS.txt')
+        with open(filepath, 'w') as f: f.write('Not Found')
+        self.assertRaises(ValueError, GenomicIdMap, filepath)
+
+        return None
+
+    def test_reads_gtf_records(self):
+        """Tests the reads_gtf_records method."""
+
+        gene = '1\thavana\tgene\t1\t10\t.\t+\t.\tgene_id "ENSG1"; gene_name "A1BG"; gene_biotype "protein_coding";\n'
+        transcript = '1\thavana\t{}\t1\t10\t.\t+\t.\tgene_id "ENSG1"; transcript_id "ENST{}"; gene_name "A1BG"; ' + \
+                     'gene_biotype "protein_coding"; transcript_biotype "{}"; tag "basic";\n'
+        data = ['#!genome-build GRCh38.p13\n', gene, transcript.format('transcript', 1, 'protein_coding'),
+                transcript.format('exon', 1, 'protein_coding'), transcript.format('transcript', 2, 'lncRNA')]
+        with open(self.dir_loc + '/genes.gtf', 'w') as f: f.write(''.join(data * 50))
+        with gzip.open(self.dir_loc + '/genes.gtf.gz', 'wt') as f: f.write(''.join(data * 50))
+        attributes = ['gene_id', 'transcript_id', 'transcript_biotype', 'transcript_name']
+
+        # test reading transcript records
+        records = reads_gtf_records(self.dir_loc + '/genes.gtf', ['transcript'], attributes)
+        self.assertEqual(['feature'] + attributes, list(records.columns))
+        self.assertEqual(100, len(records))
+        self.assertEqual(['transcript', 'ENSG1', 'ENST2', 'lncRNA', None], list(records.iloc[1]))
+
+        # test reading gene and transcript records in parallel and from a gzipped file
+        records = reads_gtf_records(self.dir_loc + '/genes.gtf', ['gene', 'transcript'], attributes)
+        self.assertEqual(['gene', 'transcript', 'transcript'] * 50, list(records['feature']))
+        self.assertTrue(records.equals(reads_gtf_records(self.dir_loc + '/genes.gtf', ['gene', 'transcript'],
+                                                         attributes, cpus=3)))
+        self.assertTrue(records.equals(reads_gtf_records(self.dir_loc + '/genes.gtf.gz', ['gene', 'transcript'],
+                                                         attributes, cpus=3)))
+
+        return None
+
     def test_outputs_dictionary_data(self):
         """Tests the outputs_dictionary_data method."""
 
@@ -1,4 +1,6 @@
 import glob
+import gzip
+import json
 import logging
 import os.path
 import pandas
@@ -9,8 +11,9 @@ import unittest
 import warnings
 
 from typing import List, Tuple
+from zipfile import ZipFile
 
-from pkt_kg.edge_list import CreatesEdgeList
+from pkt_kg.edge_list import CreatesEdgeList, pa
 
 
 class TestCreatesEdgeList(unittest.TestCase):
@@ -105,6 +108,26 @@ class TestCreatesEdgeList(unittest.TestCase):
 
         return None
 
+    def test_data_reader_compressed(self):
+        """Tests the data_reader method when reading gzipped and zipped data."""
+
+        file_path = self.edge_data_files['gene-disease']
+        with open(file_path, 'rb') as f_in, gzip.open(self.dir_loc + '/gene-disease.tsv.gz', 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        with ZipFile(self.dir_loc + '/gene-disease_disease.tsv.zip', 'w') as zip_file:  # named as by LinkedData
+            zip_file.write(file_path, 'disease.tsv'); zip_file.writestr('README.txt', 'gene-disease data')
+
+        # test method
+        df = self.master_edge_list.data_reader(file_path, 't')
+        try:
+            for f_name in ['gene-disease.tsv.gz', 'gene-disease_disease.tsv.zip']:
+                compressed_df = self.master_edge_list.data_reader(self.dir_loc + '/' + f_name, 't')
+                self.assertEqual(df.values.tolist(), compressed_df.values.tolist())
+        finally:
+            os.remove(self.dir_loc + '/gene-disease.tsv.gz'); os.remove(self.dir_loc + '/gene-disease_disease.tsv.zip')
+
+        return None
+
     def test_filter_fixer(self):
         """Tests the filter_fixer method."""
 
@@ -305,6 +328,51 @@ class TestCreatesEdgeList(unittest.TestCase):
 
         return None
 
+    def tests_backend_errors(self):
+        """Tests the backend argument when initializing the class."""
+
+        file_loc = self.dir_loc + '/resource_info.txt'
+        self.assertRaises(ValueError, CreatesEdgeList, self.edge_data_files, file_loc, 'spark')
+
+        return None
+
+    @unittest.skipIf(pa is None, 'pyarrow is not installed')
+    def tests_pyarrow_backend(self):
+        """Tests that the pyarrow backend produces the same results as the pandas backend."""
+
+        arrow_edge_list = CreatesEdgeList(self.edge_data_files, self.dir_loc + '/resource_info.txt', 'pyarrow')
+        for x in self.edge_data_files.keys():
+            arrow_edge_list.source_info[x]['identifier_maps'] = self.master_edge_list.source_info[x]['identifier_maps']
+        self.assertEqual('pyarrow', arrow_edge_list.backend)
+
+        # reduce and format data
+        df = self.master_edge_list.data_reader(self.edge_data_files['chemical-disease'], 't')
+        pandas_df = self.master_edge_list.data_reducer('1;4', df.copy())
+        arrow_df = arrow_edge_list.data_reducer('1;4', arrow_edge_list.converts_to_arrow(df))
+        self.assertIsInstance(arrow_df, pa.Table)
+        self.assertEqual(pandas_df.astype(str).values.tolist(), [list(x.values()) for x in arrow_df.to_pylist()])
+        self.assertEqual(arrow_df, arrow_edge_list.data_reducer('0;1', arrow_edge_list.converts_to_arrow(df, '1;4')))
+        pandas_df = self.master_edge_list.label_formatter(pandas_df, ':;MESH_;')
+        arrow_df = arrow_edge_list.label_formatter(arrow_df, ':;MESH_;')
+        self.assertEqual(pandas_df.astype(str).values.tolist(), [list(x.values()) for x in arrow_df.to_pylist()])
+        self.assertTrue(all(x.startswith('MESH_') for x in arrow_df.column(0).to_pylist()))
+
+        # map data
+        mapping_data = self.master_edge_list.source_info['chemical-disease']['identifier_maps']
+        pandas_df.columns, arrow_df = ['1-chemical', '4-disease'], arrow_df.rename_columns(['1-chemical', '4-disease'])
+        self.assertEqual(sorted(self.master_edge_list.process_mapping_data(mapping_data, pandas_df)),
+                         sorted(arrow_edge_list.process_mapping_data(mapping_data, arrow_df)))
+        self.assertEqual(self.master_edge_list.process_mapping_data('None', pandas_df),
+                         arrow_edge_list.process_mapping_data('None', arrow_df))
+
+        # create edges
+        for x in self.edge_data_files.keys():
+            self.master_edge_list.creates_knowledge_graph_edges(x); arrow_edge_list.creates_knowledge_graph_edges(x)
+            self.assertEqual(sorted(self.master_edge_list.source_info[x]['edge_list']),
+                             sorted(arrow_edge_list.source_info[x]['edge_list']))
+
+        return None
+
     def tests_gets_entity_namespaces(self):
         """Tests gets_entity_namespaces method."""
 
@@ -347,6 +415,21 @@ class TestCreatesEdgeList(unittest.TestCase):
 
         return None
 
+    def tests_schedules_edge_types(self):
+        """Tests the gets_edge_type_size and schedules_edge_types methods."""
+
+        # edge size includes mapping data
+        data_size = os.path.getsize(self.edge_data_files['gene-disease'])
+        map_size = os.path.getsize(self.dir_loc + '/DISEASE_DOID_MAP.txt')
+        self.assertEqual(data_size + map_size, self.master_edge_list.gets_edge_type_size('gene-disease'))
+
+        # largest edge type is scheduled first
+        sizes = {x: self.master_edge_list.gets_edge_type_size(x) for x in self.edge_data_files.keys()}
+        expected = sorted(sizes.keys(), key=lambda x: sizes[x], reverse=True)
+        self.assertEqual(expected, self.master_edge_list.schedules_edge_types(['chemical-disease', 'gene-disease']))
+
+        return None
+
     def tests_constructs_edge_list(self):
         """Tests the constructs_edge_list method."""
 
@@ -365,10 +448,89 @@ class TestCreatesEdgeList(unittest.TestCase):
 
         return None
 
+    def tests_constructs_edge_list_partial_results(self):
+        """Tests the constructs_edge_list method when resuming from partial results."""
+
+        # create partial results for both edge types
+        self.master_edge_list.creates_knowledge_graph_edges('chemical-disease')
+        self.master_edge_list.creates_knowledge_graph_edges('gene-disease')
+        partial_file = self.dir_loc + '/Master_Edge_List_Dict_partial.jsonl'
+        edge_lists = CreatesEdgeList(self.edge_data_files, self.dir_loc + '/resource_info.txt')
+        with open(partial_file, 'w') as out:
+            for x in self.edge_data_files.keys():
+                inputs_hash = edge_lists.hashes_edge_type_inputs(x)
+                out.write(json.dumps({x: self.master_edge_list.source_info[x], '__inputs__': inputs_hash}) + '\n')
+            out.write('{"truncated')
+
+        # test method -- no edge types should need to be rebuilt
+        ray.init(ignore_reinit_error=True)
+        self.master_edge_list.runs_creates_knowledge_graph_edges(self.dir_loc + '/resource_info.txt',
+                                                                 self.edge_data_files,
+                                                                 cpus=2)
+        ray.shutdown()
+        self.assertFalse(os.path.exists(partial_file))
+        with open(self.dir_loc + '/Master_Edge_List_Dict.json', 'r') as f: master_edges = json.load(f)
+        self.assertIn('gene-disease', master_edges.keys())
+        self.assertIn(['19', 'DOID_1936'], master_edges['gene-disease']['edge_list'])
+
+        return None
+
+    def tests_constructs_edge_list_stale_partial_results(self):
+        """Tests the constructs_edge_list method when the partial results of an edge type were created from different
+        inputs."""
+
+        # point the resource info mapping files at the data directory
+        source_file = self.dir_loc + '/resource_info_stale.txt'
+        with open(self.dir_loc + '/resource_info.txt', 'r') as f: resource_info = f.read()
+        with open(source_file, 'w') as out:
+            out.write(resource_info.replace(':MESH_', ':' + self.dir_loc + '/MESH_').replace(
+                ':DISEASE_', ':' + self.dir_loc + '/DISEASE_'))
+
+        # create partial results with a current and a stale edge list
+        partial_file = self.dir_loc + '/Master_Edge_List_Dict_partial.jsonl'
+        edge_lists = CreatesEdgeList(self.edge_data_files, source_file)
+        current = {'chemical-disease': {'edge_list': [['current', 'edge']]},
+                   '__inputs__': edge_lists.hashes_edge_type_inputs('chemical-disease')}
+        stale = {'gene-disease': {'edge_list': [['stale', 'edge']]}, '__inputs__': 'stale'}
+        with open(partial_file, 'w') as out:
+            out.write(json.dumps(current) + '\n' + json.dumps(stale) + '\n')
+
+        # test method -- only the stale edge type should be discarded and rebuilt
+        ray.init(ignore_reinit_error=True)
+        try: self.master_edge_list.runs_creates_knowledge_graph_edges(source_file, self.edge_data_files, cpus=2)
+        finally: ray.shutdown(); os.remove(source_file)
+        self.assertFalse(os.path.exists(partial_file))
+        with open(self.dir_loc + '/Master_Edge_List_Dict.json', 'r') as f: master_edges = json.load(f)
+        self.assertEqual([['current', 'edge']], master_edges['chemical-disease']['edge_list'])
+        self.assertNotIn(['stale', 'edge'], master_edges['gene-disease']['edge_list'])
+        self.assertIn(['19', 'DOID_1936'], master_edges['gene-disease']['edge_list'])
+
+        return None
+
+    def tests_hashes_edge_type_inputs(self):
+        """Tests the hashes_edge_type_inputs method."""
+
+        inputs_hash = self.master_edge_list.hashes_edge_type_inputs('gene-disease')
+        self.assertEqual(inputs_hash, self.master_edge_list.hashes_edge_type_inputs('gene-disease'))
+        self.assertNotEqual(inputs_hash, self.master_edge_list.hashes_edge_type_inputs('chemical-disease'))
+
+        # test changing the modification time of the input data only changes the hash of its edge type
+        chemical_hash = self.master_edge_list.hashes_edge_type_inputs('chemical-disease')
+        file_stat = os.stat(self.edge_data_files['gene-disease'])
+        try:
+            os.utime(self.edge_data_files['gene-disease'], ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 10 ** 9))
+            self.assertNotEqual(inputs_hash, self.master_edge_list.hashes_edge_type_inputs('gene-disease'))
+            self.assertEqual(chemical_hash, self.master_edge_list.hashes_edge_type_inputs('chemical-disease'))
+        finally: os.utime(self.edge_data_files['gene-disease'], ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+
+        return None
+
     def tearDown(self):
         warnings.simplefilter('default', ResourceWarning)
 
         shutil.copyfile(self.dir_loc + '/edge_data/Master_Edge_List_Dict.json',
                         self.dir_loc + '/Master_Edge_List_Dict.json')
+        if os.path.exists(self.dir_loc + '/Master_Edge_List_Dict_partial.jsonl'):
+            os.remove(self.dir_loc + '/Master_Edge_List_Dict_partial.jsonl')
 
         return None
@@ -3,6 +3,7 @@ import logging
 import os
 import os.path
 import pickle
+import sqlite3
 import unittest
 
 from rdflib import Graph, Namespace
@@ -78,6 +79,82 @@ class TestMetadata(unittest.TestCase):
 
         return None
 
+    def test_metadata_processor_store(self):
+        """Tests the metadata_processor method when using the on-disk metadata store."""
+
+        self.metadata = Metadata(kg_version='v2.0.0', write_location=self.dir_loc,
+                                 kg_location=self.dir_loc + '/ontologies/so_with_imports.owl',
+                                 node_data=glob.glob(self.dir_loc + '/node_data/*dict.pkl'),
+                                 node_dict=dict())
+        self.metadata.metadata_processor(store=True)  # load store
+
+        # make sure that the store was created and matches the dictionary
+        self.assertTrue(os.path.exists(self.dir_loc + '/node_data/node_metadata_dict.db'))
+        self.assertIsInstance(self.metadata.store, MetadataStore)
+        self.assertIsInstance(self.metadata.node_dict['nodes'], MetadataView)
+        self.assertTrue(len(self.metadata.node_dict['nodes']) == 21)
+        self.assertTrue(len(self.metadata.node_dict['relations']) == 20)
+        node_key = 'http://www.ncbi.nlm.nih.gov/gene/1'
+        self.assertIn(node_key, self.metadata.node_dict['nodes'])
+        self.assertIn('Label', self.metadata.node_dict['nodes'][node_key].keys())
+        self.assertNotIn('http://www.ncbi.nlm.nih.gov/gene/None', self.metadata.node_dict['nodes'])
+
+        # check that the metadata can be used to create node metadata
+        updated_graph = self.metadata.creates_node_metadata(ent=[node_key, 'http://www.ncbi.nlm.nih.gov/gene/2'],
+                                                            e_type=['entity', 'class'])
+        self.assertTrue(len(updated_graph) == 8)
+
+        # check that an existing store is reused
+        modified_time = os.path.getmtime(self.dir_loc + '/node_data/node_metadata_dict.db')
+        self.metadata.metadata_processor(store=True)
+        self.assertEqual(modified_time, os.path.getmtime(self.dir_loc + '/node_data/node_metadata_dict.db'))
+
+        return None
+
+    def test_metadata_store(self):
+        """Tests the MetadataStore class."""
+
+        store = MetadataStore(self.dir_loc + '/node_data/node_metadata_dict.db')
+        store.updates('nodes', {'http://example/1': {'Label': 'label\n  1', 'Description': None, 'Synonym': 'a|b'},
+                                'http://example/2': {'Label': 'label 2', 'Description': 'desc', 'Synonym': None}})
+
+        # point and batch lookups
+        self.assertEqual(store.gets('nodes', 'http://example/1'),
+                         {'Label': 'label 1', 'Description': None, 'Synonym': 'a|b'})
+        self.assertIsNone(store.gets('relations', 'http://example/1'))
+        self.assertEqual(set(store.gets_batch('nodes', ['http://example/1', 'http://example/2', 'http://example/3'],
+                                              batch=1).keys()), {'http://example/1', 'http://example/2'})
+        self.assertTrue(store.counts('nodes') == 2)
+
+        # incremental updates through a view
+        view = store.view('nodes'); view['http://example/3'] = {'Label': 'label 3', 'Description': None,
+                                                                 'Synonym': None}
+        self.assertTrue(len(view) == 3); del view['http://example/3']
+        self.assertNotIn('http://example/3', view)
+
+        # make sure that whole records are stored
+        store.updates('relations', {'http://example/4': {'Label': 'label 4', 'Description': None, 'Synonym': None,
+                                                         'dbXref': 'DB:4'}})
+        self.assertEqual(store.gets('relations', 'http://example/4')['dbXref'], 'DB:4')
+        node_dict = {'nodes': store.gets_batch('nodes', ['http://example/1', 'http://example/2']),
+                     'relations': store.gets_batch('relations', ['http://example/4'])}
+        self.assertEqual(store.dumps_dict(), node_dict)
+
+        # make sure the store can be pickled and reopened
+        store_copy = pickle.loads(pickle.dumps(store))
+        self.assertEqual(store_copy.gets('nodes', 'http://example/2')['Description'], 'desc')
+        self.assertFalse(MetadataStore(store.filepath).created)
+
+        # make sure that a store written with an older schema is recreated
+        conn = sqlite3.connect(self.dir_loc + '/node_data/node_metadata_dict_old.db')
+        conn.execute('CREATE TABLE metadata (key_type TEXT, uri TEXT, label TEXT, description TEXT, synonym TEXT)')
+        conn.commit(); conn.close()
+        old_store = MetadataStore(self.dir_loc + '/node_data/node_metadata_dict_old.db')
+        self.assertTrue(old_store.created); self.assertTrue(old_store.counts('nodes') == 0)
+        old_store.connection().close(); os.remove(old_store.filepath)
+
+        return None
+
     def test_creates_node_metadata_nodes(self):
         """Tests the creates_node_metadata method."""
 
@@ -170,6 +247,57 @@ class TestMetadata(unittest.TestCase):
 
         return None
 
+    def test_creates_node_metadata_emit_once(self):
+        """Tests the creates_node_metadata method when the emission cache is used."""
+
+        self.metadata.node_data = [self.metadata.node_data[0].replace('.pkl', '_test.pkl')]
+        self.metadata.extract_metadata(self.graph)
+        ents = ['http://www.ncbi.nlm.nih.gov/gene/1', 'http://www.ncbi.nlm.nih.gov/gene/2']
+
+        # first call emits the triples for both nodes
+        updated_graph_1 = self.metadata.creates_node_metadata(ent=ents, e_type=['entity', 'entity'], emit_once=True)
+        self.assertTrue(len(updated_graph_1) == 16)
+        self.assertIn(('nodes', 'http://www.ncbi.nlm.nih.gov/gene/1'), self.metadata.emitted)
+
+        # repeated calls return an empty list (not None) since the nodes still have metadata
+        updated_graph_2 = self.metadata.creates_node_metadata(ent=ents, e_type=['entity', 'class'], emit_once=True)
+        self.assertEqual(updated_graph_2, [])
+
+        # nodes without metadata still return None
+        updated_graph_3 = self.metadata.creates_node_metadata(ent=['http://www.ncbi.nlm.nih.gov/gene/None',
+                                                                   'http://www.ncbi.nlm.nih.gov/gene/None'],
+                                                              e_type=['entity', 'entity'], emit_once=True)
+        self.assertTrue(updated_graph_3 is None)
+
+        # the cache is not used by default
+        updated_graph_4 = self.metadata.creates_node_metadata(ent=ents, e_type=['entity', 'class'])
+        self.assertTrue(len(updated_graph_4) == 8)
+
+        return None
+
+    def test_creates_bulk_node_metadata(self):
+        """Tests the creates_bulk_node_metadata method."""
+
+        self.metadata.node_data = [self.metadata.node_data[0].replace('.pkl', '_test.pkl')]
+        self.metadata.extract_metadata(self.graph)
+        ents = {'http://www.ncbi.nlm.nih.gov/gene/1', 'http://www.ncbi.nlm.nih.gov/gene/2',
+                'http://www.ncbi.nlm.nih.gov/gene/None'}
+
+        # test bulk creation matches the per-edge method
+        updated_graph_1 = self.metadata.creates_bulk_node_metadata(ents)
+        updated_graph_2 = self.metadata.creates_node_metadata(ent=sorted(ents)[0:2], e_type=['entity', 'entity'])
+        self.assertEqual(set(updated_graph_1), set(updated_graph_2))
+
+        # test emission cache
+        self.assertTrue(len(self.metadata.creates_bulk_node_metadata(ents, emit_once=True)) == 16)
+        self.assertEqual(self.metadata.creates_bulk_node_metadata(ents, emit_once=True), [])
+
+        # test when node_dict is None
+        self.metadata.node_dict = None
+        self.assertEqual(self.metadata.creates_bulk_node_metadata(ents), [])
+
+        return None
+
     def test_extract_metadata(self):
         """Tests the extract_metadata data."""
 
@@ -198,6 +326,51 @@ class TestMetadata(unittest.TestCase):
 
         return None
 
+    def test_extract_metadata_store(self):
+        """Tests the extract_metadata method when using the on-disk metadata store."""
+
+        test_data = self.metadata.node_data[0].replace('.pkl', '_test.pkl')
+        pickle.dump(self.metadata.node_dict, open(test_data, 'wb'))
+        org_modified_time = os.path.getmtime(test_data)
+        self.metadata.node_data = [test_data]
+        self.metadata.metadata_processor(store=True)
+        self.metadata.extract_metadata(graph=self.graph)
+
+        # check that the store was updated and the pickled dictionary was not
+        node_key = 'http://purl.obolibrary.org/obo/SO_0000373'
+        self.assertTrue(len(self.metadata.node_dict['nodes']) == 2462)
+        self.assertIn('Label', self.metadata.store.gets('nodes', node_key))
+        self.assertEqual(org_modified_time, os.path.getmtime(test_data))
+        self.assertNotIn(node_key, pickle.load(open(test_data, 'rb'))['nodes'])
+
+        # check that the store can be exported to the pickled dictionary and is not rebuilt from it
+        self.metadata.exports_metadata()
+        self.assertEqual(self.metadata.store.dumps_dict(), pickle.load(open(test_data, 'rb')))
+        modified_time = os.path.getmtime(self.metadata.store.filepath)
+        self.metadata.metadata_processor(store=True)
+        self.assertEqual(modified_time, os.path.getmtime(self.metadata.store.filepath))
+        self.assertTrue(len(self.metadata.node_dict['nodes']) == 2462)
+
+        return None
+
+    def test_extract_metadata_parallel(self):
+        """Tests the extract_metadata data when entity partitions are processed in parallel."""
+
+        self.metadata.node_data = [self.metadata.node_data[0].replace('.pkl', '_test.pkl')]
+        self.metadata.extract_metadata(graph=self.graph)
+        serial_dict = self.metadata.node_dict.copy()
+
+        # extract metadata in parallel
+        self.metadata.node_dict = {'nodes': dict(), 'relations': dict()}
+        self.metadata.extract_metadata(graph=self.graph, cpus=2)
+        self.assertTrue(len(self.metadata.node_dict['nodes']) == 2462)
+        self.assertTrue(len(self.metadata.node_dict['relations']) == 72)
+        node_key = 'http://purl.obolibrary.org/obo/SO_0000373'
+        self.assertEqual(self.metadata.node_dict['nodes'][node_key]['Label'], serial_dict['nodes'][node_key]['Label'])
+        self.assertEqual(serial_dict, self.metadata.node_dict)
+
+        return None
+
     def test_output_metadata_graph(self):
         """Tests the output_metadata method when input is an RDFLib Graph object."""
 
@@ -212,7 +385,7 @@ class TestMetadata(unittest.TestCase):
                                          'SO_Triples_Integer_Identifier_Map.json')
 
         # run function
-        self.metadata.output_metadata(node_ints, graph)
+        self.metadata.output_metadata(node_ints)
 
         # make sure that node data wrote out
         self.assertTrue(os.path.exists(self.dir_loc + '/ontologies/so_with_imports_NodeLabels.txt'))
@@ -256,7 +429,7 @@ class TestMetadata(unittest.TestCase):
                                          'SO_Triples_Integer_Identifier_Map.json')
 
         # run function
-        self.metadata.output_metadata(node_ints, set(graph))
+        self.metadata.output_metadata(node_ints)
 
         # make sure that node data wrote out
         self.assertTrue(os.path.exists(self.dir_loc + '/ontologies/so_with_imports_NodeLabels.txt'))
@@ -272,6 +445,40 @@ class TestMetadata(unittest.TestCase):
 
         return None
 
+    def test_output_metadata_integer_map(self):
+        """Tests the output_metadata method when only the node integer map is provided."""
+
+        original_dict = self.metadata.node_dict.copy()
+        self.metadata.write_location = ''  # update environment var
+        self.metadata.metadata_processor()  # load dictionary
+        graph = Graph().parse(self.dir_loc + '/ontologies/so_with_imports.owl')  # load graph
+        filename = self.dir_loc + '/ontologies/'
+
+        # get node integer map
+        node_ints = maps_ids_to_integers(graph, filename, 'SO_Triples_Integers.txt',
+                                         'SO_Triples_Integer_Identifier_Map.json')
+
+        # run function
+        self.metadata.output_metadata(node_ints, batch=100)
+
+        # make sure that node data wrote out in integer order and that the metadata was joined
+        with open(self.dir_loc + '/ontologies/so_with_imports_NodeLabels.txt') as f:
+            rows = [x.split('\t') for x in f.read().splitlines()[1:]]
+        self.assertEqual(len(rows), len(node_ints))
+        self.assertEqual([int(x[1]) for x in rows], sorted(node_ints.values()))
+        self.assertTrue(any(x[0] != 'NA' for x in rows))
+
+        # remove file
+        os.remove(self.dir_loc + '/ontologies/so_with_imports_NodeLabels.txt')
+        os.remove(filename + 'SO_Triples_Integers.txt')
+        os.remove(filename + 'SO_Triples_Identifiers.txt')
+        os.remove(filename + 'SO_Triples_Integer_Identifier_Map.json')
+
+        # write original data
+        pickle.dump(original_dict, open(self.dir_loc + '/node_data/node_metadata_dict.pkl', 'wb'))
+
+        return None
+
     def test_adds_ontology_annotations(self):
         """Tests the adds_ontology_annotations method."""
 
@@ -295,5 +502,6 @@ class TestMetadata(unittest.TestCase):
             test_data_location = glob.glob(self.dir_loc + '/node_data/*_test.pkl')
             if len(test_data_location) > 0:
                 os.remove(test_data_location[0])
+        for db in glob.glob(self.dir_loc + '/node_data/*.db'): os.remove(db)
 
         return None
@@ -0,0 +1,189 @@
+import glob
+import logging
+import os
+import pickle
+import responses
+import shutil
+import unittest
+
+from mock import patch
+from rdflib import BNode, Graph, Literal, Namespace, URIRef
+from rdflib.namespace import OWL, RDF, RDFS
+
+from builds.ontology_cleaning import log, log_dir, OntologyCleaner
+from pkt_kg.utils import GenomicIdMap, writes_genomic_id_map
+
+obo = Namespace('http://purl.obolibrary.org/obo/')
+
+
+def saves_ontology(self):
+    """Replaces the ELK reasoner step, which needs OWLTools, by only saving the cleaned ontology."""
+
+    self.ont_graph.serialize(destination=self.temp_dir + '/' + self.ont_file_location, format='xml')
+
+
+class TestOntologyCleaner(unittest.TestCase):
+    """Class to test the individual ontology cleaning methods of the OntologyCleaner class from the ontology_cleaning
+    script."""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+        # create temporary directory containing small ontologies
+        current_directory = os.path.dirname(__file__)
+        self.dir_loc = os.path.abspath(os.path.join(current_directory, 'data/cleaning'))
+        os.makedirs(self.dir_loc + '/original_data'); self.onts = []
+        for prefix in ['so', 'vo', 'hp']:
+            graph = Graph()
+            for i in range(5):
+                graph.add((obo['{}_{}'.format(prefix.upper(), i)], RDF.type, OWL.Class))
+                graph.add((obo['{}_{}'.format(prefix.upper(), i)], RDFS.label, Literal('{} {}'.format(prefix, i))))
+            graph.add((obo['{}_1'.format(prefix.upper())], OWL.deprecated, Literal(True)))
+            graph.add((obo['{}_2'.format(prefix.upper())], RDF.type, OWL.NamedIndividual))
+            graph.add((obo['PRO_000001'], RDF.type, OWL.Class))
+            graph.add((obo['{}_3'.format(prefix.upper())], RDFS.subClassOf, obo['PRO_000001']))
+            self.onts += ['{}_with_imports.owl'.format(prefix)]
+            graph.serialize(destination=self.dir_loc + '/original_data/' + self.onts[-1], format='xml')
+
+        return None
+
+    def creates_cleaner(self, temp_dir, cpus):
+        """Creates an OntologyCleaner that reads the ontologies from the local original_data directory."""
+
+        os.mkdir(temp_dir); writes_genomic_id_map([], temp_dir + '/Merged_gene_rna_protein_identifiers.idmap')
+        cleaner = OntologyCleaner('', self.dir_loc + '/original_data', self.dir_loc + '/original_data', temp_dir, cpus)
+        cleaner.ontology_info = {x: {} for x in self.onts}
+
+        return cleaner
+
+    @patch.object(OntologyCleaner, '_logically_verifies_cleaned_ontologies', saves_ontology)
+    def test_cleans_individual_ontologies(self):
+        """Tests the cleans_individual_ontologies method when the ontologies are cleaned in 1 and in 2 processes."""
+
+        serial = self.creates_cleaner(self.dir_loc + '/serial', 1)
+        parallel = self.creates_cleaner(self.dir_loc + '/parallel', 2)
+        serial.cleans_individual_ontologies(); parallel.cleans_individual_ontologies()
+
+        # test that the ontologies were cleaned and that running in parallel gives the same results
+        for ont in self.onts:
+            prefix = ont.split('_')[0].upper(); info = parallel.ontology_info[ont]
+            self.assertIn('Final Statistics', info)
+            self.assertEqual({k: v for k, v in serial.ontology_info[ont].items() if 'URL' not in k},
+                             {k: v for k, v in info.items() if 'URL' not in k})
+            graph = Graph().parse(self.dir_loc + '/parallel/' + ont, format='xml')
+            self.assertNotIn(obo[prefix + '_1'], set(graph.subjects()))
+            self.assertNotIn((obo[prefix + '_2'], RDF.type, OWL.NamedIndividual), graph)
+            self.assertIn((obo[prefix + '_3'], RDFS.subClassOf, URIRef(obo + 'PR_000001')), graph)
+        self.assertEqual(0, len(glob.glob(log_dir + '/*_with_imports_' + log)))  # ontology logs merged into build log
+
+        return None
+
+    def creates_ontology_cleaner(self, graph):
+        """Creates an OntologyCleaner with a single ontology graph to clean."""
+
+        cleaner = self.creates_cleaner(self.dir_loc + '/temp', 1)
+        cleaner.ont_file_location, cleaner.ont_graph = 'test_with_imports.owl', graph
+        cleaner.ontology_info = {cleaner.ont_file_location: {}}
+
+        return cleaner
+
+    def test_fixes_identifier_errors(self):
+        """Tests the fixes_identifier_errors method."""
+
+        graph = Graph()
+        for x in ['PRO_000001', 'PR_000002', 'GO_0000001', 'MGO_0000001', 'SO_0000001', 'SOX_0000001']:
+            graph.add((obo[x], RDF.type, OWL.Class))
+        graph.add((obo['PRO_000001'], RDFS.subClassOf, obo['PR_000002']))
+        graph.add((obo['SO_0000001'], RDFS.subClassOf, obo['PRO_000001']))
+        cleaner = self.creates_ontology_cleaner(graph)
+        with patch('builds.ontology_cleaning.logger') as logger: cleaner.fixes_identifier_errors()
+
+        # test only prefixes that start with another prefix are reported (i.e. not MGO, which only contains GO)
+        logger.info.assert_called_with('Possible Identifier Errors: PR-PRO-SO-SOX')
+        # test the PRO identifiers are repaired wherever they are used
+        self.assertEqual(str(obo['PRO_000001']), cleaner.ontology_info['test_with_imports.owl']['IdentifierErrors'])
+        self.assertNotIn(obo['PRO_000001'], set(cleaner.ont_graph.all_nodes()))
+        self.assertIn((obo['PR_000001'], RDF.type, OWL.Class), cleaner.ont_graph)
+        self.assertIn((obo['PR_000001'], RDFS.subClassOf, obo['PR_000002']), cleaner.ont_graph)
+        self.assertIn((obo['SO_0000001'], RDFS.subClassOf, obo['PR_000001']), cleaner.ont_graph)
+        self.assertEqual(len(graph), len(cleaner.ont_graph))
+
+        return None
+
+    def test_fixes_punning_errors(self):
+        """Tests the fixes_punning_errors method."""
+
+        graph = Graph()
+        for x, y in [('SO_1', OWL.Class), ('SO_1', OWL.ObjectProperty), ('SO_2', OWL.Class),
+                     ('SO_2', OWL.NamedIndividual), ('RO_1', OWL.ObjectProperty), ('RO_1', OWL.AnnotationProperty),
+                     ('RO_2', OWL.ObjectProperty), ('RO_2', OWL.AnnotationProperty), ('SO_3', OWL.Class)]:
+            graph.add((obo[x], RDF.type, y))
+        graph.add((obo['RO_1'], RDFS.label, Literal('unused property')))
+        graph.add((obo['SO_3'], RDFS.seeAlso, obo['RO_2']))  # used by a class
+        cleaner = self.creates_ontology_cleaner(graph); cleaner.fixes_punning_errors()
+
+        # test the extra types are removed, as is the object property that is not used by a class or individual
+        info = cleaner.ontology_info['test_with_imports.owl']
+        self.assertEqual({str(obo['SO_1']), str(obo['SO_2'])}, set(info['PunningErrors - Classes'].split(', ')))
+        self.assertEqual({str(obo['RO_1']), str(obo['RO_2'])}, set(info['PunningErrors - ObjectProperty'].split(', ')))
+        self.assertEqual({OWL.Class}, set(cleaner.ont_graph.objects(obo['SO_1'], RDF.type)))
+        self.assertEqual({OWL.Class}, set(cleaner.ont_graph.objects(obo['SO_2'], RDF.type)))
+        self.assertEqual(0, len(list(cleaner.ont_graph.triples((obo['RO_1'], None, None)))))
+        self.assertEqual({OWL.ObjectProperty}, set(cleaner.ont_graph.objects(obo['RO_2'], RDF.type)))
+
+        return None
+
+    def test_removes_deprecated_obsolete_entities(self):
+        """Tests the removes_deprecated_obsolete_entities method, including the anonymous axioms that use the removed
+        classes."""
+
+        graph = Graph(); restriction, axiom = BNode('restriction'), BNode('axiom')
+        for x in ['SO_1', 'SO_2', 'SO_3', 'SO_4']: graph.add((obo[x], RDF.type, OWL.Class))
+        graph.add((obo['SO_1'], OWL.deprecated, Literal(True)))
+        graph.add((obo['SO_2'], RDFS.label, Literal('obsolete sequence feature')))
+        graph.add((obo['SO_3'], RDFS.subClassOf, restriction))  # restriction on a deprecated class
+        graph.add((restriction, RDF.type, OWL.Restriction)); graph.add((restriction, OWL.onProperty, obo['RO_1']))
+        graph.add((restriction, OWL.someValuesFrom, obo['SO_1']))
+        graph.add((axiom, RDF.type, OWL.Axiom)); graph.add((axiom, OWL.annotatedSource, obo['SO_2']))
+        graph.add((axiom, OWL.annotatedTarget, obo['SO_4'])); graph.add((obo['SO_4'], RDFS.subClassOf, obo['SO_3']))
+        cleaner = self.creates_ontology_cleaner(graph); cleaner.removes_deprecated_obsolete_entities()
+
+        # test the removed classes and the restriction and axiom that use them are removed in one batch
+        self.assertEqual({obo['SO_1']}, cleaner.ontology_info['test_with_imports.owl']['Deprecated'])
+        self.assertEqual({(obo['SO_3'], RDF.type, OWL.Class), (obo['SO_4'], RDF.type, OWL.Class),
+                          (obo['SO_4'], RDFS.subClassOf, obo['SO_3'])}, set(cleaner.ont_graph))
+
+        return None
+
+    @responses.activate
+    def test_gets_genomic_id_map(self):
+        """Tests the gets_genomic_id_map method when the current build only publishes the pickled dictionary."""
+
+        url = 'https://storage.googleapis.com/pheknowlator/current_build/data/processed_data/'
+        gene_ids = {'entrez_id_7105': {'ensembl_gene_id_ENSG00000000003', 'gene_type_update_protein-coding'}}
+        responses.add(responses.GET, url + 'Merged_gene_rna_protein_identifiers.idmap', body='Not Found', status=404)
+        responses.add(responses.GET, url + 'Merged_gene_rna_protein_identifiers.pkl', body=pickle.dumps(gene_ids),
+                      status=200)
+
+        # test an error page left by an earlier download is replaced by a map converted from the pickled dictionary
+        with open(self.dir_loc + '/Merged_gene_rna_protein_identifiers.idmap', 'w') as f: f.write('Not Found')
+        cleaner = OntologyCleaner('', self.dir_loc + '/original_data', self.dir_loc + '/original_data', self.dir_loc)
+        self.assertEqual({k: sorted(v) for k, v in gene_ids.items()}, dict(cleaner.gene_ids.items()))
+        self.assertFalse(os.path.exists(self.dir_loc + '/Merged_gene_rna_protein_identifiers.pkl'))
+
+        # test a map in the processed_data directory is used instead of downloading one
+        os.mkdir(self.dir_loc + '/temp'); writes_genomic_id_map([], self.dir_loc + '/original_data/' +
+                                                                'Merged_gene_rna_protein_identifiers.idmap')
+        cleaner = OntologyCleaner('', '', self.dir_loc + '/original_data', self.dir_loc + '/temp')
+        self.assertEqual(0, len(cleaner.gene_ids))
+        self.assertEqual(0, len(GenomicIdMap(cleaner.gets_genomic_id_map())))
+
+        return None
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+        # remove temp directory
+        shutil.rmtree(self.dir_loc)
+
+        return None
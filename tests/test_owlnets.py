@@ -1,17 +1,18 @@
 import glob
 import logging
 import os
+import pickle
 import ray
 import shutil
 import unittest
 import warnings
 
 from rdflib import Graph, BNode, Literal, Namespace, URIRef
-from rdflib.namespace import RDF, RDFS, OWL  # type: ignore
+from rdflib.namespace import RDF, RDFS, OWL, XSD  # type: ignore
 from typing import Dict, List, Set, Tuple
 
-from pkt_kg.owlnets import OwlNets
-from pkt_kg.utils import adds_edges_to_graph
+from pkt_kg.owlnets import OwlNets, EncodedGraph, CLASS, EXCLUDED, OBJECT_PROPERTY, OWL_NS, PROPERTY, SUBCLASS, SUPPORT
+from pkt_kg.utils import adds_edges_to_graph, gets_ontology_classes
 
 # set namespace
 obo = Namespace('http://purl.obolibrary.org/obo/')
@@ -249,6 +250,43 @@ class TestOwlNets(unittest.TestCase):
 
         return None
 
+    def test_classifies_terms(self):
+        """Tests the classifies_terms and classifies_graph_terms methods."""
+
+        # set-up testing data
+        triples = [(obo.SO_0000001, RDF.type, OWL.Class),
+                   (obo.SO_0000003, RDF.type, OWL.Class),
+                   (obo.SO_0000001, RDFS.subClassOf, obo.SO_0000003),
+                   (obo.SO_0000001, obo.RO_0002202, obo.SO_0000003),
+                   (obo.SO_0000001, RDFS.subClassOf, obo.BFO_0000001),
+                   (obo.SO_0000001, obo.IAO_0000115, obo.SO_0000002),
+                   (obo.RO_0002202, RDF.type, OWL.ObjectProperty),
+                   (obo.IAO_0000115, RDF.type, OWL.AnnotationProperty)]
+        self.owl_nets.graph = adds_edges_to_graph(Graph(), triples)
+
+        # test string-derived flags
+        terms = set(x for y in triples for x in y)
+        term_table = self.owl_nets.classifies_terms(terms)
+        self.assertEqual(len(term_table), len(terms))
+        self.assertEqual(term_table[obo.SO_0000001], 0)
+        self.assertTrue(term_table[obo.BFO_0000001] & EXCLUDED)
+        self.assertTrue(term_table[obo.IAO_0000115] & SUPPORT)
+        self.assertTrue(term_table[OWL.Class] & OWL_NS)
+        self.assertTrue(term_table[RDFS.subClassOf] & SUBCLASS)
+
+        # test graph-derived flags
+        type_table = self.owl_nets.classifies_graph_terms(self.owl_nets.graph)
+        self.assertEqual(type_table[obo.SO_0000001], CLASS | PROPERTY)
+        self.assertEqual(type_table[obo.RO_0002202], PROPERTY | OBJECT_PROPERTY)
+        self.assertEqual(type_table[obo.IAO_0000115], 0)
+        self.assertNotIn(obo.BFO_0000001, type_table)
+
+        # test filtering with the tables
+        filtered_graph = self.owl_nets.removes_edges_with_owl_semantics(verbose=False)
+        self.assertEqual(len(filtered_graph), 2)
+
+        return None
+
     def test_cleans_decoded_graph(self):
         """Tests the cleans_decoded_graph method when owl has been decoded."""
 
@@ -301,6 +339,49 @@ class TestOwlNets(unittest.TestCase):
 
         return None
 
+    def test_finds_uri_deep_chain(self):
+        """Tests the finds_uri method when the class is nested deeper than the recursion limit."""
+
+        # set-up testing data
+        triples = [(BNode('N{}'.format(i)), RDF.rest, BNode('N{}'.format(i + 1))) for i in range(5000)]
+        triples += [(BNode('N5000'), RDF.first, obo.UBERON_0010023), (obo.UBERON_0010023, RDF.type, OWL.Class)]
+        self.owl_nets.graph = adds_edges_to_graph(Graph(), triples)
+
+        # test method
+        node = self.owl_nets.finds_uri(BNode('N0'), None)
+        self.assertEqual(node, obo.UBERON_0010023)
+        self.assertEqual(len(self.owl_nets.recurses_axioms([], triples[0:1])), 5001)
+
+        return None
+
+    def test_gets_bnode_closure(self):
+        """Tests the gets_bnode_closure method."""
+
+        # set-up testing data
+        triples = [(obo.UBERON_0002373, OWL.equivalentClass, BNode('N26cd7b2c')),
+                   (BNode('N26cd7b2c'), RDF.type, OWL.Restriction),
+                   (BNode('N26cd7b2c'), OWL.onProperty, obo.RO_0002202),
+                   (BNode('N26cd7b2c'), OWL.someValuesFrom, BNode('N31fefc6d')),
+                   (BNode('N31fefc6d'), OWL.unionOf, obo.UBERON_0010023)]
+        self.owl_nets.graph = adds_edges_to_graph(Graph(), triples)
+
+        # test method
+        matches = self.owl_nets.gets_bnode_closure(BNode('N26cd7b2c'))
+        self.assertIsInstance(matches, Set)
+        self.assertEqual(matches, set(triples[1:]))
+        self.assertEqual(self.owl_nets.gets_bnode_closure(BNode('N31fefc6d')), set(triples[4:]))
+        self.assertIn(BNode('N26cd7b2c'), self.owl_nets.bnode_memo)
+
+        # test memoized structures are re-used
+        del self.owl_nets.bnode_memo[BNode('N26cd7b2c')]; self.owl_nets.bnode_memo[BNode('N31fefc6d')] = frozenset()
+        self.assertEqual(self.owl_nets.gets_bnode_closure(BNode('N26cd7b2c')), set(triples[1:4]))
+
+        # test memo is reset when the graph changes
+        self.owl_nets.graph = adds_edges_to_graph(Graph(), triples[0:4])
+        self.assertEqual(self.owl_nets.gets_bnode_closure(BNode('N26cd7b2c')), set(triples[1:4]))
+
+        return None
+
     def test_reconciles_axioms(self):
         """Tests the reconciles_axioms method."""
 
@@ -591,6 +672,94 @@ class TestOwlNets(unittest.TestCase):
 
         return None
 
+    def test_cleans_owl_encoded_entities_encoded_graph(self):
+        """Tests the cleans_owl_encoded_entities method when the graph is an EncodedGraph."""
+
+        owl_nets = OwlNets(kg_construct_approach='subclass', graph=EncodedGraph(self.graph),
+                           write_location=self.write_location, filename=self.kg_filename)
+
+        # test method
+        owl_nets.cleans_owl_encoded_entities([obo.SO_0000822])
+        self.owl_nets.cleans_owl_encoded_entities([obo.SO_0000822])
+        self.assertIsInstance(owl_nets.graph, Graph)
+        self.assertEqual(set(owl_nets.graph), set(self.owl_nets.graph))
+
+        return None
+
+    def test_gets_entity_subgraph(self):
+        """Tests the gets_entity_subgraph method."""
+
+        # test method
+        subgraph = self.owl_nets.gets_entity_subgraph(obo.SO_0000822)
+        self.assertIsInstance(subgraph, List)
+        self.assertIn((obo.SO_0000822, RDF.type, OWL.Class), subgraph)
+        self.assertTrue(all(x[0] == obo.SO_0000822 or isinstance(x[0], BNode) or x[1] == RDF.type for x in subgraph))
+        self.assertTrue(all(x in self.graph for x in subgraph))
+
+        # test decoding the entity with only its subgraph
+        owl_nets = OwlNets(kg_construct_approach='subclass', graph=EncodedGraph(subgraph),
+                           write_location=self.write_location, filename=self.kg_filename)
+        owl_nets.cleans_owl_encoded_entities([obo.SO_0000822])
+        self.owl_nets.cleans_owl_encoded_entities([obo.SO_0000822])
+        self.assertEqual(set(owl_nets.graph), set(self.owl_nets.graph))
+
+        return None
+
+    def test_partitions_entities(self):
+        """Tests the partitions_entities method."""
+
+        entities = list(gets_ontology_classes(self.graph))[0:10]
+
+        # test method
+        partitions = self.owl_nets.partitions_entities(entities, 3)
+        self.assertIsInstance(partitions, List)
+        self.assertEqual(len(partitions), 3)
+        self.assertEqual(sorted(x for y in partitions for x in y), sorted(entities))
+        sizes = [sum(len(self.owl_nets.gets_entity_subgraph(x)) for x in y) for y in partitions]
+        largest = max(len(self.owl_nets.gets_entity_subgraph(x)) for x in entities)
+        self.assertTrue(max(sizes) - min(sizes) <= largest)
+
+        # test more partitions than entities
+        partitions = self.owl_nets.partitions_entities(entities[0:2], 4)
+        self.assertEqual(len(partitions), 2)
+
+        return None
+
+    def test_encoded_graph(self):
+        """Tests the EncodedGraph class."""
+
+        # set-up testing data
+        triples = [(BNode('N31fefc6d'), RDF.type, OWL.Axiom),
+                   (BNode('N31fefc6d'), OWL.annotatedSource, obo.UBERON_0002373),
+                   (BNode('N31fefc6d'), OWL.annotatedTarget, BNode('N26cd7b2c')),
+                   (BNode('N26cd7b2c'), RDF.type, OWL.Restriction),
+                   (BNode('N26cd7b2c'), OWL.onProperty, obo.RO_0002202),
+                   (obo.UBERON_0010023, RDF.type, OWL.Class),
+                   (obo.UBERON_0010023, RDFS.label, Literal('organ "part"', lang='en')),
+                   (obo.UBERON_0010023, obo.IAO_0000115, Literal('1', datatype=URIRef(str(XSD.integer))))]
+        graph = adds_edges_to_graph(Graph(), triples)
+        encoded_graph = pickle.loads(pickle.dumps(EncodedGraph(graph)))
+
+        # test graph api
+        self.assertEqual(len(encoded_graph), len(graph))
+        self.assertEqual(set(encoded_graph), set(graph))
+        self.assertEqual(list(encoded_graph.objects(BNode('N26cd7b2c'))), list(graph.objects(BNode('N26cd7b2c'))))
+        self.assertEqual(list(encoded_graph.objects(obo.UBERON_0010023, RDF.type)), [OWL.Class])
+        self.assertEqual(set(encoded_graph.subjects(RDF.type, None)), set(graph.subjects(RDF.type, None)))
+        self.assertIn((obo.UBERON_0010023, obo.IAO_0000115, Literal('1', datatype=URIRef(str(XSD.integer)))),
+                      encoded_graph)
+        self.assertEqual(list(encoded_graph.triples((obo.UBERON_0000001, None, None))), [])
+
+        # test lookups without a subject (i.e. through the predicate and object indexes)
+        self.assertEqual(set(encoded_graph.subjects(RDF.type, OWL.Restriction)), {BNode('N26cd7b2c')})
+        self.assertEqual(set(encoded_graph.triples((None, OWL.annotatedTarget, None))),
+                         set(graph.triples((None, OWL.annotatedTarget, None))))
+        self.assertEqual(set(encoded_graph.triples((None, None, OWL.Class))),
+                         set(graph.triples((None, None, OWL.Class))))
+        self.assertEqual(list(encoded_graph.triples((None, RDFS.label, OWL.Class))), [])
+
+        return None
+
     def test_makes_graph_connected_default(self):
         """Tests the makes_graph_connected method using the default argument for common_ancestor."""
 
@@ -615,6 +784,44 @@ class TestOwlNets(unittest.TestCase):
 
         return None
 
+    def test_makes_graph_connected_roots(self):
+        """Tests the makes_graph_connected method root detection and tie-breaking."""
+
+        # set-up testing data
+        triples = [(obo.SO_0000002, RDFS.subClassOf, obo.SO_0000001),
+                   (obo.SO_0000003, RDFS.subClassOf, obo.SO_0000002),
+                   (obo.SO_0000003, RDFS.subClassOf, obo.SO_0000004),
+                   (obo.SO_0000005, RDFS.subClassOf, obo.SO_0000006),
+                   (obo.SO_0000006, RDFS.subClassOf, obo.SO_0000005),
+                   (obo.SO_0000007, obo.RO_0002202, obo.SO_0000003),
+                   (obo.SO_0000007, obo.RO_0002202, obo.SO_0000002),
+                   (obo.SO_0000008, obo.RO_0002202, obo.SO_0000009)]
+        graph = adds_edges_to_graph(Graph(), triples)
+
+        # test method
+        connected_graph = self.owl_nets.makes_graph_connected(graph)
+        added = set(x[0] for x in set(connected_graph) - set(triples))
+        self.assertTrue(all(x[1] == RDFS.subClassOf and x[2] == obo.BFO_0000001 for x in set(connected_graph) -
+                            set(triples)))
+        # SO_0000003 takes the root of its highest parent, the cycle takes its smallest uri, SO_0000007 is connected
+        # through its neighbors, and nodes without ancestors or neighbors with ancestors are their own roots
+        self.assertEqual(added, {obo.SO_0000001, obo.SO_0000004, obo.SO_0000005, obo.SO_0000008, obo.SO_0000009})
+
+        return None
+
+    def test_makes_graph_connected_deterministic(self):
+        """Tests the makes_graph_connected method gives the same result when run repeatedly and when the graph's
+        triples are added in a different order."""
+
+        triples = sorted(self.owl_nets.graph); results = []
+        for i in range(3):
+            graph = adds_edges_to_graph(Graph(), triples[::-1] if i % 2 == 1 else triples, False)
+            results.append(set(self.owl_nets.makes_graph_connected(graph)))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+        return None
+
     def test_purifies_graph_build_none(self):
         """Tests the purifies_graph_build method when kg_construction is None."""
 
@@ -653,6 +860,40 @@ class TestOwlNets(unittest.TestCase):
 
         return None
 
+    def test_purifies_graph_build_ancestors(self):
+        """Tests the purifies_graph_build method adds edges to all ancestors of each object."""
+
+        # set-up testing data
+        triples = [(obo.SO_0000001, RDFS.subClassOf, obo.SO_0000002),
+                   (obo.SO_0000002, RDFS.subClassOf, obo.SO_0000003),
+                   (obo.SO_0000004, RDFS.subClassOf, obo.SO_0000002),
+                   (obo.SO_0000005, RDF.type, obo.SO_0000001),
+                   (obo.SO_0000006, RDF.type, obo.SO_0000001),
+                   (obo.SO_0000001, obo.RO_0002202, obo.SO_0000004)]
+
+        # test instance approach
+        owl_nets = OwlNets(kg_construct_approach='instance', graph=self.graph,
+                           write_location=self.write_location, filename=self.kg_filename)
+        graph = owl_nets.purifies_graph_build(adds_edges_to_graph(Graph(), triples))
+        self.assertEqual(set(graph.subject_objects(RDF.type)),
+                         {(obo.SO_0000001, obo.SO_0000002), (obo.SO_0000001, obo.SO_0000003),
+                          (obo.SO_0000002, obo.SO_0000003), (obo.SO_0000004, obo.SO_0000002),
+                          (obo.SO_0000004, obo.SO_0000003), (obo.SO_0000005, obo.SO_0000001),
+                          (obo.SO_0000006, obo.SO_0000001)})
+        self.assertEqual(len(list(graph.triples((None, RDFS.subClassOf, None)))), 0)
+        self.assertIn((obo.SO_0000001, obo.RO_0002202, obo.SO_0000004), graph)
+
+        # test subclass approach
+        owl_nets = OwlNets(kg_construct_approach='subclass', graph=self.graph,
+                           write_location=self.write_location, filename=self.kg_filename)
+        graph = owl_nets.purifies_graph_build(adds_edges_to_graph(Graph(), triples))
+        self.assertEqual(len(list(graph.triples((None, RDF.type, None)))), 0)
+        for x in [obo.SO_0000005, obo.SO_0000006]:
+            self.assertEqual(set(graph.objects(x, RDFS.subClassOf)), {obo.SO_0000001, obo.SO_0000002, obo.SO_0000003})
+        self.assertEqual(len(graph), 10)
+
+        return None
+
     def test_write_out_results_regular(self):
         """Tests the write_out_results method."""
 
@@ -0,0 +1,128 @@
+import logging
+import os
+import ray
+import tempfile
+import unittest
+import warnings
+
+from typing import Dict, List
+
+from pkt_kg.worker_pool import WorkerPool
+
+
+class Counter(object):
+    """Small stateful class used to test objects created on workers."""
+
+    def __init__(self, start: int, lookup: Dict) -> None:
+        self.total, self.lookup = start, lookup
+
+    def adds(self, key: str) -> int:
+        self.total += self.lookup[key]; return self.total
+
+    def gets_total(self) -> int:
+        return self.total
+
+
+def sums_items(values: List, item: int) -> int:
+    if item < 0: raise ValueError('negative item')
+    return sum(values) + item
+
+
+def exits_on_item(marker: str, values: List, item: int) -> int:
+    if item == 0 and not os.path.exists(marker): open(marker, 'w').close(); os._exit(1)
+    return sum(values) + item
+
+
+class TestWorkerPool(unittest.TestCase):
+    """Class to test the WorkerPool class from the worker_pool script."""
+
+    def setUp(self):
+        warnings.simplefilter('ignore', ResourceWarning)
+        logging.disable(logging.CRITICAL)
+
+        self.pool = WorkerPool(2)
+
+        return None
+
+    def test_initialization(self):
+        """Tests the class initialization."""
+
+        self.assertEqual(self.pool.cpus, 2)
+        self.assertEqual(len(self.pool.workers), 2)
+        self.assertRaises(ValueError, WorkerPool, 0)
+        self.assertRaises(ValueError, WorkerPool, '2')
+
+        return None
+
+    def test_creates_calls_gathers(self):
+        """Tests the shares, creates, calls, gathers, and releases methods."""
+
+        self.pool.shares('lookup', {'a': 1, 'b': 10})
+        self.pool.creates('counter', Counter, 5, WorkerPool.Shared('lookup'))
+        results = ray.get([self.pool.calls(0, 'counter', 'adds', 'a'), self.pool.calls(1, 'counter', 'adds', 'b')])
+        self.assertEqual(results, [6, 15])
+        self.pool.calls(0, 'counter', 'adds', 'b')
+        self.assertEqual(self.pool.gathers('counter', 'gets_total'), [16, 15])
+        self.assertEqual(self.pool.gathers('counter', 'gets_total', workers=[1]), [15])
+
+        # test releasing objects
+        self.pool.releases('counter'); self.pool.releases('lookup')
+        self.assertNotIn('lookup', self.pool.shared)
+        self.assertRaises(KeyError, self.pool.gathers, 'counter', 'gets_total')
+
+        # test creating an object on selected workers
+        self.pool.creates('counter', Counter, 1, {'c': 2}, workers=[1])
+        self.assertEqual(ray.get(self.pool.calls(1, 'counter', 'adds', 'c')), 3)
+        self.assertRaises(KeyError, self.pool.gathers, 'counter', 'gets_total', [0])
+
+        return None
+
+    def test_runs(self):
+        """Tests the runs method."""
+
+        self.pool.shares('values', [1, 2, 3])
+        results = {x: ray.get(ref) for x, ref in self.pool.runs(sums_items, [0, 10, 20], WorkerPool.Shared('values'))}
+        self.assertEqual(results, {0: 6, 10: 16, 20: 26})
+
+        # test that task errors are raised when the result is retrieved
+        refs = dict(self.pool.runs(sums_items, [1, -1], [1]))
+        self.assertEqual(ray.get(refs[1]), 2)
+        self.assertRaises(ValueError, ray.get, refs[-1])
+
+        return None
+
+    def test_runs_restarts_worker(self):
+        """Tests that a worker that dies during a task is restarted, reloads shared objects, and retries the task."""
+
+        pool = WorkerPool(1, max_restarts=1, max_task_retries=1); pool.shares('values', [1, 2, 3])
+        marker = tempfile.mktemp()
+        try:
+            results = {x: ray.get(ref) for x, ref in pool.runs(exits_on_item, [0, 10], marker,
+                                                                   WorkerPool.Shared('values'))}
+            self.assertEqual(results, {0: 6, 10: 16})
+        finally:
+            pool.shutdown()
+            if os.path.exists(marker): os.remove(marker)
+
+        return None
+
+    def test_runs_replaces_dead_worker(self):
+        """Tests that a worker that dies and cannot be restarted is replaced."""
+
+        pool = WorkerPool(1, max_restarts=0, max_task_retries=0); pool.shares('values', [1, 2, 3])
+        marker = tempfile.mktemp(); dead_worker = pool.workers[0]
+        try:
+            refs = dict(pool.runs(exits_on_item, [0, 10], marker, WorkerPool.Shared('values')))
+            self.assertRaises(ray.exceptions.RayActorError, ray.get, refs[0])
+            self.assertEqual(ray.get(refs[10]), 16)
+            self.assertIsNot(dead_worker, pool.workers[0])
+        finally:
+            pool.shutdown()
+            if os.path.exists(marker): os.remove(marker)
+
+        return None
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+        return None